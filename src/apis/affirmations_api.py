@@ -48,7 +48,9 @@ from core.containers import Services
 
 
 
-router = APIRouter()
+from apis.timed_route import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
 
 ns_pkg = impl
 for _, name, _ in pkgutil.iter_modules(ns_pkg.__path__, ns_pkg.__name__ + "."):
@@ -53,7 +53,9 @@ from impl.services.auth.login_with_refresh_service import LoginWithRefreshServic
 from impl.services.auth.login_service import LoginService
 from dotenv import load_dotenv
 
-router = APIRouter()
+from apis.timed_route import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
 
 ns_pkg = impl
 for _, name, _ in pkgutil.iter_modules(ns_pkg.__path__, ns_pkg.__name__ + "."):
@@ -108,7 +110,7 @@ async def auth_register_post(
       
         reg = RegisterService(auth_register_post_request, dependencies=services)
         
-        # create the starter chat in a new session
+        # the starter chat shares the request session: user and chat commit together
         from impl.services.chat.create_chat_service import CreateChatService
         CreateChatService(user_id=reg.new_user_id, dependencies=services)
 
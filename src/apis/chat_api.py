@@ -36,7 +36,9 @@ from models.chat_post201_response import ChatPost201Response
 from models.usage_metrics import UsageMetrics
 from security_api import get_token_bearerAuth
 
-router = APIRouter()
+from apis.timed_route import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
 
 ns_pkg = impl
 for _, name, _ in pkgutil.iter_modules(ns_pkg.__path__, ns_pkg.__name__ + "."):
@@ -169,8 +171,23 @@ async def chat_chat_id_usage_get(
     token_bearerAuth: TokenModel = Security(
         get_token_bearerAuth
     ),
+    services: Services = Depends(get_services),
 ) -> UsageMetrics:
-   pass
+
+    try:
+        logger.debug(f"usage request for chat")
+
+        user_id = token_bearerAuth.sub
+        from impl.services.chat.chat_usage_service import ChatUsageService
+        p = ChatUsageService(user_id, chat_id, dependencies=services, var_from=var_from, to=to)
+
+        return p.response
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching chat usage: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
 @router.get(
     "/chat",
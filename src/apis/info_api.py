@@ -29,7 +29,9 @@ from models.info_models_get200_response import InfoModelsGet200Response
 from models.info_models_get500_response import InfoModelsGet500Response
 
 
-router = APIRouter()
+from apis.timed_route import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
 
 ns_pkg = impl
 for _, name, _ in pkgutil.iter_modules(ns_pkg.__path__, ns_pkg.__name__ + "."):
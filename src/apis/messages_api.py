@@ -24,8 +24,12 @@ from fastapi import (  # noqa: F401
     Query,
     Response,
     Security,
+    WebSocket,
     status,
 )
+from starlette.websockets import WebSocketState
+
+from fastapi.responses import StreamingResponse
 
 from models.extra_models import TokenModel  # noqa: F401
 from datetime import datetime
@@ -35,9 +39,14 @@ from typing_extensions import Annotated
 from models.chat_message import ChatMessage
 from models.new_message_request import NewMessageRequest
 from models.new_message_response import NewMessageResponse
-from security_api import get_token_bearerAuth
+from models.import_messages_response import ImportMessagesResponse
+from models.audio_message_response import AudioMessageResponse
+from security_api import get_token_bearerAuth, decode_access_token
+from impl.idempotency_store import IdempotencyKeyConflict
+
+from apis.timed_route import TimedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 ns_pkg = impl
 for _, name, _ in pkgutil.iter_modules(ns_pkg.__path__, ns_pkg.__name__ + "."):
@@ -65,10 +74,13 @@ def get_services(request: Request) -> Services:
     response_model_by_alias=True,
 )
 async def chat_chat_id_messages_get(
+    response: Response,
     chat_id: int = Path(..., description="Target chat identifier"),          # ← int
-    limit: int = Query(50, description="Max items to return"),               # ← int
-    offset: int = Query(0, description="Items to skip"),            
+    limit: int = Query(50, ge=1, le=500, description="Max items to return"),  # ← int
+    offset: int = Query(0, ge=0, description="Items to skip (legacy; prefer cursor)"),
     since: Annotated[Optional[datetime], Field(description="Return messages created after this timestamp")] = Query(None, description="Return messages created after this timestamp", alias="since"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor / X-Prev-Cursor"),
+    direction: str = Query("forward", description="Without a cursor: 'forward' (from the oldest) or 'backward' (from the newest)"),
     token_bearerAuth: TokenModel = Security(get_token_bearerAuth),
     services: Services = Depends(get_services),
 ) -> List[ChatMessage]:
@@ -81,11 +93,21 @@ async def chat_chat_id_messages_get(
         # user_id = token_bearerAuth.sub
         user_id=int(token_bearerAuth.sub)  
         from impl.services.chat.bring_messages_service import BringMessagesService
-        p = BringMessagesService(user_id, chat_id , dependencies=services)
-        
+        p = BringMessagesService(
+            user_id, chat_id, dependencies=services,
+            limit=limit, offset=offset, since=since, cursor=cursor, direction=direction,
+        )
+
+        if p.next_cursor:
+            response.headers["X-Next-Cursor"] = p.next_cursor
+        if p.prev_cursor:
+            response.headers["X-Prev-Cursor"] = p.prev_cursor
+        response.headers["X-Has-More"] = "true" if p.has_more else "false"
         return p.response
 
        
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing file: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
@@ -120,8 +142,10 @@ async def chat_chat_id_messages_message_id_get(
     response_model_by_alias=True,
 )
 async def chat_chat_id_messages_post(
+    response: Response,
     chat_id: Annotated[StrictInt, Field(description="Target chat identifier")] = Path(..., description="Target chat identifier"),
     new_message_request: Optional[NewMessageRequest] = Body(None, description=""),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     token_bearerAuth: TokenModel = Security( get_token_bearerAuth),
     services: Services = Depends(get_services),
 ) -> NewMessageResponse:
@@ -132,11 +156,169 @@ async def chat_chat_id_messages_post(
         from impl.services.messages.process_new_message_service import ProcessNewMessageService
         p = ProcessNewMessageService( user_id, chat_id, new_message_request,   dependencies=services)
 
-        
-        
-        return p.response
+        if not idempotency_key:
+            return await p.run()
+
+        # retries with the same key share one execution / stored response
+        store = services.idempotency_store()
+        fingerprint = store.fingerprint(new_message_request.to_dict() if new_message_request else None)
+        try:
+            result, replayed = await store.run((user_id, chat_id, idempotency_key), fingerprint, p.run)
+        except IdempotencyKeyConflict:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used with a different request body",
+            )
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
+        return result
 
        
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing file: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+
+@router.post(
+    "/chat/{chat_id}/messages/stream",
+    responses={
+        200: {"content": {"text/event-stream": {}}, "description": "Event stream of the assistant reply"},
+    },
+    tags=["messages"],
+    summary="Post a new message and stream the assistant reply",
+    response_model_by_alias=True,
+)
+async def chat_chat_id_messages_stream_post(
+    chat_id: Annotated[StrictInt, Field(description="Target chat identifier")] = Path(..., description="Target chat identifier"),
+    new_message_request: Optional[NewMessageRequest] = Body(None, description=""),
+    token_bearerAuth: TokenModel = Security( get_token_bearerAuth),
+    services: Services = Depends(get_services),
+) -> StreamingResponse:
+    try:
+        logger.debug(f"new streamed message request")
+
+        user_id = token_bearerAuth.sub
+        from impl.services.messages.stream_new_message_service import StreamNewMessageService
+        p = StreamNewMessageService(user_id, chat_id, new_message_request, dependencies=services)
+        await p.prepare()
+
+        return StreamingResponse(
+            p.events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing file: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+
+@router.post(
+    "/chat/{chat_id}/messages/import",
+    responses={
+        200: {"model": ImportMessagesResponse, "description": "Messages imported"},
+        422: {"description": "Malformed line (earlier batches stay committed)"},
+    },
+    tags=["messages"],
+    summary="Bulk-import a transcript (NDJSON, no assistant replies generated)",
+    response_model_by_alias=True,
+)
+async def chat_chat_id_messages_import_post(
+    request: Request,
+    chat_id: Annotated[StrictInt, Field(description="Target chat identifier")] = Path(..., description="Target chat identifier"),
+    token_bearerAuth: TokenModel = Security( get_token_bearerAuth),
+    services: Services = Depends(get_services),
+) -> ImportMessagesResponse:
+    try:
+        logger.debug(f"bulk message import request")
+
+        user_id = token_bearerAuth.sub
+        settings = services.config.bulk_import() or {}
+        from impl.services.messages.import_messages_service import ImportMessagesService
+        p = ImportMessagesService(
+            user_id, chat_id, request.stream(),
+            dependencies=services,
+            batch_size=settings.get("batch_size", 5000),
+            max_line_bytes=settings.get("max_line_bytes", 1024 * 1024),
+        )
+        return await p.run()
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error importing messages: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+
+@router.post(
+    "/chat/{chat_id}/messages/audio",
+    responses={
+        200: {"model": AudioMessageResponse, "description": "Voice message transcribed and answered"},
+        413: {"description": "Audio larger than the upload limit"},
+        422: {"description": "No speech recognised"},
+        503: {"description": "Speech-to-text is not configured"},
+    },
+    tags=["messages"],
+    summary="Post a voice message (streamed audio body)",
+    response_model_by_alias=True,
+)
+async def chat_chat_id_messages_audio_post(
+    request: Request,
+    chat_id: Annotated[StrictInt, Field(description="Target chat identifier")] = Path(..., description="Target chat identifier"),
+    language: Optional[str] = Query(None, description="Spoken language hint (e.g. 'en')"),
+    model_name: Optional[str] = Query(None, description="Per-message model override"),
+    token_bearerAuth: TokenModel = Security( get_token_bearerAuth),
+    services: Services = Depends(get_services),
+) -> AudioMessageResponse:
+    try:
+        logger.debug(f"voice message request")
+
+        user_id = token_bearerAuth.sub
+        settings = services.config.audio() or {}
+        from impl.services.messages.audio_message_service import AudioMessageService
+        p = AudioMessageService(
+            user_id, chat_id, request.stream(),
+            dependencies=services,
+            content_type=request.headers.get("content-type"),
+            language=language,
+            config={"model_name": model_name} if model_name else None,
+            max_bytes=settings.get("max_bytes", 25 * 1024 * 1024),
+            spool_dir=settings.get("spool_dir"),
+            queue_chunks=settings.get("queue_chunks", 64),
+        )
+        return await p.run()
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing voice message: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+
+@router.websocket("/chat/{chat_id}/ws")
+async def chat_chat_id_ws(
+    websocket: WebSocket,
+    chat_id: int = Path(..., description="Target chat identifier"),
+    token: Optional[str] = Query(None, description="Bearer token (browsers can't set headers on WebSockets)"),
+) -> None:
+    # authenticate once for the whole connection
+    authorization = websocket.headers.get("authorization", "")
+    raw_token = token or (authorization[7:] if authorization.lower().startswith("bearer ") else None)
+    try:
+        token_bearerAuth = decode_access_token(raw_token or "")
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Invalid token")
+        return
+
+    try:
+        from impl.services.messages.chat_socket_service import ChatSocketService
+        p = ChatSocketService(websocket, token_bearerAuth.sub, chat_id, dependencies=websocket.app.state.services)
+        await p.run()
+    except Exception as e:
+        logger.error(f"WebSocket error (chat_id={chat_id}): {str(e)}", exc_info=True)
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
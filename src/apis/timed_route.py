@@ -0,0 +1,36 @@
+# here is apis/timed_route.py
+
+from typing import Any, Callable, Coroutine
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from impl import request_timing
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that splits handler time into ``endpoint`` and ``serialize`` spans.
+
+    Use as ``APIRouter(route_class=TimedRoute)``.  The endpoint function is
+    wrapped (signature preserved) and marks when it returns; whatever the
+    route handler does after that – response model validation and JSON
+    encoding – is recorded as ``serialize``.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        super().__init__(path, request_timing.timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def timed_route_handler(request: Request) -> Response:
+            response = await handler(request)
+            timer = request_timing.current()
+            if timer is not None:
+                serialize_s = timer.since("endpoint_done")
+                if serialize_s is not None:
+                    timer.add("serialize", serialize_s)
+            return response
+
+        return timed_route_handler
@@ -33,8 +33,12 @@ from datetime import datetime
 
 
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from core.dependencies import setup_dependencies
+from db.request_session import request_session
+from db.models import Base
+from db.migrations import apply_migrations
+import anyio
 
 
 from apis.chat_api import router as ChatApiRouter
@@ -46,6 +50,7 @@ from apis.affirmations_api import router as AffirmationsApiRouter
 
 from starlette.middleware.base import BaseHTTPMiddleware
 import uuid
+from impl import request_timing
 
 # from starlette.middleware.cors import CORSMiddleware
 from fastapi.middleware.cors import CORSMiddleware
@@ -67,7 +72,8 @@ app = FastAPI(
     openapi_url="/openapi.json",
     description="API for voice chat",
     version="1.0.0",
-
+    # one DB session per request, committed / rolled back after the endpoint
+    dependencies=[Depends(request_session, scope="function")],
 )
 
 
@@ -84,6 +90,11 @@ origins = [
 
 
 
+timing_logger = logging.getLogger("request_timing")
+
+request_timing.instrument_sqlalchemy()
+
+
 class RequestIDMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
         # Generate a new UUID for this request
@@ -93,11 +104,43 @@ class RequestIDMiddleware(BaseHTTPMiddleware):
         # (e.g., logging or returning to the client)
         request.state.request_id = request_id
 
+        # spans recorded below this point (auth, db, llm, ...) end up on this timer
+        timer, token = request_timing.start(request_id)
+        try:
+            response = await call_next(request)
+        finally:
+            request_timing.reset(token)
+
         # You can also add it as a header in the response
-        response = await call_next(request)
         response.headers["X-Request-ID"] = request_id
+        # covers everything up to the response headers; the log record below
+        # is written once the body is sent, so it also covers streamed replies
+        response.headers["Server-Timing"] = timer.server_timing()
+        response.body_iterator = self._log_when_sent(response.body_iterator, request, response, timer)
         return response
 
+    @staticmethod
+    async def _log_when_sent(body_iterator, request: Request, response, timer):
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        finally:
+            spans = timer.spans()
+            total_ms = round(timer.elapsed() * 1000, 3)
+            timing_logger.info(
+                "%s %s %s -> %s total=%.1fms %s",
+                timer.request_id, request.method, request.url.path, response.status_code, total_ms,
+                " ".join(f"{name}={ms:.1f}ms/{n}" for name, (ms, n) in spans.items()),
+                extra={
+                    "request_id": timer.request_id,
+                    "method": request.method,
+                    "path": request.url.path,
+                    "status_code": response.status_code,
+                    "total_ms": total_ms,
+                    "spans": {name: {"ms": ms, "count": n} for name, (ms, n) in spans.items()},
+                },
+            )
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins , # Adjust this to more specific domains for security
@@ -128,9 +171,21 @@ from contextlib import asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     app.state.services = services
+    # threadpool size = DB pool size: each thread running blocking DB work
+    # gets a connection without waiting
+    worker_threads = (services.config.db() or {}).get("worker_threads")
+    if worker_threads:
+        anyio.to_thread.current_default_thread_limiter().total_tokens = worker_threads
+    # creates tables added since the DB was provisioned (e.g. chat_summaries)
+    Base.metadata.create_all(bind=services.engine())
+    # changes to existing tables (indexes, …) come from versioned migrations
+    apply_migrations(services.engine())
     logger.debug("Configurations loaded and services initialized")
     yield
-    # Shutdown (if needed)
+    # Shutdown
+    await services.conversation_summarizer().aclose()
+    await services.llm_service().aclose()
+    await services.async_engine().dispose()
 
 app.router.lifespan_context = lifespan
 
@@ -0,0 +1,391 @@
+# benchmarks/load_benchmark.py
+"""End-to-end load benchmark for the FastAPI app.
+
+Runs the real app in-process (httpx ASGI transport, lifespan included)
+against a freshly seeded temporary SQLite database and the fake LLM backend,
+so results are reproducible and cost nothing:
+
+    cd src
+    python -m benchmarks.load_benchmark --concurrency 16 --requests 200 --out bench.json
+
+Every scenario is driven by ``--concurrency`` workers until ``--requests``
+requests have completed.  Per scenario the JSON report contains throughput,
+latency percentiles and a breakdown of where the time went:
+
+* ``db_ms``    – time inside SQL statements (cursor events of the sync and
+                 async engines)
+* ``llm_ms``   – time inside MyLLMService generations (incl. limiter wait)
+* ``other_ms`` – the rest: routing, auth, validation, serialisation, waits
+
+Background work (e.g. conversation summaries) is not attributed to requests.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+SCENARIOS = (
+    "chat_create",          # POST /chat
+    "chat_list",            # GET  /chat
+    "messages_list",        # GET  /chat/{id}/messages
+    "messages_post",        # POST /chat/{id}/messages
+    "affirmations_list",    # GET  /affirmations
+    "affirmation_create",   # POST /affirmations
+    "affirmations_ai_create",  # POST /affirmations/ai-create
+)
+
+
+# ──────────────────────────────────────────────────────────────
+# per-request time accounting
+# ──────────────────────────────────────────────────────────────
+@dataclass
+class RequestTimings:
+    db_s: float = 0.0
+    db_queries: int = 0
+    llm_s: float = 0.0
+    llm_calls: int = 0
+
+
+_current: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar("bench_timings", default=None)
+
+
+def _instrument_engine(engine) -> None:
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("bench_t0", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["bench_t0"].pop()
+        timings = _current.get()
+        if timings is not None:
+            timings.db_s += time.perf_counter() - started
+            timings.db_queries += 1
+
+
+def _instrument_llm(llm) -> None:
+    """Wrap the generation entry points of the shared MyLLMService instance."""
+    sync_gen, async_gen, stream = llm.execute_generation, llm.execute_generation_async, llm.stream_ai_answer
+
+    def execute_generation(*args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return sync_gen(*args, **kwargs)
+        finally:
+            _add_llm(time.perf_counter() - t0)
+
+    async def execute_generation_async(*args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return await async_gen(*args, **kwargs)
+        finally:
+            _add_llm(time.perf_counter() - t0)
+
+    async def stream_ai_answer(*args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            async for delta in stream(*args, **kwargs):
+                yield delta
+        finally:
+            _add_llm(time.perf_counter() - t0)
+
+    llm.execute_generation = execute_generation
+    llm.execute_generation_async = execute_generation_async
+    llm.stream_ai_answer = stream_ai_answer
+
+
+def _add_llm(elapsed: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.llm_s += elapsed
+        timings.llm_calls += 1
+
+
+# ──────────────────────────────────────────────────────────────
+# seeding
+# ──────────────────────────────────────────────────────────────
+@dataclass
+class Fixture:
+    users: List[int] = field(default_factory=list)
+    chats: Dict[int, List[int]] = field(default_factory=dict)   # user_id → chat ids
+    tokens: Dict[int, str] = field(default_factory=dict)
+
+
+def seed_database(db_url: str, *, users: int, chats_per_user: int, messages_per_chat: int, seed: int) -> Fixture:
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from db.models import Base, Chat, Message, User
+
+    engine = create_engine(db_url)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    rng = random.Random(seed)
+    fixture = Fixture()
+    try:
+        for i in range(users):
+            user = User(name=f"bench{i}", email=f"bench{i}@example.com", password_hash="x", is_verified=True)
+            session.add(user)
+            session.flush()
+            fixture.users.append(user.user_id)
+            fixture.chats[user.user_id] = []
+            for _ in range(chats_per_user):
+                chat = Chat(user_id=user.user_id, settings={})
+                session.add(chat)
+                session.flush()
+                fixture.chats[user.user_id].append(chat.id)
+                for m in range(messages_per_chat):
+                    is_user = m % 2 == 0
+                    session.add(Message(
+                        chat_id=chat.id,
+                        user_id=user.user_id if is_user else 0,
+                        user_name="User" if is_user else "AI",
+                        user_type="user" if is_user else "assistant",
+                        message=f"seed message {m} " + "lorem " * rng.randint(5, 40),
+                        message_format="text",
+                    ))
+        session.commit()
+    finally:
+        session.close()
+        engine.dispose()
+    return fixture
+
+
+def mint_tokens(fixture: Fixture, secret: str) -> None:
+    from jose import jwt
+
+    for user_id in fixture.users:
+        fixture.tokens[user_id] = jwt.encode({"sub": str(user_id)}, secret, algorithm="HS256")
+
+
+# ──────────────────────────────────────────────────────────────
+# workload
+# ──────────────────────────────────────────────────────────────
+def _request_for(scenario: str, fixture: Fixture, rng: random.Random, n: int) -> Dict[str, Any]:
+    user_id = fixture.users[n % len(fixture.users)]
+    chat_id = rng.choice(fixture.chats[user_id])
+    headers = {"Authorization": f"Bearer {fixture.tokens[user_id]}"}
+    if scenario == "chat_create":
+        return dict(method="POST", url="/chat", headers=headers)
+    if scenario == "chat_list":
+        return dict(method="GET", url="/chat", headers=headers)
+    if scenario == "messages_list":
+        return dict(method="GET", url=f"/chat/{chat_id}/messages", headers=headers)
+    if scenario == "messages_post":
+        return dict(method="POST", url=f"/chat/{chat_id}/messages", headers=headers,
+                    json={"message": f"benchmark message {n}: how do I stay consistent?"})
+    if scenario == "affirmations_list":
+        return dict(method="GET", url="/affirmations", headers=headers)
+    if scenario == "affirmation_create":
+        return dict(method="POST", url="/affirmations", headers=headers, json={"text": f"I keep going ({n})"})
+    if scenario == "affirmations_ai_create":
+        return dict(method="POST", url="/affirmations/ai-create", headers=headers,
+                    json={"context_corpus": f"starting a new job, request {n}", "amount": 3,
+                          "style": "balanced", "uslub": "gentle"})
+    raise ValueError(f"unknown scenario: {scenario}")
+
+
+@dataclass
+class Sample:
+    status: int
+    latency_s: float
+    timings: RequestTimings
+
+
+async def run_scenario(client, scenario: str, fixture: Fixture, *, requests: int, concurrency: int, seed: int):
+    rng = random.Random(f"{seed}:{scenario}")
+    plan = [_request_for(scenario, fixture, rng, n) for n in range(requests)]
+    samples: List[Sample] = []
+    cursor = iter(plan)
+
+    async def worker() -> None:
+        for req in cursor:
+            timings = RequestTimings()
+            token = _current.set(timings)
+            t0 = time.perf_counter()
+            try:
+                response = await client.request(**req)
+                status = response.status_code
+            except Exception:
+                status = 599
+            finally:
+                _current.reset(token)
+            samples.append(Sample(status, time.perf_counter() - t0, timings))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+# ──────────────────────────────────────────────────────────────
+# reporting
+# ──────────────────────────────────────────────────────────────
+def _pct(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(q * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def _dist_ms(values_s: List[float]) -> Dict[str, float]:
+    ms = [v * 1000 for v in values_s]
+    return {
+        "mean": round(statistics.fmean(ms), 3) if ms else 0.0,
+        "p50": round(_pct(ms, 0.50), 3),
+        "p95": round(_pct(ms, 0.95), 3),
+        "p99": round(_pct(ms, 0.99), 3),
+        "max": round(max(ms), 3) if ms else 0.0,
+    }
+
+
+def summarize(samples: List[Sample], wall_s: float) -> Dict[str, Any]:
+    statuses: Dict[str, int] = {}
+    for s in samples:
+        statuses[str(s.status)] = statuses.get(str(s.status), 0) + 1
+    ok = [s for s in samples if s.status < 400]
+    return {
+        "requests": len(samples),
+        "errors": len(samples) - len(ok),
+        "status_codes": statuses,
+        "wall_s": round(wall_s, 3),
+        "throughput_rps": round(len(samples) / wall_s, 2) if wall_s else 0.0,
+        "latency_ms": _dist_ms([s.latency_s for s in ok]),
+        "db_ms": _dist_ms([s.timings.db_s for s in ok]),
+        "llm_ms": _dist_ms([s.timings.llm_s for s in ok]),
+        "other_ms": _dist_ms([max(0.0, s.latency_s - s.timings.db_s - s.timings.llm_s) for s in ok]),
+        "db_queries_per_request": round(statistics.fmean([s.timings.db_queries for s in ok]), 2) if ok else 0.0,
+        "llm_calls_per_request": round(statistics.fmean([s.timings.llm_calls for s in ok]), 2) if ok else 0.0,
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+# ──────────────────────────────────────────────────────────────
+# entry point
+# ──────────────────────────────────────────────────────────────
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Load benchmark for the chat API (fake LLM, temp SQLite DB)")
+    p.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=SCENARIOS)
+    p.add_argument("--concurrency", type=int, default=16)
+    p.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    p.add_argument("--warmup", type=int, default=10, help="unmeasured requests per scenario")
+    p.add_argument("--users", type=int, default=20)
+    p.add_argument("--chats-per-user", type=int, default=3)
+    p.add_argument("--messages-per-chat", type=int, default=20)
+    p.add_argument("--seed", type=int, default=1234)
+    p.add_argument("--llm-ttft-ms", type=float, default=300.0, help="median fake time-to-first-token")
+    p.add_argument("--llm-ttft-sigma", type=float, default=0.3, help="lognormal sigma of the TTFT")
+    p.add_argument("--llm-tokens-per-second", type=float, default=200.0)
+    p.add_argument("--llm-error-rate", type=float, default=0.0)
+    p.add_argument("--log-level", default="WARNING")
+    p.add_argument("--out", help="write the JSON report here instead of stdout")
+    return p.parse_args(argv)
+
+
+async def _run(args: argparse.Namespace, fixture: Fixture, db_url: str) -> Dict[str, Any]:
+    import httpx
+    import app as app_module
+
+    services = app_module.services
+    services.config.from_dict({
+        "db_url": db_url,
+        "llm": {
+            "backend": "fake",
+            "fake": {
+                "seed": args.seed,
+                "ttft_ms": {"distribution": "lognormal", "median": args.llm_ttft_ms, "sigma": args.llm_ttft_sigma},
+                "tokens_per_second": args.llm_tokens_per_second,
+                "error_rate": args.llm_error_rate,
+            },
+        },
+    })
+    services.engine.reset()
+    services.session_factory.reset()
+    services.async_engine.reset()
+    services.async_session_factory.reset()
+    _instrument_engine(services.engine())
+    # the message path runs on the async engine; its events fire on the sync proxy
+    _instrument_engine(services.async_engine().sync_engine)
+    _instrument_llm(services.llm_service())
+
+    results: Dict[str, Any] = {}
+    async with app_module.app.router.lifespan_context(app_module.app):
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for scenario in args.scenarios:
+                if args.warmup:
+                    await run_scenario(client, scenario, fixture, requests=args.warmup,
+                                       concurrency=min(args.concurrency, args.warmup), seed=args.seed + 1)
+                samples, wall = await run_scenario(client, scenario, fixture, requests=args.requests,
+                                                   concurrency=args.concurrency, seed=args.seed)
+                results[scenario] = summarize(samples, wall)
+                logging.getLogger(__name__).warning(
+                    "%s: %.1f req/s, p95 %.1f ms", scenario,
+                    results[scenario]["throughput_rps"], results[scenario]["latency_ms"]["p95"],
+                )
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    args = parse_args(argv)
+
+    # must be in place before the app (and security_api) are imported
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    os.environ["LLM_BACKEND"] = "fake"
+
+    workdir = tempfile.mkdtemp(prefix="voicechat-bench-")
+    db_url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    fixture = seed_database(db_url, users=args.users, chats_per_user=args.chats_per_user,
+                            messages_per_chat=args.messages_per_chat, seed=args.seed)
+    mint_tokens(fixture, os.environ["SECRET_KEY"])
+
+    import app as app_module  # noqa: F401  (configures logging on import)
+    logging.getLogger().setLevel(args.log_level)
+    for handler in logging.getLogger().handlers:
+        handler.setLevel(args.log_level)
+
+    results = asyncio.run(_run(args, fixture, db_url))
+
+    report = {
+        "benchmark": "load_benchmark",
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "config": {k: v for k, v in vars(args).items() if k != "out"},
+        "scenarios": results,
+    }
+    payload = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(payload + "\n")
+    else:
+        print(payload)
+    return report
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
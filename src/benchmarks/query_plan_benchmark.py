@@ -0,0 +1,246 @@
+# benchmarks/query_plan_benchmark.py
+"""Query plans and latencies of the hot repository reads, before and after
+the schema migrations.
+
+Seeds a temporary SQLite database shaped like a pre-migration
+``voicechat.db`` (tables only, none of the migration indexes), then for
+each case:
+
+1. captures the SQL the repository method actually sends,
+2. records its ``EXPLAIN QUERY PLAN``,
+3. times ``--repeat`` calls of the repository method,
+
+once before and once after `db.migrations.apply_migrations`:
+
+    cd src
+    python -m benchmarks.query_plan_benchmark --chats 500 --messages-per-chat 200 --out plans.json
+
+Messages of different chats are interleaved in insertion order, as they are
+in a live database, so a chat's rows are spread over the whole table.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.load_benchmark import _git_revision
+
+MIGRATION_INDEXES = ("ix_messages_chat_id_timestamp", "ix_affirmations_active_user_created")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--users", type=int, default=200)
+    p.add_argument("--chats", type=int, default=500)
+    p.add_argument("--messages-per-chat", type=int, default=200)
+    p.add_argument("--affirmations-per-user", type=int, default=60)
+    p.add_argument("--inactive-ratio", type=float, default=0.5, help="share of affirmations with is_active = 0")
+    p.add_argument("--repeat", type=int, default=200, help="timed calls per case and phase")
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--out", default=None, help="write the JSON report here (default: stdout)")
+    return p.parse_args(argv)
+
+
+# ──────────────────────────────────────────────────────────────
+# fixture
+# ──────────────────────────────────────────────────────────────
+def seed_database(engine, args: argparse.Namespace) -> Dict[str, List[int]]:
+    """Bulk-load users, chats, interleaved messages and affirmations; drop the migration indexes."""
+    from sqlalchemy import insert, text
+    from db.models import Affirmation, Base, Chat, Message, User
+
+    Base.metadata.create_all(engine)
+    rng = random.Random(args.seed)
+    start = datetime(2024, 1, 1)
+
+    with engine.begin() as conn:
+        for name in MIGRATION_INDEXES:       # what an existing, unmigrated DB looks like
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+        user_ids = list(conn.execute(
+            insert(User).returning(User.user_id, sort_by_parameter_order=True),
+            [dict(name=f"plan{i}", email=f"plan{i}@example.com", password_hash="x", is_verified=True)
+             for i in range(args.users)],
+        ).scalars())
+        chat_owner = [rng.choice(user_ids) for _ in range(args.chats)]
+        chat_ids = list(conn.execute(
+            insert(Chat).returning(Chat.id, sort_by_parameter_order=True),
+            [dict(user_id=owner, settings={}) for owner in chat_owner],
+        ).scalars())
+
+        # round-robin over chats: chat rows end up spread across the table
+        rows = []
+        for m in range(args.messages_per_chat):
+            for chat_id, owner in zip(chat_ids, chat_owner):
+                is_user = m % 2 == 0
+                rows.append(dict(
+                    chat_id=chat_id,
+                    user_id=owner if is_user else 0,
+                    user_name="User" if is_user else "AI",
+                    user_type="user" if is_user else "assistant",
+                    message=f"message {m} " + "lorem " * rng.randint(5, 30),
+                    message_format="text",
+                    timestamp=start + timedelta(minutes=m, seconds=rng.random()),
+                ))
+            if len(rows) >= 20000:
+                conn.execute(insert(Message), rows)
+                rows = []
+        if rows:
+            conn.execute(insert(Message), rows)
+
+        affirmations = [
+            dict(user_id=user_id, content=f"I am steady ({k})", category=rng.choice(("focus", "calm", "growth")),
+                 is_active=rng.random() >= args.inactive_ratio,
+                 created_at=start + timedelta(hours=rng.randint(0, 24 * 365)))
+            for k in range(args.affirmations_per_user)
+            for user_id in user_ids
+        ]
+        conn.execute(insert(Affirmation), affirmations)
+
+    return {"users": user_ids, "chats": chat_ids}
+
+
+# ──────────────────────────────────────────────────────────────
+# cases
+# ──────────────────────────────────────────────────────────────
+def cases(fixture: Dict[str, List[int]]) -> Dict[str, Callable[[Any, random.Random], Any]]:
+    from db.repositories.affirmation_repository import AffirmationRepository
+    from db.repositories.message_repository import MessageRepository
+
+    chats, users = fixture["chats"], fixture["users"]
+    since = datetime(2024, 1, 1) + timedelta(minutes=150)
+    return {
+        "messages.fetch_last_n": lambda s, rng: MessageRepository(s).fetch_last_n(
+            chat_id=rng.choice(chats), n=50),
+        "messages.fetch_messages": lambda s, rng: MessageRepository(s).fetch_messages(
+            chat_id=rng.choice(chats), limit=50),
+        "messages.fetch_messages_since": lambda s, rng: MessageRepository(s).fetch_messages(
+            chat_id=rng.choice(chats), limit=50, since=since),
+        "affirmations.get_user_affirmations": lambda s, rng: AffirmationRepository(s).get_user_affirmations(
+            rng.choice(users)),
+    }
+
+
+def _capture_sql(engine, session_factory, call) -> Tuple[str, Any]:
+    from sqlalchemy import event
+
+    seen: List[Tuple[str, Any]] = []
+
+    def _on_execute(conn, cursor, statement, parameters, context, executemany):
+        seen.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _on_execute)
+    try:
+        session = session_factory()
+        try:
+            call(session, random.Random(0))
+        finally:
+            session.close()
+    finally:
+        event.remove(engine, "before_cursor_execute", _on_execute)
+    return seen[-1]
+
+
+def _query_plan(engine, statement: str, parameters: Any) -> List[str]:
+    raw = engine.raw_connection()
+    try:
+        return [row[3] for row in raw.cursor().execute("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()]
+    finally:
+        raw.close()
+
+
+def run_phase(engine, session_factory, fixture, repeat: int, seed: int) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for name, call in cases(fixture).items():
+        statement, parameters = _capture_sql(engine, session_factory, call)
+        rng = random.Random(seed)
+        samples: List[float] = []
+        session = session_factory()
+        try:
+            for _ in range(repeat):
+                started = time.perf_counter()
+                call(session, rng)
+                samples.append((time.perf_counter() - started) * 1000.0)
+                session.expunge_all()
+        finally:
+            session.close()
+        samples.sort()
+        results[name] = {
+            "sql": " ".join(statement.split()),
+            "plan": _query_plan(engine, statement, parameters),
+            "latency_ms": {
+                "p50": round(statistics.median(samples), 3),
+                "p95": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+                "mean": round(statistics.fmean(samples), 3),
+            },
+        }
+    return results
+
+
+# ──────────────────────────────────────────────────────────────
+# entry point
+# ──────────────────────────────────────────────────────────────
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    args = parse_args(argv)
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from db.migrations import apply_migrations
+
+    workdir = tempfile.mkdtemp(prefix="voicechat-plans-")
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'plans.db')}")
+    session_factory = sessionmaker(bind=engine)
+
+    started = time.perf_counter()
+    fixture = seed_database(engine, args)
+    seed_s = time.perf_counter() - started
+
+    before = run_phase(engine, session_factory, fixture, args.repeat, args.seed)
+    started = time.perf_counter()
+    applied = apply_migrations(engine)
+    migrate_s = time.perf_counter() - started
+    after = run_phase(engine, session_factory, fixture, args.repeat, args.seed)
+
+    report = {
+        "benchmark": "query_plan_benchmark",
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "sqlite": __import__("sqlite3").sqlite_version,
+        "config": {k: v for k, v in vars(args).items() if k != "out"},
+        "rows": {"messages": len(fixture["chats"]) * args.messages_per_chat,
+                 "affirmations": len(fixture["users"]) * args.affirmations_per_user},
+        "seed_s": round(seed_s, 2),
+        "migrations": {"applied": applied, "seconds": round(migrate_s, 3)},
+        "cases": {
+            name: {
+                "sql": before[name]["sql"],
+                "before": {"plan": before[name]["plan"], "latency_ms": before[name]["latency_ms"]},
+                "after": {"plan": after[name]["plan"], "latency_ms": after[name]["latency_ms"]},
+                "speedup_p50": round(before[name]["latency_ms"]["p50"] / max(after[name]["latency_ms"]["p50"], 1e-9), 1),
+            }
+            for name in before
+        },
+    }
+    engine.dispose()
+
+    payload = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(payload + "\n")
+    else:
+        print(payload)
+    return report
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
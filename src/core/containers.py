@@ -12,8 +12,24 @@ from db.repositories.user_repository import UserRepository
 from db.repositories.chat_repository import ChatRepository
 from db.repositories.message_repository import MessageRepository
 from db.repositories.affirmation_repository import AffirmationRepository
+from db.repositories.chat_summary_repository import ChatSummaryRepository
+from db.repositories.usage_repository import UsageRepository
+from db.repositories.async_user_repository import AsyncUserRepository
+from db.repositories.async_chat_repository import AsyncChatRepository
+from db.repositories.async_message_repository import AsyncMessageRepository
+from db.repositories.async_affirmation_repository import AsyncAffirmationRepository
+from impl.myllmservice import MyLLMService
+from impl.history_cache import ChatHistoryCache
+from impl.model_catalog import ModelCatalog
+from impl.model_router import ModelRouter
+from impl.fake_llm import FakeLLMBackend
+from impl.speech_to_text import FakeSpeechToText
+from impl.conversation_summarizer import ConversationSummarizer
+from impl.idempotency_store import IdempotencyStore
+from impl.chat_turn_queue import ChatTurnQueue
 # from db.repositories.file_repository import FileRepository
-from db.session import get_engine
+from db.session import get_async_engine, get_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
 import yaml
 
 
@@ -22,11 +38,11 @@ import yaml
 class Services(containers.DeclarativeContainer):
     config = providers.Configuration()
 
-    # Engine provider
+    # Engine provider: SQLite pragmas (WAL, busy_timeout, …) + timed, sized pool
     engine = providers.Singleton(
-        create_engine,
+        get_engine,
         config.db_url,
-        echo=False
+        profile=config.db,
     )
 
     # Session factory provider
@@ -36,6 +52,22 @@ class Services(containers.DeclarativeContainer):
     )
 
 
+    # Async engine on the same database (aiosqlite / asyncpg), same profile
+    async_engine = providers.Singleton(
+        get_async_engine,
+        config.db_url,
+        profile=config.db,
+    )
+
+    # AsyncSession factory; rows stay readable after commit (no implicit
+    # refresh, which an AsyncSession could not do lazily)
+    async_session_factory = providers.Singleton(
+        async_sessionmaker,
+        bind=async_engine,
+        expire_on_commit=False,
+    )
+
+
     # UserRepository provider
     user_repository = providers.Factory(
         UserRepository,
@@ -53,8 +85,133 @@ class Services(containers.DeclarativeContainer):
         session=providers.Dependency()
     )
 
+    chat_summary_repository = providers.Factory(
+        ChatSummaryRepository,
+        session=providers.Dependency()
+    )
+
+    usage_repository = providers.Factory(
+        UsageRepository,
+        session=providers.Dependency()
+    )
+
     affirmation_repository = providers.Factory(
         AffirmationRepository,
         session=providers.Dependency()
     )
 
+    # Async repositories (take an AsyncSession from async_session_factory)
+    async_user_repository = providers.Factory(
+        AsyncUserRepository,
+        session=providers.Dependency()
+    )
+
+    async_chat_repository = providers.Factory(
+        AsyncChatRepository,
+        session=providers.Dependency()
+    )
+
+    async_message_repository = providers.Factory(
+        AsyncMessageRepository,
+        session=providers.Dependency()
+    )
+
+    async_affirmation_repository = providers.Factory(
+        AsyncAffirmationRepository,
+        session=providers.Dependency()
+    )
+
+
+    # Model names with their context / history-token / latency budgets
+    model_catalog = providers.Singleton(
+        ModelCatalog.from_yaml,
+        config.model_info_path,
+    )
+
+    # Deadline / hedging / fallback policy for answer generation
+    model_router = providers.Singleton(
+        ModelRouter.from_catalog,
+        model_catalog,
+    )
+
+    # LLM backend: None → the provider via llmservice; "fake" → local stand-in
+    llm_backend = providers.Selector(
+        config.llm.backend,
+        openai=providers.Object(None),
+        fake=providers.Singleton(
+            FakeLLMBackend,
+            seed=config.llm.fake.seed,
+            ttft_ms=config.llm.fake.ttft_ms,
+            tokens_per_second=config.llm.fake.tokens_per_second,
+            reply_tokens=config.llm.fake.reply_tokens,
+            error_rate=config.llm.fake.error_rate,
+            tail_rate=config.llm.fake.tail_rate,
+            tail_multiplier=config.llm.fake.tail_multiplier,
+        ),
+    )
+
+
+    # Speech-to-text for voice messages: None → not configured (503); "fake" → local stand-in
+    speech_to_text = providers.Selector(
+        config.stt.backend,
+        none=providers.Object(None),
+        fake=providers.Singleton(
+            FakeSpeechToText,
+            segment_bytes=config.stt.fake.segment_bytes,
+            ms_per_segment=config.stt.fake.ms_per_segment,
+        ),
+    )
+
+
+    # One LLM service per process: shared rate limiter, HTTP pool and metrics
+    llm_service = providers.Singleton(
+        MyLLMService,
+        max_rpm=config.llm.max_rpm,
+        max_concurrent_requests=config.llm.max_concurrent_requests,
+        rate_limit_burst=config.llm.rate_limit_burst,
+        max_connections=config.llm.max_connections,
+        max_keepalive_connections=config.llm.max_keepalive_connections,
+        keepalive_expiry=config.llm.keepalive_expiry,
+        router=model_router,
+        backend=llm_backend,
+        db_pools=providers.Dict({
+            "sync": engine.provided.pool,
+            "async": async_engine.provided.sync_engine.pool,
+        }),
+    )
+
+    # Hot conversations (recent window + rendered history), LRU-evicted
+    history_cache = providers.Singleton(
+        ChatHistoryCache,
+        max_chats=config.history_cache.max_chats,
+        max_bytes=config.history_cache.max_bytes,
+        window=config.history_cache.window,
+    )
+
+    # Rolling per-chat summaries, updated off the request path every N messages
+    conversation_summarizer = providers.Singleton(
+        ConversationSummarizer,
+        session_factory=session_factory,
+        llm_service=llm_service,
+        history_cache=history_cache,
+        every_n_messages=config.summaries.every_n_messages,
+        max_batch_messages=config.summaries.max_batch_messages,
+        keep_recent_messages=config.history_cache.window,     # summarize only what the window no longer holds
+        max_summary_words=config.summaries.max_summary_words,
+        model=config.summaries.model,
+        enabled=config.summaries.enabled,
+    )
+
+    # Idempotency-Key results for message posts (single-flight + short replay window)
+    idempotency_store = providers.Singleton(
+        IdempotencyStore,
+        ttl_seconds=config.idempotency.ttl_seconds,
+        max_entries=config.idempotency.max_entries,
+    )
+
+    # Per-chat FIFO of message turns (ordered within a chat, parallel across chats)
+    chat_turn_queue = providers.Singleton(
+        ChatTurnQueue,
+        coalesce=config.chat_turns.coalesce,
+        max_coalesce=config.chat_turns.max_coalesce,
+    )
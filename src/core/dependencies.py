@@ -13,6 +13,7 @@ def setup_dependencies():
 
     # Paths for the databases
     main_db_path = os.path.join(base_dir, "..", "db", "data", "voicechat.db")
+    model_info_path = os.path.abspath(os.path.join(base_dir, "..", "assets", "model_info.yaml"))
    
 
     # Resolve absolute paths
@@ -24,7 +25,73 @@ def setup_dependencies():
     services = Services()
     services.config.from_dict({
         'db_url': main_db_url,
-      
+        'db': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'cache_budget_kib': int(os.getenv('DB_CACHE_BUDGET_KIB', 128 * 1024)),  # per engine, split over its pool
+            'cache_size_kib': None,     # None → budget / (pool_size + max_overflow)
+            'mmap_size': 256 * 1024 * 1024,
+            'busy_timeout_ms': int(os.getenv('DB_BUSY_TIMEOUT_MS', 5000)),
+            'worker_threads': int(os.getenv('WORKER_THREADS', 40)),     # threadpool size (blocking DB work)
+            'pool_size': None,          # None → worker_threads: one connection per thread
+            'max_overflow': 10,         # event-loop-side and background sessions
+            'pool_timeout': 30.0,
+        },
+        'model_info_path': model_info_path,
+        'llm': {
+            'max_rpm': int(os.getenv('LLM_MAX_RPM', 500)),
+            'max_concurrent_requests': int(os.getenv('LLM_MAX_CONCURRENT_REQUESTS', 200)),
+            'rate_limit_burst': None,   # None → one second worth of tokens
+            'max_connections': 100,
+            'max_keepalive_connections': 20,
+            'keepalive_expiry': 30.0,
+            'backend': os.getenv('LLM_BACKEND', 'openai'),     # 'openai' | 'fake'
+            'fake': {                                           # only used with backend 'fake'
+                'seed': int(os.getenv('FAKE_LLM_SEED', 0)),
+                'ttft_ms': {'distribution': 'lognormal', 'median': 400, 'sigma': 0.4},
+                'tokens_per_second': 80.0,
+                'reply_tokens': (40, 120),
+                'error_rate': float(os.getenv('FAKE_LLM_ERROR_RATE', 0.0)),
+                'tail_rate': 0.0,
+                'tail_multiplier': 5.0,
+            },
+        },
+        'stt': {
+            'backend': os.getenv('STT_BACKEND', 'none'),       # 'none' | 'fake'
+            'fake': {                                           # only used with backend 'fake'
+                'segment_bytes': 16000,     # one word per 0.5 s of 16 kHz / 16-bit mono
+                'ms_per_segment': 20.0,
+            },
+        },
+        'audio': {
+            'max_bytes': 25 * 1024 * 1024,  # per voice message upload
+            'spool_dir': None,              # None → system temp dir
+            'queue_chunks': 64,             # upload chunks buffered ahead of the recogniser
+        },
+        'history_cache': {
+            'max_chats': 1000,
+            'max_bytes': 64 * 1024 * 1024,
+            'window': 50,           # messages kept per chat; the token budget picks from these
+        },
+        'summaries': {
+            'enabled': True,
+            'every_n_messages': 10,     # user + assistant messages between updates
+            'max_batch_messages': 200,
+            'max_summary_words': 250,
+            'model': None,              # None → LLM service default
+        },
+        'idempotency': {
+            'ttl_seconds': 600,         # how long a finished response is replayed
+            'max_entries': 10000,
+        },
+        'chat_turns': {
+            'coalesce': os.getenv('COALESCE_CHAT_TURNS', '0') == '1',   # answer queued messages with one LLM call
+            'max_coalesce': 8,
+        },
+        'bulk_import': {
+            'batch_size': 5000,         # NDJSON lines per INSERT batch / commit
+            'max_line_bytes': 1024 * 1024,
+        },
     })
 
     return services
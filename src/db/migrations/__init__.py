@@ -0,0 +1,96 @@
+# db/migrations/__init__.py
+"""Versioned schema migrations for the voicechat SQLite database.
+
+`Base.metadata.create_all` only creates *missing tables*; it never adds an
+index (or anything else) to a table that already exists.  Changes to
+existing tables therefore ship as numbered migrations under
+``db/migrations/versions``:
+
+* one module per version, named ``vNNNN_<description>.py``, defining
+  ``VERSION`` (int), ``DESCRIPTION`` (str) and ``upgrade(conn)``
+* applied versions are recorded in the ``schema_version`` table
+* `apply_migrations` runs the pending ones in order, each in its own
+  transaction, and is called on every app start (after ``create_all``)
+
+``upgrade`` must be idempotent (``CREATE INDEX IF NOT EXISTS`` …): a fresh
+database already gets the objects from the model definitions, and two
+processes starting at once may both run a step before either records it.
+
+CLI:  ``python -m db.scripts.migrate_voicechat_db [--status] [--to N]``
+"""
+from __future__ import annotations
+
+import importlib
+import logging
+import pkgutil
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from db.migrations import versions
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+def load_migrations() -> List[Migration]:
+    """All migrations in ``db/migrations/versions``, ordered by version."""
+    found: List[Migration] = []
+    for _, name, _ in pkgutil.iter_modules(versions.__path__, versions.__name__ + "."):
+        module = importlib.import_module(name)
+        found.append(Migration(module.VERSION, module.DESCRIPTION, module.upgrade))
+    found.sort(key=lambda m: m.version)
+    seen = [m.version for m in found]
+    if len(seen) != len(set(seen)):
+        raise RuntimeError(f"duplicate migration versions: {seen}")
+    return found
+
+
+def _ensure_version_table(conn: Connection) -> None:
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        " version INTEGER PRIMARY KEY,"
+        " description TEXT NOT NULL,"
+        " applied_at DATETIME NOT NULL)"
+    ))
+
+
+def current_version(engine: Engine) -> int:
+    """Highest applied version (0 for a database that has never been migrated)."""
+    with engine.begin() as conn:
+        _ensure_version_table(conn)
+        return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar_one()
+
+
+def pending_migrations(engine: Engine, target: Optional[int] = None) -> List[Migration]:
+    applied = current_version(engine)
+    return [
+        m for m in load_migrations()
+        if m.version > applied and (target is None or m.version <= target)
+    ]
+
+
+def apply_migrations(engine: Engine, target: Optional[int] = None) -> List[int]:
+    """Apply pending migrations up to *target* (default: all); return the versions applied."""
+    done: List[int] = []
+    for migration in pending_migrations(engine, target):
+        with engine.begin() as conn:
+            migration.upgrade(conn)
+            conn.execute(
+                text("INSERT OR IGNORE INTO schema_version (version, description, applied_at) "
+                     "VALUES (:version, :description, :applied_at)"),
+                {"version": migration.version, "description": migration.description,
+                 "applied_at": datetime.utcnow()},
+            )
+        logger.info("Applied migration %04d: %s", migration.version, migration.description)
+        done.append(migration.version)
+    return done
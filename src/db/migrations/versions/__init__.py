@@ -0,0 +1 @@
+# db/migrations/versions/__init__.py
@@ -0,0 +1,17 @@
+# db/migrations/versions/v0001_messages_chat_timestamp_index.py
+"""Index messages by (chat_id, timestamp).
+
+`MessageRepository.fetch_messages` / `fetch_last_n` filter on ``chat_id``
+and order by ``timestamp``; without this index each call scans the whole
+table and sorts the chat's rows.
+"""
+from sqlalchemy import text
+
+VERSION = 1
+DESCRIPTION = "index messages (chat_id, timestamp)"
+
+
+def upgrade(conn) -> None:
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_messages_chat_id_timestamp ON messages (chat_id, timestamp)"
+    ))
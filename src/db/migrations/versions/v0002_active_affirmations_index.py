@@ -0,0 +1,18 @@
+# db/migrations/versions/v0002_active_affirmations_index.py
+"""Partial index on active affirmations by (user_id, created_at).
+
+`AffirmationRepository.get_user_affirmations` reads
+``user_id = ? AND is_active = 1 ORDER BY created_at DESC``; inactive rows
+are never listed, so they are left out of the index.
+"""
+from sqlalchemy import text
+
+VERSION = 2
+DESCRIPTION = "partial index affirmations (user_id, created_at) where is_active = 1"
+
+
+def upgrade(conn) -> None:
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_affirmations_active_user_created "
+        "ON affirmations (user_id, created_at) WHERE is_active = 1"
+    ))
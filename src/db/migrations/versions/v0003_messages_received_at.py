@@ -0,0 +1,18 @@
+# db/migrations/versions/v0003_messages_received_at.py
+"""Add ``messages.received_at``.
+
+A user message's ``timestamp`` is set when its turn is written, so rows of a
+chat stay in commit order even when a turn waited in the chat's queue; the
+time the server received the message is kept in this column.
+"""
+from sqlalchemy import text
+
+VERSION = 3
+DESCRIPTION = "add messages.received_at"
+
+
+def upgrade(conn) -> None:
+    # SQLite has no ADD COLUMN IF NOT EXISTS; a fresh DB already has it
+    columns = {row[1] for row in conn.execute(text("PRAGMA table_info(messages)"))}
+    if "received_at" not in columns:
+        conn.execute(text("ALTER TABLE messages ADD COLUMN received_at DATETIME"))
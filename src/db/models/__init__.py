@@ -8,11 +8,13 @@ from .login_time_log import LoginTimeLog
 
 from .chat import Chat
 from .message import Message
+from .chat_summary import ChatSummary
+from .chat_usage import MessageUsage, ChatUsageDaily, ChatLatencyBucket
 from .affirmation import Affirmation
 
 
 __all__ = [
     'Base', 'get_current_time', 'User', 'UserDetails', 'LoginTimeLog',
-    'Chat', 'Message', 'Affirmation'
+    'Chat', 'Message', 'ChatSummary', 'MessageUsage', 'ChatUsageDaily', 'ChatLatencyBucket', 'Affirmation'
 
 ]
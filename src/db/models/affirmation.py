@@ -1,6 +1,6 @@
 # db/models/affirmation.py
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -8,7 +8,11 @@ from .base import Base
 
 class Affirmation(Base):
     __tablename__ = 'affirmations'
-    
+    # active list: WHERE user_id = ? AND is_active = 1 ORDER BY created_at (migration 0002 for existing DBs)
+    __table_args__ = (
+        Index('ix_affirmations_active_user_created', 'user_id', 'created_at', sqlite_where=text('is_active = 1')),
+    )
+
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey('users.user_id', ondelete='CASCADE'), nullable=True)
     content = Column(Text, nullable=False)
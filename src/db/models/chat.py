@@ -19,6 +19,12 @@ class Chat(Base):
 
     # Relationship to messages
     messages = relationship('Message', back_populates='chat', cascade='all, delete-orphan')
+    # Rolling summary of older turns, kept up to date in the background
+    summary = relationship('ChatSummary', back_populates='chat', uselist=False, cascade='all, delete-orphan')
+    # LLM cost / latency per reply and the per-day rollups the usage endpoint reads
+    usage_records = relationship('MessageUsage', back_populates='chat', cascade='all, delete-orphan')
+    usage_days = relationship('ChatUsageDaily', back_populates='chat', cascade='all, delete-orphan')
+    latency_buckets = relationship('ChatLatencyBucket', back_populates='chat', cascade='all, delete-orphan')
 
     def __repr__(self):
         return f"<Chat id={self.id} user_id={self.user_id} created_at={self.created_at}>"
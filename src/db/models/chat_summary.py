@@ -0,0 +1,23 @@
+# db/models/chat_summary.py
+
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Text
+from sqlalchemy.orm import relationship
+from datetime import datetime
+
+from .base import Base
+
+
+class ChatSummary(Base):
+    """Rolling summary of a chat's older turns (one row per chat)."""
+    __tablename__ = 'chat_summaries'
+
+    chat_id = Column(Integer, ForeignKey('chats.id', ondelete='CASCADE'), primary_key=True)
+    summary = Column(Text, nullable=False, default='')
+    through_message_id = Column(Integer, nullable=False, default=0)   # last message folded in
+    message_count = Column(Integer, nullable=False, default=0)        # messages folded in so far
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    chat = relationship('Chat', back_populates='summary')
+
+    def __repr__(self):
+        return f"<ChatSummary chat_id={self.chat_id} through={self.through_message_id}>"
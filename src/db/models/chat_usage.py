@@ -0,0 +1,64 @@
+# db/models/chat_usage.py
+
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+
+from .base import Base
+
+
+class MessageUsage(Base):
+    """Cost / latency of the LLM call that produced one assistant message."""
+    __tablename__ = 'message_usage'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    chat_id = Column(Integer, ForeignKey('chats.id', ondelete='CASCADE'), nullable=False)
+    message_id = Column(Integer, nullable=False, index=True)         # the assistant reply
+    model = Column(String, nullable=True)
+    input_tokens = Column(Integer, nullable=False, default=0)
+    output_tokens = Column(Integer, nullable=False, default=0)
+    cached_tokens = Column(Integer, nullable=False, default=0)
+    cost = Column(Float, nullable=False, default=0.0)
+    latency_ms = Column(Float, nullable=False, default=0.0)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    chat = relationship('Chat', back_populates='usage_records')
+
+    __table_args__ = (Index('ix_message_usage_chat_created', 'chat_id', 'created_at'),)
+
+    def __repr__(self):
+        return f"<MessageUsage chat_id={self.chat_id} message_id={self.message_id} cost={self.cost}>"
+
+
+class ChatUsageDaily(Base):
+    """Per-chat, per-UTC-day running totals, updated with every recorded call."""
+    __tablename__ = 'chat_usage_daily'
+
+    chat_id = Column(Integer, ForeignKey('chats.id', ondelete='CASCADE'), primary_key=True)
+    day = Column(Date, primary_key=True)
+    calls = Column(Integer, nullable=False, default=0)
+    cost = Column(Float, nullable=False, default=0.0)
+    total_latency_ms = Column(Float, nullable=False, default=0.0)
+    min_latency_ms = Column(Float, nullable=True)
+    max_latency_ms = Column(Float, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    chat = relationship('Chat', back_populates='usage_days')
+
+    def __repr__(self):
+        return f"<ChatUsageDaily chat_id={self.chat_id} day={self.day} calls={self.calls}>"
+
+
+class ChatLatencyBucket(Base):
+    """One bucket of the per-chat, per-day latency sketch (see impl/latency_sketch.py)."""
+    __tablename__ = 'chat_latency_buckets'
+
+    chat_id = Column(Integer, ForeignKey('chats.id', ondelete='CASCADE'), primary_key=True)
+    day = Column(Date, primary_key=True)
+    bucket = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    chat = relationship('Chat', back_populates='latency_buckets')
+
+    def __repr__(self):
+        return f"<ChatLatencyBucket chat_id={self.chat_id} day={self.day} bucket={self.bucket} n={self.count}>"
@@ -1,6 +1,6 @@
 # db/models/message.py
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, create_engine
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Index, create_engine
 from sqlalchemy.orm import declarative_base, relationship, sessionmaker
 from datetime import datetime
 
@@ -8,7 +8,11 @@ from .base import Base  # or wherever your Base is defined
 
 class Message(Base):
     __tablename__ = 'messages'
-    
+    # history reads: WHERE chat_id = ? ORDER BY timestamp (migration 0001 for existing DBs)
+    __table_args__ = (
+        Index('ix_messages_chat_id_timestamp', 'chat_id', 'timestamp'),
+    )
+
     id = Column(Integer, primary_key=True, autoincrement=True)
     chat_id = Column(Integer, ForeignKey('chats.id', ondelete='CASCADE'), nullable=False)
     user_id = Column(Integer, nullable=False)
@@ -17,7 +21,11 @@ class Message(Base):
     message = Column(Text, nullable=False)
     message_format = Column(String, default='text', nullable=True)
     transcription = Column(String, default='text', nullable=True)
+    # position in the chat: set when the row is written, so it follows commit order
     timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # when the server received a user message (may precede `timestamp` while the
+    # turn waits in the chat's queue); NULL for replies and imported rows (migration 0003)
+    received_at = Column(DateTime, nullable=True)
 
     
     step_context = Column(String, default='text', nullable=True)
@@ -17,8 +17,24 @@ class AffirmationRepository:
     Repository class for handling Affirmation database operations.
     """
     
-    def __init__(self, session: Session):
+    def __init__(self, session: Session, autocommit: bool = True):
+        """
+        Args:
+            session: SQLAlchemy session the repository works on
+            autocommit: False = unit-of-work mode; writes are only flushed
+                and the caller commits once
+        """
         self.session = session
+        self.autocommit = autocommit
+
+    def _save(self, affirmation: Optional[Affirmation] = None) -> None:
+        """Commit (and refresh) or, in unit-of-work mode, just flush."""
+        if self.autocommit:
+            self.session.commit()
+            if affirmation is not None:
+                self.session.refresh(affirmation)
+        else:
+            self.session.flush()
     
     def create_affirmation(self, user_id: int, content: str, category: Optional[str] = None,
                           voice_enabled: bool = False, voice_id: Optional[str] = None) -> Affirmation:
@@ -47,8 +63,7 @@ class AffirmationRepository:
             )
             
             self.session.add(affirmation)
-            self.session.commit()
-            self.session.refresh(affirmation)
+            self._save(affirmation)
             
             logger.debug(f"Created affirmation with ID: {affirmation.id}")
             return affirmation
@@ -129,8 +144,7 @@ class AffirmationRepository:
             # Update the updated_at timestamp
             affirmation.updated_at = datetime.utcnow()
             
-            self.session.commit()
-            self.session.refresh(affirmation)
+            self._save(affirmation)
             
             logger.debug(f"Updated affirmation ID: {affirmation_id}")
             return affirmation
@@ -158,7 +172,7 @@ class AffirmationRepository:
             affirmation.is_active = False
             affirmation.updated_at = datetime.utcnow()
             
-            self.session.commit()
+            self._save()
             logger.debug(f"Soft deleted affirmation ID: {affirmation_id}")
             return True
             
@@ -195,8 +209,7 @@ class AffirmationRepository:
             
             affirmation.updated_at = now
             
-            self.session.commit()
-            self.session.refresh(affirmation)
+            self._save(affirmation)
             
             logger.debug(f"Updated stats for affirmation ID: {affirmation_id}")
             return affirmation
@@ -0,0 +1,158 @@
+# db/repositories/async_affirmation_repository.py
+
+import logging
+from typing import List, Optional
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from fastapi import HTTPException
+
+from db.models.affirmation import Affirmation
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAffirmationRepository:
+    """
+    `AffirmationRepository` on an `AsyncSession`: same methods, awaited.
+    """
+
+    UPDATEABLE_FIELDS = ('content', 'category', 'voice_enabled', 'voice_id',
+                         'schedule_config_id', 'is_active')
+
+    def __init__(self, session: AsyncSession, autocommit: bool = True):
+        """
+        Args:
+            session: async SQLAlchemy session the repository works on
+            autocommit: False = unit-of-work mode; writes are only flushed
+                and the caller commits once
+        """
+        self.session = session
+        self.autocommit = autocommit
+
+    async def _save(self, affirmation: Optional[Affirmation] = None) -> None:
+        """Commit (and refresh) or, in unit-of-work mode, just flush."""
+        if self.autocommit:
+            await self.session.commit()
+            if affirmation is not None:
+                await self.session.refresh(affirmation)
+        else:
+            await self.session.flush()
+
+    async def create_affirmation(self, user_id: int, content: str, category: Optional[str] = None,
+                                 voice_enabled: bool = False, voice_id: Optional[str] = None) -> Affirmation:
+        """Create a new, active affirmation for a user."""
+        try:
+            affirmation = Affirmation(
+                user_id=user_id,
+                content=content,
+                category=category,
+                voice_enabled=voice_enabled,
+                voice_id=voice_id,
+                is_active=True,
+                how_many_times_seen=0
+            )
+            self.session.add(affirmation)
+            await self._save(affirmation)
+
+            logger.debug(f"Created affirmation with ID: {affirmation.id}")
+            return affirmation
+
+        except SQLAlchemyError as e:
+            await self.session.rollback()
+            logger.error(f"Error creating affirmation: {str(e)}")
+            raise HTTPException(status_code=500, detail="Failed to create affirmation")
+
+    async def get_affirmation_by_id(self, affirmation_id: int) -> Optional[Affirmation]:
+        """The affirmation, or None if not found."""
+        try:
+            return await self.session.scalar(select(Affirmation).where(Affirmation.id == affirmation_id))
+        except SQLAlchemyError as e:
+            logger.error(f"Error fetching affirmation: {str(e)}")
+            raise HTTPException(status_code=500, detail="Failed to fetch affirmation")
+
+    async def get_user_affirmations(self, user_id: int, category: Optional[str] = None,
+                                    scheduled_only: bool = False) -> List[Affirmation]:
+        """A user's active affirmations, newest first, optionally filtered."""
+        try:
+            stmt = select(Affirmation).where(Affirmation.user_id == user_id, Affirmation.is_active == True)  # noqa: E712
+
+            if category:
+                stmt = stmt.where(Affirmation.category == category)
+
+            if scheduled_only:
+                stmt = stmt.where(Affirmation.schedule_config_id.isnot(None))
+
+            return list(await self.session.scalars(stmt.order_by(Affirmation.created_at.desc())))
+
+        except SQLAlchemyError as e:
+            logger.error(f"Error fetching user affirmations: {str(e)}")
+            raise HTTPException(status_code=500, detail="Failed to fetch affirmations")
+
+    async def update_affirmation(self, affirmation_id: int, **kwargs) -> Optional[Affirmation]:
+        """Update the allowed fields given in *kwargs*; None if not found."""
+        try:
+            affirmation = await self.get_affirmation_by_id(affirmation_id)
+            if not affirmation:
+                return None
+
+            for field, value in kwargs.items():
+                if field in self.UPDATEABLE_FIELDS and value is not None:
+                    setattr(affirmation, field, value)
+
+            affirmation.updated_at = datetime.utcnow()
+            await self._save(affirmation)
+
+            logger.debug(f"Updated affirmation ID: {affirmation_id}")
+            return affirmation
+
+        except SQLAlchemyError as e:
+            await self.session.rollback()
+            logger.error(f"Error updating affirmation: {str(e)}")
+            raise HTTPException(status_code=500, detail="Failed to update affirmation")
+
+    async def delete_affirmation(self, affirmation_id: int) -> bool:
+        """Soft delete (is_active = False); False if not found."""
+        try:
+            affirmation = await self.get_affirmation_by_id(affirmation_id)
+            if not affirmation:
+                return False
+
+            affirmation.is_active = False
+            affirmation.updated_at = datetime.utcnow()
+
+            await self._save()
+            logger.debug(f"Soft deleted affirmation ID: {affirmation_id}")
+            return True
+
+        except SQLAlchemyError as e:
+            await self.session.rollback()
+            logger.error(f"Error deleting affirmation: {str(e)}")
+            raise HTTPException(status_code=500, detail="Failed to delete affirmation")
+
+    async def update_affirmation_stats(self, affirmation_id: int, seen: bool = False,
+                                       played: bool = False) -> Optional[Affirmation]:
+        """Bump times seen / last seen / last played; None if not found."""
+        try:
+            affirmation = await self.get_affirmation_by_id(affirmation_id)
+            if not affirmation:
+                return None
+
+            now = datetime.utcnow()
+            if seen:
+                affirmation.how_many_times_seen = (affirmation.how_many_times_seen or 0) + 1
+                affirmation.last_time_seen = now
+            if played:
+                affirmation.last_time_played = now
+            affirmation.updated_at = now
+
+            await self._save(affirmation)
+
+            logger.debug(f"Updated stats for affirmation ID: {affirmation_id}")
+            return affirmation
+
+        except SQLAlchemyError as e:
+            await self.session.rollback()
+            logger.error(f"Error updating affirmation stats: {str(e)}")
+            raise HTTPException(status_code=500, detail="Failed to update affirmation stats")
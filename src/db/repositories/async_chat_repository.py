@@ -0,0 +1,111 @@
+# db/repositories/async_chat_repository.py
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models.chat import Chat
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncChatRepository:
+    """`ChatRepository` on an `AsyncSession`: same methods, awaited."""
+
+    def __init__(self, session: AsyncSession, autocommit: bool = True):
+        self.session = session            # sqlalchemy.ext.asyncio.AsyncSession
+        self.autocommit = autocommit      # False → flush only, caller commits
+
+    async def _save(self, row=None) -> None:
+        """Commit (and refresh *row*) or, in unit-of-work mode, just flush."""
+        if self.autocommit:
+            await self.session.commit()
+            if row is not None:
+                await self.session.refresh(row)
+        else:
+            await self.session.flush()
+
+    # ──────────────────────────────────────────────────────────────
+    # public API
+    # ──────────────────────────────────────────────────────────────
+    async def create_chat(self, *, user_id: int, settings: dict | None = None) -> Chat:
+        """Insert a new chat row and return it (with its generated `id`)."""
+        try:
+            chat_row = Chat(
+                user_id   = user_id,
+                settings  = settings or {},
+                created_at= datetime.utcnow(),
+            )
+            self.session.add(chat_row)
+            await self._save(chat_row)
+            logger.debug("Chat created (id=%s user_id=%s)", chat_row.id, user_id)
+            return chat_row
+
+        except SQLAlchemyError as e:
+            await self.session.rollback()
+            logger.error("DB error creating chat: %s", e, exc_info=True)
+            raise HTTPException(status_code=500, detail="Database error while creating chat")
+
+    async def get_chat_by_id(self, chat_id: int) -> Optional[Chat]:
+        """The chat, or ``None`` if not found (caller decides whether to raise 404)."""
+        try:
+            return await self.session.scalar(select(Chat).where(Chat.id == chat_id))
+        except SQLAlchemyError as exc:
+            await self.session.rollback()
+            logger.error("DB error while fetching chat_id %s: %s", chat_id, exc, exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error while fetching chat",
+            )
+
+    async def get_chats_by_user(self, user_id: int) -> list[Chat]:
+        """All chats of *user_id*, newest first."""
+        try:
+            result = await self.session.scalars(
+                select(Chat)
+                .where(Chat.user_id == user_id)
+                .order_by(Chat.created_at.desc())
+            )
+            return list(result)
+        except SQLAlchemyError as exc:
+            await self.session.rollback()
+            logger.error("DB error while fetching chats for user_id %s: %s", user_id, exc, exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error while fetching user chats",
+            )
+
+    async def delete_chat(self, chat_id: int, user_id: int) -> bool:
+        """
+        Delete a chat the user owns; ``False`` if it is missing or not theirs.
+
+        The ORM cascade to messages, summary and usage rows loads those
+        collections, which an `AsyncSession` cannot do lazily – they are
+        loaded here, before the delete.
+        """
+        try:
+            chat = await self.session.scalar(
+                select(Chat).where(Chat.id == chat_id, Chat.user_id == user_id)
+            )
+            if not chat:
+                return False
+
+            await self.session.refresh(
+                chat, ["messages", "summary", "usage_records", "usage_days", "latency_buckets"]
+            )
+            await self.session.delete(chat)
+            await self._save()
+            logger.debug("Chat deleted (id=%s user_id=%s)", chat_id, user_id)
+            return True
+
+        except SQLAlchemyError as exc:
+            await self.session.rollback()
+            logger.error("DB error while deleting chat_id %s: %s", chat_id, exc, exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error while deleting chat",
+            )
@@ -0,0 +1,224 @@
+# db/repositories/async_message_repository.py
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models.message import Message
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncMessageRepository:
+    """
+    `MessageRepository` on an `AsyncSession`: same methods and SQL, awaited.
+
+    Statements are plain Core ``select`` / ``insert … RETURNING`` and
+    row-value comparisons, which run unchanged on aiosqlite and asyncpg.
+    """
+
+    def __init__(self, session: AsyncSession, autocommit: bool = True):
+        """
+        Parameters
+        ----------
+        session : AsyncSession
+            Async SQLAlchemy session the repository works on.
+        autocommit : bool, default True
+            ``False`` = unit-of-work mode: writes are only flushed (so primary
+            keys are assigned) and the caller commits once per request.
+        """
+        self.session = session
+        self.autocommit = autocommit
+
+    async def _save(self, row=None) -> None:
+        """Commit (and refresh *row*) or, in unit-of-work mode, just flush."""
+        if self.autocommit:
+            await self.session.commit()
+            if row is not None:
+                await self.session.refresh(row)
+        else:
+            await self.session.flush()
+
+    async def _all(self, stmt) -> List[Message]:
+        return list(await self.session.scalars(stmt))
+
+    # ──────────────────────────────────────────────────────────────
+    # public api
+    # ──────────────────────────────────────────────────────────────
+    async def fetch_messages(
+        self,
+        *,
+        chat_id: int,
+        limit: int = 50,
+        offset: int = 0,
+        since: Optional[datetime] = None,
+    ) -> List[Message]:
+        """Messages of a chat (oldest → newest), see `MessageRepository.fetch_messages`."""
+        try:
+            stmt = select(Message).where(Message.chat_id == chat_id)
+            if since is not None:
+                stmt = stmt.where(Message.timestamp > since)
+            messages = await self._all(
+                stmt.order_by(Message.timestamp.asc(), Message.id.asc()).offset(offset).limit(limit)
+            )
+            logger.debug(
+                "Fetched %s messages (chat_id=%s, limit=%s, offset=%s, since=%s)",
+                len(messages), chat_id, limit, offset, since
+            )
+            return messages
+
+        except SQLAlchemyError as exc:
+            await self.session.rollback()
+            logger.error("DB error while fetching messages: %s", exc, exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error while fetching messages",
+            )
+
+    async def insert_message(
+        self,
+        *,
+        chat_id: int,
+        user_id: int,
+        user_type: str,
+        user_name: str,
+        message: str,
+        message_format: str = "text",
+        timestamp: datetime | None = None,
+        transcription: str | None = None,
+        received_at: datetime | None = None,
+    ) -> Message:
+        """Persist a single message row and return the ORM object."""
+        try:
+            msg_row = Message(
+                chat_id=chat_id,
+                user_id=user_id,
+                user_type=user_type,
+                user_name=user_name,
+                message=message,
+                message_format=message_format,
+                timestamp=timestamp or datetime.utcnow(),
+            )
+            if transcription is not None:
+                msg_row.transcription = transcription
+            if received_at is not None:
+                msg_row.received_at = received_at
+            self.session.add(msg_row)
+            await self._save(msg_row)  # populates the autoincremented id
+            logger.debug("Inserted message id=%s (chat_id=%s)", msg_row.id, chat_id)
+            return msg_row
+        except SQLAlchemyError as exc:
+            await self.session.rollback()
+            logger.error("DB error while inserting message: %s", exc, exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error while inserting message",
+            )
+
+    async def bulk_insert_messages(self, rows: List[Dict[str, Any]]) -> List[int]:
+        """Batched ``INSERT … RETURNING id`` of column dicts; ids in input order."""
+        if not rows:
+            return []
+        table = Message.__table__
+        try:
+            result = await self.session.execute(
+                insert(table).returning(table.c.id, sort_by_parameter_order=True),
+                rows,
+            )
+            ids = [row[0] for row in result]
+            await self._save()
+            logger.debug("Bulk-inserted %s messages (ids %s..%s)", len(ids), ids[0], ids[-1])
+            return ids
+        except SQLAlchemyError as exc:
+            await self.session.rollback()
+            logger.error("DB error while bulk-inserting messages: %s", exc, exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error while importing messages",
+            )
+
+    async def fetch_last_n(self, *, chat_id: int, n: int) -> List[Message]:
+        """The latest *n* messages of a chat (oldest → newest)."""
+        try:
+            rows = await self._all(
+                select(Message)
+                .where(Message.chat_id == chat_id)
+                .order_by(Message.timestamp.desc(), Message.id.desc())   # a turn's rows share a timestamp
+                .limit(n)
+            )
+            rows.reverse()  # oldest → newest
+            return rows
+        except SQLAlchemyError as exc:
+            await self.session.rollback()
+            logger.error("DB error while fetching last %s messages: %s", n, exc, exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error while fetching messages",
+            )
+
+    async def fetch_page(
+        self,
+        *,
+        chat_id: int,
+        limit: int,
+        after: Optional[Tuple[datetime, int]] = None,
+        before: Optional[Tuple[datetime, int]] = None,
+        since: Optional[datetime] = None,
+        newest_first: bool = False,
+    ) -> List[Message]:
+        """Keyset page in ``(timestamp, id)`` order, see `MessageRepository.fetch_page`."""
+        try:
+            key = tuple_(Message.timestamp, Message.id)
+            stmt = select(Message).where(Message.chat_id == chat_id)
+            if after is not None:
+                stmt = stmt.where(key > tuple(after))
+            if before is not None:
+                stmt = stmt.where(key < tuple(before))
+            if since is not None:
+                stmt = stmt.where(Message.timestamp > since)
+
+            if newest_first:
+                stmt = stmt.order_by(Message.timestamp.desc(), Message.id.desc())
+            else:
+                stmt = stmt.order_by(Message.timestamp.asc(), Message.id.asc())
+            return await self._all(stmt.limit(limit))
+
+        except SQLAlchemyError as exc:
+            await self.session.rollback()
+            logger.error("DB error while fetching a message page: %s", exc, exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error while fetching messages",
+            )
+
+    async def fetch_after_id(
+        self, *, chat_id: int, after_id: int, limit: int, keep_recent: int = 0,
+    ) -> List[Message]:
+        """Up to *limit* messages with ``id > after_id``, see `MessageRepository.fetch_after_id`."""
+        try:
+            stmt = select(Message).where(Message.chat_id == chat_id, Message.id > after_id)
+            if keep_recent > 0:
+                recent = (
+                    select(Message.id)
+                    .where(Message.chat_id == chat_id)
+                    .order_by(Message.id.desc())
+                    .limit(keep_recent)
+                    .subquery()
+                )
+                stmt = stmt.where(Message.id.not_in(recent.select()))
+            return await self._all(
+                stmt
+                .order_by(Message.id.asc())
+                .limit(limit)
+            )
+        except SQLAlchemyError as exc:
+            await self.session.rollback()
+            logger.error("DB error while fetching messages after id %s: %s", after_id, exc, exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error while fetching messages",
+            )
@@ -0,0 +1,91 @@
+# db/repositories/async_user_repository.py
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from datetime import datetime
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+import logging
+
+from db.models import User
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncUserRepository:
+    """
+    `UserRepository` on an `AsyncSession`: same methods, awaited.
+
+    Password hashing is CPU-bound (bcrypt), not a DB wait: `hash_password`
+    and `verify_password` run it in the threadpool so the loop stays free.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+    async def add_new_user(self, email: str, hashed_password: str) -> int:
+        try:
+            db_user = User(
+                email=email,
+                password_hash=hashed_password,
+                created_at=datetime.utcnow(),
+                name=""
+            )
+            # Automatically link the details object
+            from db.models.user_details import UserDetails
+            db_user.user_details = UserDetails()
+
+            self.session.add(db_user)
+            await self.session.commit()  # flush+commit in the right order
+
+            return db_user.user_id
+
+        except SQLAlchemyError as e:
+            await self.session.rollback()
+            logger.error(f"Error adding new user: {str(e)}")
+            raise HTTPException(status_code=500, detail="Error adding new user")
+
+    async def get_user_profile(self, user_id: int) -> Optional[User]:
+        """The user row, or ``None`` (service layer decides whether to raise 404)."""
+        try:
+            return await self.session.scalar(select(User).where(User.user_id == user_id))
+        except SQLAlchemyError as e:
+            await self.session.rollback()
+            logger.error(f"Database error while fetching user_id {user_id}: {e}")
+            return None
+
+    async def get_user_by_email(self, email: str) -> Optional[User]:
+        try:
+            return await self.session.scalar(select(User).where(User.email == email))
+        except SQLAlchemyError as e:
+            await self.session.rollback()
+            logger.error(f"Database error: {e}")
+            return None
+
+    async def check_user_by_email(self, email: str) -> bool:
+        return await self.get_user_by_email(email) is not None
+
+    async def change_password(self, email: str, new_password: str):
+        user = await self.get_user_by_email(email)
+        if not user:
+            raise HTTPException(status_code=400, detail="User not found")
+
+        user.password_hash = await self.hash_password(new_password)
+        self.session.add(user)
+        await self.session.commit()
+
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        return await run_in_threadpool(self.pwd_context.verify, plain_password, hashed_password)
+
+    async def hash_password(self, password: str) -> str:
+        return await run_in_threadpool(self.pwd_context.hash, password)
+
+    async def make_user_verified_from_email(self, email: str):
+        db_user = await self.get_user_by_email(email)
+        if db_user:
+            db_user.is_verified = True
+            self.session.add(db_user)
+            await self.session.commit()
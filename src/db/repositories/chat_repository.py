@@ -11,8 +11,18 @@ import logging
 logger = logging.getLogger(__name__)
 
 class ChatRepository:
-    def __init__(self, session):
+    def __init__(self, session, autocommit: bool = True):
         self.session = session            # sqlalchemy.orm.Session
+        self.autocommit = autocommit      # False → flush only, caller commits
+
+    def _save(self, row=None) -> None:
+        """Commit (and refresh *row*) or, in unit-of-work mode, just flush."""
+        if self.autocommit:
+            self.session.commit()
+            if row is not None:
+                self.session.refresh(row)
+        else:
+            self.session.flush()
 
     # ──────────────────────────────────────────────────────────────
     # public API
@@ -42,8 +52,7 @@ class ChatRepository:
                 created_at= datetime.utcnow(),
             )
             self.session.add(chat_row)
-            self.session.commit()       # flush + commit
-            self.session.refresh(chat_row)  # ensure we have the generated primary key
+            self._save(chat_row)        # ensures we have the generated primary key
             logger.debug("Chat created (id=%s user_id=%s)", chat_row.id, user_id)
             return chat_row
 
@@ -139,7 +148,7 @@ class ChatRepository:
             
             # Delete the chat (cascade will handle related messages)
             self.session.delete(chat)
-            self.session.commit()
+            self._save()
             logger.debug("Chat deleted (id=%s user_id=%s)", chat_id, user_id)
             return True
             
@@ -0,0 +1,82 @@
+# db/repositories/chat_summary_repository.py
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.exc import SQLAlchemyError
+
+from db.models.chat_summary import ChatSummary
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ChatSummaryRepository:
+    def __init__(self, session, autocommit: bool = True):
+        self.session = session            # sqlalchemy.orm.Session
+        self.autocommit = autocommit      # False → flush only, caller commits
+
+    def _save(self, row=None) -> None:
+        """Commit (and refresh *row*) or, in unit-of-work mode, just flush."""
+        if self.autocommit:
+            self.session.commit()
+            if row is not None:
+                self.session.refresh(row)
+        else:
+            self.session.flush()
+
+    # ──────────────────────────────────────────────────────────────
+    # public API
+    # ──────────────────────────────────────────────────────────────
+    def get_summary(self, chat_id: int) -> Optional[ChatSummary]:
+        """Return the chat's rolling summary row, or ``None`` if none exists yet."""
+        try:
+            return self.session.get(ChatSummary, chat_id)
+        except SQLAlchemyError as exc:
+            self.session.rollback()
+            logger.error("DB error while fetching summary for chat_id %s: %s", chat_id, exc, exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error while fetching chat summary",
+            )
+
+    def upsert_summary(
+        self,
+        *,
+        chat_id: int,
+        summary: str,
+        through_message_id: int,
+        added_messages: int,
+    ) -> ChatSummary:
+        """
+        Create or advance the summary of *chat_id*.
+
+        Parameters
+        ----------
+        summary : str
+            New summary text (replaces the previous one).
+        through_message_id : int
+            Id of the newest message folded into *summary*.
+        added_messages : int
+            How many messages this update folded in.
+        """
+        try:
+            row = self.session.get(ChatSummary, chat_id)
+            if row is None:
+                row = ChatSummary(chat_id=chat_id, message_count=0)
+                self.session.add(row)
+            row.summary = summary
+            row.through_message_id = through_message_id
+            row.message_count = (row.message_count or 0) + added_messages
+            row.updated_at = datetime.utcnow()
+            self._save(row)
+            logger.debug("Summary updated (chat_id=%s through=%s)", chat_id, through_message_id)
+            return row
+
+        except SQLAlchemyError as exc:
+            self.session.rollback()
+            logger.error("DB error while saving summary for chat_id %s: %s", chat_id, exc, exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error while saving chat summary",
+            )
@@ -1,8 +1,9 @@
 # db/repositories/message_repository.py
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import HTTPException, status
+from sqlalchemy import insert, tuple_
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
@@ -13,8 +14,27 @@ logger = logging.getLogger(__name__)
 
 
 class MessageRepository:
-    def __init__(self, session: Session):
+    def __init__(self, session: Session, autocommit: bool = True):
+        """
+        Parameters
+        ----------
+        session : Session
+            SQLAlchemy session the repository works on.
+        autocommit : bool, default True
+            ``False`` = unit-of-work mode: writes are only flushed (so primary
+            keys are assigned) and the caller commits once per request.
+        """
         self.session = session
+        self.autocommit = autocommit
+
+    def _save(self, row=None) -> None:
+        """Commit (and refresh *row*) or, in unit-of-work mode, just flush."""
+        if self.autocommit:
+            self.session.commit()
+            if row is not None:
+                self.session.refresh(row)
+        else:
+            self.session.flush()
     
     # ──────────────────────────────────────────────────────────────
     # public api
@@ -56,7 +76,7 @@ class MessageRepository:
                 q = q.filter(Message.timestamp > since)
 
             messages = (
-                q.order_by(Message.timestamp.asc())
+                q.order_by(Message.timestamp.asc(), Message.id.asc())
                  .offset(offset)
                  .limit(limit)
                  .all()
@@ -87,6 +107,8 @@ class MessageRepository:
         message: str,
         message_format: str = "text",
         timestamp: datetime | None = None,
+        transcription: str | None = None,
+        received_at: datetime | None = None,
     ) -> Message:
         """Persist a single message row and return the ORM object."""
         ts = timestamp or datetime.utcnow()
@@ -100,9 +122,12 @@ class MessageRepository:
                 message_format=message_format,
                 timestamp=ts,
             )
+            if transcription is not None:
+                msg_row.transcription = transcription
+            if received_at is not None:
+                msg_row.received_at = received_at
             self.session.add(msg_row)
-            self.session.commit()
-            self.session.refresh(msg_row)  # populate autoincremented id
+            self._save(msg_row)  # populates the autoincremented id
             logger.debug("Inserted message id=%s (chat_id=%s)", msg_row.id, chat_id)
             return msg_row
         except SQLAlchemyError as exc:
@@ -113,6 +138,37 @@ class MessageRepository:
                 detail="Database error while inserting message",
             )
 
+    def bulk_insert_messages(self, rows: List[Dict[str, Any]]) -> List[int]:
+        """
+        Insert many message rows with one batched statement and return their
+        ids in input order.
+
+        Goes through Core (no ORM objects, no identity map): SQLAlchemy sends
+        the rows as multi-row ``INSERT … RETURNING id`` batches.  *rows* are
+        column dicts (``chat_id``, ``user_id``, ``user_type``, ``user_name``,
+        ``message``, ``message_format``, ``timestamp``); column defaults fill
+        the rest.
+        """
+        if not rows:
+            return []
+        table = Message.__table__
+        try:
+            result = self.session.execute(
+                insert(table).returning(table.c.id, sort_by_parameter_order=True),
+                rows,
+            )
+            ids = [row[0] for row in result]
+            self._save()
+            logger.debug("Bulk-inserted %s messages (ids %s..%s)", len(ids), ids[0], ids[-1])
+            return ids
+        except SQLAlchemyError as exc:
+            self.session.rollback()
+            logger.error("DB error while bulk-inserting messages: %s", exc, exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error while importing messages",
+            )
+
     # ──────────────────────────────────────────────────────────────
     # FETCH last N (helper for ChatBackend history)
     # ──────────────────────────────────────────────────────────────
@@ -126,7 +182,7 @@ class MessageRepository:
             rows = (
                 self.session.query(Message)
                 .filter(Message.chat_id == chat_id)
-                .order_by(Message.timestamp.desc())
+                .order_by(Message.timestamp.desc(), Message.id.desc())   # a turn's rows share a timestamp
                 .limit(n)
                 .all()
             )
@@ -139,3 +195,82 @@ class MessageRepository:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Database error while fetching messages",
             )
+
+    def fetch_page(
+        self,
+        *,
+        chat_id: int,
+        limit: int,
+        after: Optional[Tuple[datetime, int]] = None,
+        before: Optional[Tuple[datetime, int]] = None,
+        since: Optional[datetime] = None,
+        newest_first: bool = False,
+    ) -> List[Message]:
+        """
+        Keyset page of a chat's messages in ``(timestamp, id)`` order.
+
+        *after* / *before* are exclusive ``(timestamp, id)`` positions; with
+        *newest_first* the page is read backwards from the end (or from
+        *before*).  Rows come back in read order – oldest → newest, or
+        newest → oldest when reading backwards.  Each page is one range seek
+        on ``ix_messages_chat_id_timestamp`` (``id`` is the rowid, so the
+        index is already ordered by it within a timestamp); no OFFSET.
+        """
+        try:
+            key = tuple_(Message.timestamp, Message.id)
+            q = self.session.query(Message).filter(Message.chat_id == chat_id)
+            if after is not None:
+                q = q.filter(key > tuple(after))
+            if before is not None:
+                q = q.filter(key < tuple(before))
+            if since is not None:
+                q = q.filter(Message.timestamp > since)
+
+            if newest_first:
+                q = q.order_by(Message.timestamp.desc(), Message.id.desc())
+            else:
+                q = q.order_by(Message.timestamp.asc(), Message.id.asc())
+            return q.limit(limit).all()
+
+        except SQLAlchemyError as exc:
+            self.session.rollback()
+            logger.error("DB error while fetching a message page: %s", exc, exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error while fetching messages",
+            )
+
+    def fetch_after_id(
+        self, *, chat_id: int, after_id: int, limit: int, keep_recent: int = 0,
+    ) -> List[Message]:
+        """
+        Return up to *limit* messages with ``id > after_id`` (oldest → newest),
+        leaving out the chat's newest *keep_recent* messages.
+
+        Used by the conversation summarizer to pick up turns not yet folded
+        into the rolling summary.
+        """
+        try:
+            q = self.session.query(Message).filter(Message.chat_id == chat_id, Message.id > after_id)
+            if keep_recent > 0:
+                recent = (
+                    self.session.query(Message.id)
+                    .filter(Message.chat_id == chat_id)
+                    .order_by(Message.id.desc())
+                    .limit(keep_recent)
+                    .subquery()
+                )
+                q = q.filter(Message.id.not_in(recent.select()))
+            return (
+                q
+                .order_by(Message.id.asc())
+                .limit(limit)
+                .all()
+            )
+        except SQLAlchemyError as exc:
+            self.session.rollback()
+            logger.error("DB error while fetching messages after id %s: %s", after_id, exc, exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error while fetching messages",
+            )
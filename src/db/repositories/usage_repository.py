@@ -0,0 +1,190 @@
+# db/repositories/usage_repository.py
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from db.models.chat_usage import ChatLatencyBucket, ChatUsageDaily, MessageUsage
+from impl import latency_sketch
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class UsageRepository:
+    """
+    Per-reply LLM usage plus the per-chat, per-day rollups read by
+    ``GET /chat/{chat_id}/usage``.
+
+    Recording a call is one insert and two upserts whose updates are
+    expressed in SQL (``calls = calls + 1`` …), so concurrent turns of the
+    same chat never lose an update and reading the totals never scans
+    ``message_usage``.  The upserts use ``INSERT … ON CONFLICT`` of the
+    session's dialect (SQLite or PostgreSQL).
+    """
+
+    def __init__(self, session: Session, autocommit: bool = True):
+        self.session = session            # sqlalchemy.orm.Session
+        self.autocommit = autocommit      # False → flush only, caller commits
+
+    def _save(self, row=None) -> None:
+        """Commit (and refresh *row*) or, in unit-of-work mode, just flush."""
+        if self.autocommit:
+            self.session.commit()
+            if row is not None:
+                self.session.refresh(row)
+        else:
+            self.session.flush()
+
+    def _upsert_dialect(self):
+        """
+        ``(insert, least, greatest)`` for the session's dialect: the
+        ``insert`` construct that has ``on_conflict_do_update`` and the
+        two-argument scalar min / max functions.
+        """
+        dialect = self.session.get_bind().dialect.name
+        if dialect == "postgresql":
+            return postgresql.insert, func.least, func.greatest
+        if dialect == "sqlite":
+            return sqlite.insert, func.min, func.max
+        raise NotImplementedError(f"usage upserts are not implemented for {dialect!r}")
+
+    # ──────────────────────────────────────────────────────────────
+    # public API
+    # ──────────────────────────────────────────────────────────────
+    def record_message_usage(
+        self,
+        *,
+        chat_id: int,
+        message_id: int,
+        model: Optional[str],
+        usage: Optional[Dict[str, Any]],
+        latency_ms: float,
+        created_at: Optional[datetime] = None,
+    ) -> MessageUsage:
+        """
+        Store the usage of the call that produced *message_id* and fold it
+        into the chat's rollup for that UTC day.
+
+        Parameters
+        ----------
+        usage : dict | None
+            ``GenerationResult.usage``-style dict; ``total_cost``,
+            ``input_tokens``, ``output_tokens`` and ``cached_tokens`` are read.
+        latency_ms : float
+            Wall time of the generation as seen by the caller.
+        """
+        usage = usage or {}
+        created_at = created_at or datetime.utcnow()
+        day = created_at.date()
+        cost = float(usage.get("total_cost") or 0.0)
+        insert, least, greatest = self._upsert_dialect()
+        try:
+            row = MessageUsage(
+                chat_id=chat_id,
+                message_id=message_id,
+                model=model,
+                input_tokens=int(usage.get("input_tokens") or 0),
+                output_tokens=int(usage.get("output_tokens") or 0),
+                cached_tokens=int(usage.get("cached_tokens") or 0),
+                cost=cost,
+                latency_ms=latency_ms,
+                created_at=created_at,
+            )
+            self.session.add(row)
+
+            daily = insert(ChatUsageDaily).values(
+                chat_id=chat_id, day=day, calls=1, cost=cost, total_latency_ms=latency_ms,
+                min_latency_ms=latency_ms, max_latency_ms=latency_ms, updated_at=created_at,
+            )
+            self.session.execute(daily.on_conflict_do_update(
+                index_elements=[ChatUsageDaily.chat_id, ChatUsageDaily.day],
+                set_={
+                    "calls": ChatUsageDaily.calls + 1,
+                    "cost": ChatUsageDaily.cost + cost,
+                    "total_latency_ms": ChatUsageDaily.total_latency_ms + latency_ms,
+                    "min_latency_ms": least(func.coalesce(ChatUsageDaily.min_latency_ms, latency_ms), latency_ms),
+                    "max_latency_ms": greatest(func.coalesce(ChatUsageDaily.max_latency_ms, latency_ms), latency_ms),
+                    "updated_at": created_at,
+                },
+            ))
+
+            bucket = insert(ChatLatencyBucket).values(
+                chat_id=chat_id, day=day, bucket=latency_sketch.bucket_of(latency_ms), count=1,
+            )
+            self.session.execute(bucket.on_conflict_do_update(
+                index_elements=[ChatLatencyBucket.chat_id, ChatLatencyBucket.day, ChatLatencyBucket.bucket],
+                set_={"count": ChatLatencyBucket.count + 1},
+            ))
+
+            self._save(row)
+            logger.debug("Usage recorded (chat_id=%s message_id=%s cost=%s latency_ms=%.1f)",
+                         chat_id, message_id, cost, latency_ms)
+            return row
+
+        except SQLAlchemyError as exc:
+            self.session.rollback()
+            logger.error("DB error while recording usage for chat_id %s: %s", chat_id, exc, exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error while recording usage",
+            )
+
+    def get_chat_usage(
+        self,
+        chat_id: int,
+        *,
+        from_day: Optional[date] = None,
+        to_day: Optional[date] = None,
+    ) -> Dict[str, Any]:
+        """
+        Aggregate the chat's daily rollups between *from_day* and *to_day*
+        (inclusive, either side open when ``None``).
+
+        Returns ``calls``, ``cost`` and ``total/min/max/avg/median_latency_ms``;
+        the latency fields are ``None`` when no call falls in the window.
+        """
+        try:
+            daily = select(
+                func.coalesce(func.sum(ChatUsageDaily.calls), 0),
+                func.coalesce(func.sum(ChatUsageDaily.cost), 0.0),
+                func.coalesce(func.sum(ChatUsageDaily.total_latency_ms), 0.0),
+                func.min(ChatUsageDaily.min_latency_ms),
+                func.max(ChatUsageDaily.max_latency_ms),
+            ).where(ChatUsageDaily.chat_id == chat_id)
+            buckets = select(
+                ChatLatencyBucket.bucket, func.sum(ChatLatencyBucket.count),
+            ).where(ChatLatencyBucket.chat_id == chat_id).group_by(ChatLatencyBucket.bucket)
+
+            if from_day is not None:
+                daily = daily.where(ChatUsageDaily.day >= from_day)
+                buckets = buckets.where(ChatLatencyBucket.day >= from_day)
+            if to_day is not None:
+                daily = daily.where(ChatUsageDaily.day <= to_day)
+                buckets = buckets.where(ChatLatencyBucket.day <= to_day)
+
+            calls, cost, total_ms, min_ms, max_ms = self.session.execute(daily).one()
+            median_ms = latency_sketch.quantile(self.session.execute(buckets).all(), 0.5)
+
+            return {
+                "calls": int(calls),
+                "cost": float(cost),
+                "total_latency_ms": float(total_ms),
+                "min_latency_ms": min_ms,
+                "max_latency_ms": max_ms,
+                "avg_latency_ms": float(total_ms) / calls if calls else None,
+                # the sketch is ±1 %; never report outside the exact min/max
+                "median_latency_ms": min(max(median_ms, min_ms), max_ms) if median_ms is not None else None,
+            }
+
+        except SQLAlchemyError as exc:
+            self.session.rollback()
+            logger.error("DB error while reading usage for chat_id %s: %s", chat_id, exc, exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error while reading chat usage",
+            )
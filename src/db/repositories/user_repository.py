@@ -13,10 +13,18 @@ from typing import Optional
 logger = logging.getLogger(__name__)
 
 class UserRepository:
-    def __init__(self, session: Session):
+    def __init__(self, session: Session, autocommit: bool = True):
         self.session = session
+        self.autocommit = autocommit      # False → flush only, caller commits
         self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+    def _save(self) -> None:
+        """Commit or, in unit-of-work mode, just flush."""
+        if self.autocommit:
+            self.session.commit()
+        else:
+            self.session.flush()
+
     def add_new_user(self, email: str, hashed_password: str) -> int:
         
         try:
@@ -31,7 +39,7 @@ class UserRepository:
             db_user.user_details = UserDetails()
 
             self.session.add(db_user)
-            self.session.commit()  # flush+commit in the right order
+            self._save()  # flush+commit in the right order
 
             return db_user.user_id
 
@@ -109,7 +117,7 @@ class UserRepository:
         new_hashed_password = self.pwd_context.hash(new_password)
         user.password_hash = new_hashed_password
         self.session.add(user)
-        self.session.commit()
+        self._save()
 
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         return self.pwd_context.verify(plain_password, hashed_password)
@@ -122,7 +130,7 @@ class UserRepository:
         if db_user:
             db_user.is_verified = True
             self.session.add(db_user)
-            self.session.commit()
+            self._save()
 
     def add_default_currency(self, user_id: int, default_currency: str):
         try:
@@ -139,7 +147,7 @@ class UserRepository:
                 )
                 self.session.add(user_settings)
 
-            self.session.commit()
+            self._save()
             logger.info(f"Set default currency for user_id {user_id} to {default_currency}")
         except SQLAlchemyError as e:
             self.session.rollback()
@@ -0,0 +1,160 @@
+# db/request_session.py
+"""One database session per HTTP request.
+
+`request_session` is an app-wide FastAPI dependency.  It creates a
+`RequestSession` for every request and makes it current for the request's
+context.  Services reach it through `use_session`:
+
+    with use_session(self.dependencies) as db:
+        chat_repo = db.repository("chat")
+        ...
+
+* the `Session` is opened on first use, so requests that never touch the
+  DB (health checks, cache hits, the async message path) hold no
+  connection
+* repositories are built once per request, bound to that session and in
+  unit-of-work mode (``autocommit=False``: writes are flushed, not
+  committed), so every service in a composite endpoint shares one
+  connection and one identity map
+* the request commits once, after the endpoint returns and before the
+  response is sent; an exception anywhere rolls the whole request back
+
+Outside a request (background tasks, scripts) `use_session` opens a private
+`RequestSession` and commits, rolls back and closes it around the block.
+"""
+from __future__ import annotations
+
+import contextvars
+import logging
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from fastapi import HTTPException, status
+from fastapi.requests import HTTPConnection
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_current: contextvars.ContextVar[Optional["RequestSession"]] = contextvars.ContextVar("request_session", default=None)
+
+
+class RequestSession:
+    """A lazily opened `Session` and the repositories bound to it."""
+
+    def __init__(self, services) -> None:
+        self.services = services          # core.containers.Services
+        self._session: Optional[Session] = None
+        self._repositories: Dict[str, Any] = {}
+        self._after_commit: List[Callable[[], None]] = []
+        self.closed = False
+
+    @property
+    def session(self) -> Session:
+        if self.closed:
+            raise RuntimeError("RequestSession used after the request ended")
+        if self._session is None:
+            # rows handed out by services stay readable after the one commit
+            self._session = self.services.session_factory()(expire_on_commit=False)
+        return self._session
+
+    def repository(self, name: str):
+        """The request's ``<name>_repository`` (e.g. ``"chat"``), built on first use."""
+        repo = self._repositories.get(name)
+        if repo is None:
+            provider = getattr(self.services, f"{name}_repository")
+            repo = self._repositories[name] = provider(session=self.session, autocommit=False)
+        return repo
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """
+        Run *callback* once the work so far is committed (dropped on rollback).
+
+        For side effects outside the database – e.g. evicting a cache entry –
+        that must not happen while a concurrent reader can still see the
+        uncommitted state and re-populate the cache from it.
+        """
+        self._after_commit.append(callback)
+
+    def commit(self) -> None:
+        """
+        Commit now.  For services whose response depends on the write having
+        committed (e.g. it returns new ids); the request's own commit then
+        only covers what follows.
+        """
+        if self._session is not None:
+            self._session.commit()
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as exc:
+                logger.error("after-commit callback failed: %s", exc, exc_info=True)
+
+    def rollback(self) -> None:
+        self._after_commit.clear()
+        if self._session is not None:
+            self._session.rollback()
+
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.close()
+        self._session = None
+        self._repositories.clear()
+        self.closed = True
+
+
+def current() -> Optional[RequestSession]:
+    """The current request's `RequestSession`, if any."""
+    db = _current.get()
+    # tasks spawned during a request inherit the context var; once the
+    # request has ended they must not keep using its session
+    return db if db is not None and not db.closed else None
+
+
+@contextmanager
+def use_session(services) -> Iterator[RequestSession]:
+    """
+    The request's `RequestSession`; outside a request a private one that is
+    committed on success, rolled back on error and closed here.
+    """
+    db = current()
+    if db is not None:
+        yield db
+        return
+
+    db = RequestSession(services)
+    try:
+        yield db
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def request_session(connection: HTTPConnection) -> AsyncIterator[RequestSession]:
+    """
+    FastAPI dependency (register with ``scope="function"``): one
+    `RequestSession` for the request, committed or rolled back in one place.
+    """
+    db = RequestSession(connection.app.state.services)
+    token = _current.set(db)
+    try:
+        yield db
+        try:
+            db.commit()
+        except SQLAlchemyError as exc:
+            db.rollback()
+            logger.error("DB error while committing request: %s", exc, exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error while saving changes",
+            )
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        _current.reset(token)
+        db.close()
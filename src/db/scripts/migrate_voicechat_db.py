@@ -0,0 +1,35 @@
+# migrate_voicechat_db.py
+
+
+#  python -m db.scripts.migrate_voicechat_db [--status] [--to N] [--db-url URL]
+import argparse
+import os
+
+from sqlalchemy import create_engine
+
+from db.migrations import apply_migrations, current_version, pending_migrations
+
+
+def main():
+    base_dir = os.path.dirname(__file__)
+    main_db_path = os.path.abspath(os.path.join(base_dir, "..", "data", "voicechat.db"))
+
+    parser = argparse.ArgumentParser(description="Apply schema migrations to the voicechat DB")
+    parser.add_argument("--db-url", default=f"sqlite:///{main_db_path}")
+    parser.add_argument("--to", type=int, default=None, help="stop after this version")
+    parser.add_argument("--status", action="store_true", help="show the current version and pending migrations")
+    args = parser.parse_args()
+
+    engine = create_engine(args.db_url)
+
+    if args.status:
+        print(f"current version: {current_version(engine)}")
+        for m in pending_migrations(engine, args.to):
+            print(f"pending {m.version:04d}: {m.description}")
+        return
+
+    applied = apply_migrations(engine, args.to)
+    print(f"applied: {applied or 'nothing'}; now at version {current_version(engine)}")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,216 @@
 # db/session.py
+"""Engine construction for the app's database.
 
-from sqlalchemy import create_engine
+`get_engine` applies an engine profile:
 
-def get_engine(db_url):
-    return create_engine(db_url)
\ No newline at end of file
+* SQLite pragmas on every new connection – WAL journaling (readers no
+  longer block the writer), ``synchronous=NORMAL`` (safe with WAL, no fsync
+  per commit), a page cache carved out of a per-engine budget,
+  memory-mapped reads and a
+  ``busy_timeout`` so a writer waits for the lock instead of failing with
+  "database is locked"
+* a connection pool sized to the worker's concurrency: blocking DB work
+  runs in the threadpool, each thread holding at most one connection
+* `TimedQueuePool`, which measures how long each checkout waited for a
+  connection (``db_pool`` span in ``Server-Timing``, totals in
+  ``engine.pool.snapshot()``)
+
+`get_async_engine` builds the `AsyncEngine` for the same database with the
+same profile: the URL is switched to the async driver (``aiosqlite`` for
+SQLite, ``asyncpg`` for PostgreSQL), the pragmas are applied on every new
+connection and checkouts are timed by `TimedAsyncQueuePool`.  Repositories
+in ``db/repositories/async_*`` run on it; their waits are awaited on the
+event loop instead of holding a worker thread.
+
+SQLite's page cache is per connection, so it is sized from
+``cache_budget_kib`` – the most one engine's pool may hold in page caches –
+divided by the pool's connection limit (``pool_size + max_overflow``);
+``cache_size_kib`` overrides the per-connection size.
+
+Profile keys (all optional, see ``DEFAULT_PROFILE``): ``journal_mode``,
+``synchronous``, ``cache_budget_kib``, ``cache_size_kib`` (default: derived
+from the budget), ``mmap_size``, ``busy_timeout_ms``,
+``worker_threads``, ``pool_size`` (default: ``worker_threads``),
+``max_overflow``, ``pool_timeout``, ``echo``.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from impl import request_timing
+from impl.latency_sketch import LatencySketch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE: Dict[str, Any] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_budget_kib": 128 * 1024,     # all page caches of one engine's pool
+    "cache_size_kib": None,             # per connection; None → budget / max connections
+    "mmap_size": 256 * 1024 * 1024,
+    "busy_timeout_ms": 5000,
+    "worker_threads": 40,               # anyio's default threadpool size
+    "pool_size": None,                  # None → worker_threads
+    "max_overflow": 10,                 # event-loop-side and background sessions
+    "pool_timeout": 30.0,
+    "echo": False,
+}
+
+
+class TimedQueuePool(QueuePool):
+    """`QueuePool` that records the time every checkout spent waiting."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self._wait_sketch = LatencySketch()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            with self._wait_lock:
+                self._timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._wait_lock:
+                self._checkouts += 1
+                self._total_wait += waited
+                self._max_wait = max(self._max_wait, waited)
+                self._wait_sketch.add(waited * 1000.0)
+            request_timing.add("db_pool", waited)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Pool occupancy and checkout wait statistics."""
+        with self._wait_lock:
+            return {
+                "size": self.size(),
+                "checked_out": self.checkedout(),
+                "overflow": self.overflow(),
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "avg_wait_ms": round(self._total_wait / self._checkouts * 1000, 3) if self._checkouts else 0.0,
+                "p50_wait_ms": _round(self._wait_sketch.quantile(0.5)),
+                "p99_wait_ms": _round(self._wait_sketch.quantile(0.99)),
+                "max_wait_ms": round(self._max_wait * 1000, 3),
+            }
+
+
+class TimedAsyncQueuePool(TimedQueuePool, AsyncAdaptedQueuePool):
+    """`TimedQueuePool` for async drivers (asyncio-aware checkout queue)."""
+
+
+# sync driver → async driver for the same database
+ASYNC_DRIVERS: Dict[str, str] = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+def async_url(db_url: str) -> URL:
+    """*db_url* with its driver switched to the async one (unchanged if already async)."""
+    url = make_url(db_url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername))
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+
+def _settings(profile: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    settings = dict(DEFAULT_PROFILE)
+    settings.update({k: v for k, v in (profile or {}).items() if v is not None})
+    return settings
+
+
+def _pool_size(settings: Dict[str, Any]) -> int:
+    return int(settings["pool_size"] or settings["worker_threads"])
+
+
+def _cache_size_kib(url: URL, settings: Dict[str, Any]) -> int:
+    """Per-connection page cache: explicit ``cache_size_kib`` or the budget split over the pool."""
+    if settings["cache_size_kib"]:
+        return int(settings["cache_size_kib"])
+    connections = 1 if _in_memory(url) else _pool_size(settings) + int(settings["max_overflow"])
+    return max(1, int(settings["cache_budget_kib"]) // max(1, connections))
+
+
+def _engine_kwargs(url: URL, settings: Dict[str, Any], poolclass) -> Dict[str, Any]:
+    kwargs: Dict[str, Any] = {"echo": settings["echo"]}
+    if not _in_memory(url):     # in-memory SQLite keeps its single shared connection
+        kwargs.update(
+            poolclass=poolclass,
+            pool_size=_pool_size(settings),
+            max_overflow=settings["max_overflow"],
+            pool_timeout=settings["pool_timeout"],
+        )
+    return kwargs
+
+
+def _in_memory(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def get_engine(db_url: str, profile: Optional[Dict[str, Any]] = None) -> Engine:
+    """Engine for *db_url* with the given profile (missing keys → ``DEFAULT_PROFILE``)."""
+    settings = _settings(profile)
+    url = make_url(db_url)
+    kwargs = _engine_kwargs(url, settings, TimedQueuePool)
+    engine = create_engine(url, **kwargs)
+
+    if url.get_backend_name() == "sqlite":
+        event.listen(engine, "connect", _sqlite_pragmas(url, settings))
+    logger.debug("Engine for %s: %s", url.render_as_string(hide_password=True), kwargs)
+    return engine
+
+
+def get_async_engine(db_url: str, profile: Optional[Dict[str, Any]] = None) -> AsyncEngine:
+    """`AsyncEngine` for *db_url* (sync or async driver) with the given profile."""
+    settings = _settings(profile)
+    url = async_url(db_url)
+    kwargs = _engine_kwargs(url, settings, TimedAsyncQueuePool)
+    engine = create_async_engine(url, **kwargs)
+
+    if url.get_backend_name() == "sqlite":
+        # the adapted aiosqlite connection offers the blocking DB-API cursor
+        event.listen(engine.sync_engine, "connect", _sqlite_pragmas(url, settings))
+    logger.debug("Async engine for %s: %s", url.render_as_string(hide_password=True), kwargs)
+    return engine
+
+
+def _sqlite_pragmas(url: URL, settings: Dict[str, Any]):
+    pragmas = []
+    if not _in_memory(url):
+        pragmas.append(f"PRAGMA journal_mode={settings['journal_mode']}")
+    pragmas += [
+        f"PRAGMA synchronous={settings['synchronous']}",
+        f"PRAGMA cache_size={-_cache_size_kib(url, settings)}",      # negative → KiB
+        f"PRAGMA mmap_size={int(settings['mmap_size'])}",
+        f"PRAGMA busy_timeout={int(settings['busy_timeout_ms'])}",
+    ]
+
+    def _on_connect(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    return _on_connect
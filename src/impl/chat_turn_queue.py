@@ -0,0 +1,160 @@
+# impl/chat_turn_queue.py
+"""Per-chat ordered execution of message turns.
+
+Every chat gets a lane: a FIFO of pending turns drained by one worker task.
+Turns of the same chat therefore run strictly one after another, in arrival
+order – the second of two rapid posts reads the history only after the
+first one's reply is committed – while lanes of different chats run fully
+in parallel.  A lane (and its worker) exists only while it has work.
+
+Two ways in:
+
+* `submit` – queue a turn and await its result.  The work runs in the lane's
+  worker, so a caller that goes away does not abort a turn it was batched
+  with.  With ``coalesce=True``, consecutive queued turns sharing a
+  `coalesce_key` are handed to one handler call (one LLM call answering
+  all of them); every caller still gets its own result.
+* `exclusive` – ``async with`` block holding the lane, for turns that must
+  run in the caller's own task (a streamed reply is produced while the
+  response is being sent).
+
+State is per process; with several workers, ordering holds per worker.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# handler(payloads) -> one result per payload, in order
+BatchHandler = Callable[[List[Any]], Awaitable[List[Any]]]
+
+
+class _Turn:
+    __slots__ = ("payload", "handler", "key", "future", "released")
+
+    def __init__(self, payload: Any, handler: Optional[BatchHandler], key: Optional[Hashable]) -> None:
+        self.payload = payload
+        self.handler = handler              # None → exclusive slot
+        self.key = key
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.released: Optional[asyncio.Event] = asyncio.Event() if handler is None else None
+
+
+class ChatTurnQueue:
+    """
+    Parameters
+    ----------
+    coalesce : bool
+        Batch consecutive queued turns with equal `coalesce_key` into one
+        handler call.
+    max_coalesce : int
+        Upper bound on turns per batch.
+    """
+
+    def __init__(self, *, coalesce: bool = False, max_coalesce: int = 8) -> None:
+        self.coalesce = coalesce
+        self.max_coalesce = max(1, int(max_coalesce))
+        self._lanes: Dict[Hashable, Deque[_Turn]] = {}
+        self._workers: Dict[Hashable, asyncio.Task] = {}
+
+        self.turns = 0
+        self.batches = 0
+        self.coalesced = 0      # turns answered as part of an earlier turn's batch
+
+    async def submit(
+        self,
+        chat_id: Hashable,
+        payload: Any,
+        handler: BatchHandler,
+        *,
+        coalesce_key: Optional[Hashable] = None,
+    ) -> Any:
+        """Queue *payload* behind the chat's earlier turns; return its result."""
+        turn = _Turn(payload, handler, coalesce_key)
+        self._enqueue(chat_id, turn)
+        return await turn.future
+
+    @asynccontextmanager
+    async def exclusive(self, chat_id: Hashable) -> AsyncIterator[None]:
+        """Hold the chat's lane for the body of the ``async with``."""
+        turn = _Turn(None, None, None)
+        self._enqueue(chat_id, turn)
+        try:
+            await turn.future
+        except asyncio.CancelledError:
+            if turn.future.done() and not turn.future.cancelled():
+                turn.released.set()     # granted just as we were cancelled
+            raise
+        try:
+            yield
+        finally:
+            turn.released.set()
+
+    def pending(self, chat_id: Hashable) -> int:
+        lane = self._lanes.get(chat_id)
+        return len(lane) if lane is not None else 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "active_chats": len(self._lanes),
+            "queued": sum(len(lane) for lane in self._lanes.values()),
+            "turns": self.turns,
+            "batches": self.batches,
+            "coalesced": self.coalesced,
+        }
+
+    # ──────────────────────────────────────────────────────────────
+    # internals
+    # ──────────────────────────────────────────────────────────────
+    def _enqueue(self, chat_id: Hashable, turn: _Turn) -> None:
+        lane = self._lanes.get(chat_id)
+        if lane is None:
+            lane = self._lanes[chat_id] = deque()
+            self._workers[chat_id] = asyncio.get_running_loop().create_task(self._drain(chat_id, lane))
+        lane.append(turn)
+        self.turns += 1
+
+    async def _drain(self, chat_id: Hashable, lane: Deque[_Turn]) -> None:
+        try:
+            while lane:
+                turn = lane.popleft()
+                if turn.future.cancelled():
+                    continue                    # caller gone before its turn came up
+
+                if turn.handler is None:
+                    turn.future.set_result(None)
+                    await turn.released.wait()
+                    continue
+
+                batch = [turn]
+                if self.coalesce and turn.key is not None:
+                    while lane and len(batch) < self.max_coalesce and lane[0].key == turn.key \
+                            and lane[0].handler is turn.handler:
+                        nxt = lane.popleft()
+                        if not nxt.future.cancelled():
+                            batch.append(nxt)
+                await self._run_batch(chat_id, batch)
+        finally:
+            del self._lanes[chat_id]
+            del self._workers[chat_id]
+
+    async def _run_batch(self, chat_id: Hashable, batch: List[_Turn]) -> None:
+        self.batches += 1
+        self.coalesced += len(batch) - 1
+        if len(batch) > 1:
+            logger.debug("chat %s: coalescing %d queued turns", chat_id, len(batch))
+        try:
+            results = await batch[0].handler([t.payload for t in batch])
+        except Exception as exc:
+            for t in batch:
+                if not t.future.done():
+                    t.future.set_exception(exc)
+            return
+        for t, result in zip(batch, results):
+            if not t.future.done():
+                t.future.set_result(result)
@@ -7,16 +7,29 @@ The demo feeds three static user prompts; an auto‑reply hook invokes the LLM a
 """
 from __future__ import annotations
 
+import logging
+import time
+from collections import deque
 from datetime import datetime, timezone
-from functools import lru_cache
-from typing import Any, Callable, Dict, List, Optional
+from itertools import islice
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional
 
-from impl.schemes import ChatMessage 
+from impl.schemes import MessageRecord
 from impl.myllmservice import MyLLMService
 
+logger = logging.getLogger(__name__)
+
 
 class ChatBackend:
-    """In‑memory chat store that can optionally generate AI responses."""
+    """
+    In‑memory chat store that can optionally generate AI responses.
+
+    With *capacity* set the backend is a bounded ring buffer: only the newest
+    *capacity* messages (and their pre-rendered history lines) are kept, the
+    oldest is dropped on append in O(1), and rendering the history is a join
+    of stored lines.  Suited to backends that live on in a cache.  Without
+    *capacity* every message is kept, as before.
+    """
      
     # ------------------------------------------------------------------ #
     # Construction
@@ -25,20 +38,36 @@ class ChatBackend:
     def __init__(
         self,
         config: Optional[Dict[str, Any]] = None,
-        hook: Optional[Callable[["ChatBackend", ChatMessage], None]] = None,
-        my_llm_service: Optional[MyLLMService] = None,
+        hook: Optional[Callable[["ChatBackend", MessageRecord], None]] = None,
+        *,
+        my_llm_service: MyLLMService,
+        capacity: Optional[int] = None,
     ) -> None:
         self.config: Dict[str, Any] = config or {}
-        self._messages: List[ChatMessage] = []
+        if capacity is not None and capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity: Optional[int] = capacity
+        # per-instance store: chronological records, their rendered history
+        # lines and a per-user index, all maintained on append (ids count up
+        # from 1; with a capacity the oldest entries fall off the left)
+        self._messages: Deque[MessageRecord] = deque(maxlen=capacity)
+        self._lines: Deque[str] = deque(maxlen=capacity)
+        self._by_user: Dict[int, Deque[MessageRecord]] = {}
         self._next_id: int = 1
 
-        self.last_message: Optional[ChatMessage] = None
-        self.last_ai_message: Optional[ChatMessage] = None
+        self.last_message: Optional[MessageRecord] = None
+        self.last_ai_message: Optional[MessageRecord] = None
 
-        self._hook: Optional[Callable[["ChatBackend", ChatMessage], None]] = hook
-        self.llm: MyLLMService = my_llm_service or MyLLMService()
+        self._hook: Optional[Callable[["ChatBackend", MessageRecord], None]] = hook
+        # the process-wide service (`Services.llm_service`): its limiter and
+        # connection pool only bound the worker if every backend shares it
+        self.llm: MyLLMService = my_llm_service
 
         self.system_prompt: Optional[str] = self.config.get("system_prompt")
+        # rolling summary of turns older than the in-memory history
+        self.summary: Optional[str] = None
+        # {"model", "usage", "latency_ms"} of the most recent generated reply
+        self.last_generation: Optional[Dict[str, Any]] = None
         init_time = datetime.now(timezone.utc)
         self.chatbackend_init_time: str = init_time.strftime("%Y-%m-%d__%H:%M:%S")
         self.session_name: str = f"session_{self.chatbackend_init_time}"
@@ -47,25 +76,48 @@ class ChatBackend:
     # Message helpers
     # ------------------------------------------------------------------ #
     
-    def bring_last_n_messages(self, *, n: int = 4) -> List[ChatMessage]:
+    def bring_last_n_messages(self, *, n: int = 4) -> List[MessageRecord]:
         """Return the last *n* messages (oldest → newest)."""
+        return self._tail(self._messages, n)
+
+    @staticmethod
+    def _tail(items: Deque, n: int) -> List:
         if n <= 0:
             return []
-        return self._messages[-n:]
+        return list(islice(items, max(0, len(items) - n), None))
 
-    def compile_chat_messages_to_string(self, chat_messages: List[ChatMessage]) -> str:
-        """Convert a list of ChatMessage objects into a single text block."""
+    def compile_chat_messages_to_string(self, chat_messages: List[MessageRecord]) -> str:
+        """
+        Convert a list of message records into a single text block,
+        preceded by the rolling summary when one is set.
+        """
         custom_formatter = self.config.get("history_formatter")
         if callable(custom_formatter):
             return custom_formatter(chat_messages)
 
-        return "\n".join(
-            f"{m.user_type.lower()}|{m.user_name}: {m.message}" for m in chat_messages
+        return self.with_summary(
+            "\n".join(self.format_message_line(m.user_type, m.user_name, m.message) for m in chat_messages),
+            self.summary,
         )
 
+    @staticmethod
+    def with_summary(recent_history: str, summary: Optional[str]) -> str:
+        """Prefix *recent_history* with the conversation summary (if any)."""
+        if not summary:
+            return recent_history
+        return f"summary of earlier conversation:\n{summary}\n\nrecent messages:\n{recent_history}"
+
+    @staticmethod
+    def format_message_line(user_type: str, user_name: str, message: str) -> str:
+        """Render one history line; shared with the process-level history cache."""
+        return f"{user_type.lower()}|{user_name}: {message}"
+
     def generate_chat_history(self, *, n: int = 4) -> str:
         """Return the last *n* messages as a formatted string for the LLM."""
-        return self.compile_chat_messages_to_string(self.bring_last_n_messages(n=n))
+        if callable(self.config.get("history_formatter")):
+            return self.compile_chat_messages_to_string(self.bring_last_n_messages(n=n))
+        # lines were rendered on append; this is only a join
+        return self.with_summary("\n".join(self._tail(self._lines, n)), self.summary)
 
     def produce_ai_response(self, *, history_count: int = 4) -> str:
         """Generate and store an assistant reply using the configured LLM service."""
@@ -73,21 +125,112 @@ class ChatBackend:
             return "I don’t know"
 
         history = self.generate_chat_history(n=history_count)
+        logger.debug("history: %s", history)
 
+        started = time.perf_counter()
+        generation_response = self.llm.generate_ai_answer(
+            chat_history=history,
+            user_msg=self.last_message.message,
+            # system_prompt=self.system_prompt,
+        )
+        self._note_generation(generation_response, None, started)
+        return self._store_ai_reply(generation_response)
 
-        print("history:", history) 
+    async def produce_ai_response_async(
+        self,
+        *,
+        history_count: int = 4,
+        history_text: Optional[str] = None,
+        model: Optional[str] = None,
+    ) -> str:
+        """
+        Awaitable variant of `produce_ai_response` for use inside async routes.
+
+        *history_text* lets callers pass an already rendered history block
+        (e.g. from the history cache) instead of re-formatting the tail; the
+        rolling summary is prepended to it just like to the formatted tail;
+        *model* overrides the LLM service's default model.
+        """
+        if not self.last_message or self.last_message.user_type.lower() != "user":
+            return "I don’t know"
 
+        history = (
+            self.with_summary(history_text, self.summary)
+            if history_text is not None
+            else self.generate_chat_history(n=history_count)
+        )
 
-        generation_response = self.llm.generate_ai_answer(
+        started = time.perf_counter()
+        generation_response = await self.llm.generate_ai_answer_async(
             chat_history=history,
             user_msg=self.last_message.message,
-            # system_prompt=self.system_prompt,
+            model=model,
         )
+        self._note_generation(generation_response, model, started)
+        return self._store_ai_reply(generation_response)
 
+    async def stream_ai_response(
+        self,
+        *,
+        history_count: int = 4,
+        history_text: Optional[str] = None,
+        model: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Yield the assistant reply chunk by chunk.
+
+        The full text is appended to the history once the stream completes;
+        nothing is stored if the stream is abandoned half-way.
+        """
+        if not self.last_message or self.last_message.user_type.lower() != "user":
+            yield "I don’t know"
+            return
 
-        print("generaion success:", generation_response.success) 
+        history = (
+            self.with_summary(history_text, self.summary)
+            if history_text is not None
+            else self.generate_chat_history(n=history_count)
+        )
 
-        print("content:", generation_response.content) 
+        parts: List[str] = []
+        usage: Dict[str, Any] = {}
+        started = time.perf_counter()
+        async for delta in self.llm.stream_ai_answer(
+            chat_history=history,
+            user_msg=self.last_message.message,
+            model=model,
+            usage_out=usage,
+        ):
+            parts.append(delta)
+            yield delta
+        self.last_generation = {
+            "model": (usage.get("routing") or {}).get("model") or model,
+            "usage": usage,
+            "latency_ms": (time.perf_counter() - started) * 1000,
+        }
+
+        self.add_message(
+            user_id=0,
+            user_name="AI",
+            user_type="assistant",
+            message="".join(parts),
+            message_type="text",
+        )
+
+    def _note_generation(self, generation_response, model: Optional[str], started: float) -> None:
+        """Remember model, usage and wall time of the reply (read by the message services)."""
+        usage = dict(getattr(generation_response, "usage", None) or {})
+        routed = (usage.get("routing") or {}).get("model")
+        self.last_generation = {
+            "model": routed or getattr(generation_response, "model", None) or model,
+            "usage": usage,
+            "latency_ms": (time.perf_counter() - started) * 1000,
+        }
+
+    def _store_ai_reply(self, generation_response) -> str:
+        """Turn a GenerationResult into reply text and append it to the history."""
+        logger.debug("generation success: %s", generation_response.success)
+        logger.debug("content: %s", generation_response.content)
 
         ai_text = (
             generation_response.content if getattr(generation_response, "success", False) else "unknown error"
@@ -119,30 +262,18 @@ class ChatBackend:
         chatContextNotes: Optional[List[str]] = None,
         coachContext: Optional[Dict[str, Any]] = None,
         timestamp: Optional[datetime] = None,
-    ) -> ChatMessage:
-        ts = timestamp or datetime.now(timezone.utc)
-        msg = ChatMessage(
+    ) -> MessageRecord:
+        msg = self._append(
             user_id=user_id,
             user_name=user_name,
             user_type=user_type,
-            id=self._next_id,
             message=message,
             message_type=message_type,
-            timestamp=ts,
-            userData=userData or {},
-            chatContextNotes=chatContextNotes or [],
-            coachContext=coachContext or {},
+            timestamp=timestamp or datetime.now(timezone.utc),
+            userData=userData,
+            chatContextNotes=chatContextNotes,
+            coachContext=coachContext,
         )
-        self._messages.append(msg)
-        self._next_id += 1
-
-        self.last_message = msg
-        if user_type.lower() == "assistant":
-            self.last_ai_message = msg
-
-        # Invalidate caches
-        self.get_messages.cache_clear()
-        self.get_messages_by_user.cache_clear()
 
         # Execute hook (if any)
         if self._hook is not None:
@@ -150,31 +281,81 @@ class ChatBackend:
 
         return msg
     
-    @lru_cache(maxsize=128)
-    def get_messages(self) -> List[ChatMessage]:
+    def load_messages(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Bulk-append stored messages (``add_message`` kwargs, oldest → newest).
+
+        Unlike ``add_message`` this runs no hook, which is what you want when
+        rehydrating a conversation.  With a capacity only the rows that would
+        survive are materialised.
+        """
+        if self.capacity is not None and len(rows) > self.capacity:
+            self._next_id += len(rows) - self.capacity      # keep ids aligned with the full sequence
+            rows = rows[-self.capacity:]
+        for row in rows:
+            self._append(
+                user_id=row["user_id"],
+                user_name=row["user_name"],
+                user_type=row["user_type"],
+                message=row["message"],
+                message_type=row.get("message_type", "text"),
+                timestamp=row.get("timestamp") or datetime.now(timezone.utc),
+            )
+
+    def _append(self, **fields: Any) -> MessageRecord:
+        """Store one record and update the index / last-message pointers."""
+        msg = MessageRecord(id=self._next_id, **fields)
+        if self.capacity is not None and len(self._messages) == self.capacity:
+            # the evicted record is also the oldest entry of its user's index
+            evicted = self._messages[0]
+            by_user = self._by_user[evicted.user_id]
+            by_user.popleft()
+            if not by_user:
+                del self._by_user[evicted.user_id]
+        self._messages.append(msg)
+        self._lines.append(self.format_message_line(msg.user_type, msg.user_name, msg.message))
+        by_user = self._by_user.get(msg.user_id)
+        if by_user is None:
+            self._by_user[msg.user_id] = deque((msg,))
+        else:
+            by_user.append(msg)
+        self._next_id += 1
+
+        self.last_message = msg
+        if msg.user_type.lower() == "assistant":
+            self.last_ai_message = msg
+        return msg
+
+    def get_messages(self) -> List[MessageRecord]:
         """Return all messages in chronological order."""
         return list(self._messages)
 
-    @lru_cache(maxsize=128)
-    def get_messages_by_user(self, user_id: int) -> List[ChatMessage]:
-        """Return all messages for a specific user."""
-        return [m for m in self._messages if m.user_id == user_id]
+    def get_messages_by_user(self, user_id: int) -> List[MessageRecord]:
+        """Return all messages for a specific user (served from the per-user index)."""
+        return list(self._by_user.get(user_id, ()))
+
+    def get_message(self, message_id: int) -> Optional[MessageRecord]:
+        """Return the message with backend id *message_id*, or ``None`` (also once evicted)."""
+        first_id = self._next_id - len(self._messages)
+        if first_id <= message_id < self._next_id:
+            return self._messages[message_id - first_id]
+        return None
 
     def clear_history(self) -> None:
         """Delete all messages and reset counters."""
         self._messages.clear()
+        self._lines.clear()
+        self._by_user.clear()
         self._next_id = 1
         self.last_message = None
         self.last_ai_message = None
-        self.get_messages.cache_clear()
-        self.get_messages_by_user.cache_clear()
 
     # ------------------------------------------------------------------ #
     # Hooks
     # ------------------------------------------------------------------ #
 
     def run_custom_logic_after_each_message(
-        self, func: Callable[["ChatBackend", ChatMessage], None]
+        self, func: Callable[["ChatBackend", MessageRecord], None]
     ) -> None:
         """Replace the current post‑message hook."""
         self._hook = func
@@ -188,13 +369,13 @@ class ChatBackend:
 def main() -> None:  # pragma: no cover
     """Static demo using a post‑message hook instead of manual calls."""
 
-    backend = ChatBackend()
+    backend = ChatBackend(my_llm_service=MyLLMService())
 
     # ------------------------------------------------------------------ #
     # Hook: auto‑generate AI reply when a user speaks
     # ------------------------------------------------------------------ #
 
-    def autoresponder(bk: ChatBackend, msg: ChatMessage) -> None:
+    def autoresponder(bk: ChatBackend, msg: MessageRecord) -> None:
         if msg.user_type.lower() == "user":
             ai_text = bk.produce_ai_response()
             print(f"User: {msg.message}         AI: {ai_text}")
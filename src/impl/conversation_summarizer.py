@@ -0,0 +1,187 @@
+# impl/conversation_summarizer.py
+"""Background rolling summaries for long chats.
+
+The message pipeline calls `ConversationSummarizer.note_messages` after each
+committed turn.  Every `every_n_messages` new messages a task is scheduled on
+the event loop that
+
+1. loads the chat's summary row and the messages after it, except the
+   newest `keep_recent_messages` – the turns every prompt still carries
+   verbatim – (threadpool),
+2. asks the LLM to fold those messages into the summary,
+3. stores the new summary and pushes it into the history cache (threadpool).
+
+Nothing here runs on the request path; a failed update is logged and retried
+on the next trigger, picking up from the last stored ``through_message_id``.
+Pending counts live in memory, so after a restart a chat is summarized again
+once it has accumulated `every_n_messages` new messages.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Set
+
+from starlette.concurrency import run_in_threadpool
+
+from db.repositories.chat_repository import ChatRepository
+from db.repositories.chat_summary_repository import ChatSummaryRepository
+from db.repositories.message_repository import MessageRepository
+from impl.chatbackend import ChatBackend
+from impl import request_timing
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationSummarizer:
+    """
+    Parameters
+    ----------
+    session_factory : sessionmaker
+        Used to open a short-lived session per step.
+    llm_service : MyLLMService
+        Shared LLM service (same limiter as the chat replies).
+    history_cache : ChatHistoryCache
+        Receives the fresh summary so the next turn needs no query.
+    every_n_messages : int
+        New messages (user + assistant) that trigger an update.
+    max_batch_messages : int
+        Max messages folded in per update; the rest wait for the next one.
+    keep_recent_messages : int
+        Newest messages never folded in: the summary covers only turns older
+        than the recent history sent with each prompt (the history cache
+        window), so no turn reaches the model twice.
+    max_summary_words : int
+        Length cap passed to the prompt, which keeps the summary constant-size.
+    model : str | None
+        Model for summaries; ``None`` → the LLM service default.
+    enabled : bool
+        ``False`` turns `note_messages` into a no-op.
+    """
+
+    def __init__(
+        self,
+        *,
+        session_factory,
+        llm_service,
+        history_cache,
+        every_n_messages: int = 10,
+        max_batch_messages: int = 200,
+        keep_recent_messages: int = 50,
+        max_summary_words: int = 250,
+        model: Optional[str] = None,
+        enabled: bool = True,
+    ) -> None:
+        self.session_factory = session_factory
+        self.llm = llm_service
+        self.cache = history_cache
+        self.every_n_messages = every_n_messages
+        self.max_batch_messages = max_batch_messages
+        self.keep_recent_messages = keep_recent_messages
+        self.max_summary_words = max_summary_words
+        self.model = model
+        self.enabled = enabled
+
+        self._pending: Dict[int, int] = {}
+        self._running: Set[int] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    # ──────────────────────────────────────────────────────────────
+    # public api
+    # ──────────────────────────────────────────────────────────────
+    def note_messages(self, chat_id: int, count: int = 2) -> None:
+        """
+        Record *count* newly committed messages; schedule an update when due.
+
+        Must be called from the event loop.  At most one update per chat runs
+        at a time; messages arriving meanwhile are counted toward the next.
+        """
+        if not self.enabled:
+            return
+        pending = self._pending.get(chat_id, 0) + count
+        self._pending[chat_id] = pending
+        if pending < self.every_n_messages or chat_id in self._running:
+            return
+
+        self._pending[chat_id] = 0
+        self._running.add(chat_id)
+        task = asyncio.get_running_loop().create_task(self._update(chat_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def forget(self, chat_id: int) -> None:
+        """Drop the pending count of a deleted chat."""
+        self._pending.pop(chat_id, None)
+
+    async def aclose(self) -> None:
+        """Cancel in-flight updates (app shutdown)."""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    # ──────────────────────────────────────────────────────────────
+    # internals
+    # ──────────────────────────────────────────────────────────────
+    async def _update(self, chat_id: int) -> None:
+        request_timing.detach()     # runs after the response; don't bill the request that triggered it
+        try:
+            batch = await run_in_threadpool(self._load_batch, chat_id)
+            if batch is None:
+                return
+
+            result = await self.llm.summarize_conversation_async(
+                batch["summary"],
+                batch["transcript"],
+                max_words=self.max_summary_words,
+                model=self.model,
+            )
+            if not getattr(result, "success", False) or not result.content:
+                logger.warning("Summary update failed for chat %s: %s", chat_id, getattr(result, "error_message", None))
+                return
+
+            summary = str(result.content).strip()
+            await run_in_threadpool(self._store, chat_id, summary, batch["through_id"], batch["count"])
+            self.cache.set_summary(chat_id, summary)
+            logger.debug("Summary updated for chat %s (+%d messages)", chat_id, batch["count"])
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.error("Summary update crashed for chat %s: %s", chat_id, exc, exc_info=True)
+        finally:
+            self._running.discard(chat_id)
+
+    def _load_batch(self, chat_id: int) -> Optional[Dict[str, Any]]:
+        session = self.session_factory()
+        try:
+            row = ChatSummaryRepository(session).get_summary(chat_id)
+            through_id = row.through_message_id if row is not None else 0
+            messages = MessageRepository(session).fetch_after_id(
+                chat_id=chat_id, after_id=through_id, limit=self.max_batch_messages,
+                keep_recent=self.keep_recent_messages,
+            )
+            if not messages:
+                return None
+            return {
+                "summary": row.summary if row is not None else "",
+                "transcript": "\n".join(
+                    ChatBackend.format_message_line(m.user_type or "", m.user_name or "", m.message)
+                    for m in messages
+                ),
+                "through_id": messages[-1].id,
+                "count": len(messages),
+            }
+        finally:
+            session.close()
+
+    def _store(self, chat_id: int, summary: str, through_id: int, count: int) -> None:
+        session = self.session_factory()
+        try:
+            if ChatRepository(session).get_chat_by_id(chat_id) is None:
+                return      # deleted while the LLM was running
+            ChatSummaryRepository(session).upsert_summary(
+                chat_id=chat_id, summary=summary, through_message_id=through_id, added_messages=count
+            )
+        finally:
+            session.close()
@@ -0,0 +1,210 @@
+# impl/fake_llm.py
+"""Deterministic local LLM stand-in for load tests and offline benchmarks.
+
+Selected with ``LLM_BACKEND=fake`` (``config.llm.backend``).  `MyLLMService`
+then answers every generation – chat replies, streamed replies, summaries,
+affirmations – from `FakeLLMBackend` instead of a provider, still going
+through the shared rate limiter so saturation behaves like production.
+
+* Content is a pure function of (model, prompt): the same request always gets
+  the same text, or the same JSON for ``output_type="json"``.
+* Latency = time-to-first-token (drawn from a configurable distribution) +
+  output tokens / ``tokens_per_second``; streaming paces the deltas at that rate.
+* ``error_rate`` injects failed generations, ``tail_rate`` / ``tail_multiplier``
+  inject slow outliers (useful to exercise hedging and deadlines).
+
+The latency / error draws come from one RNG seeded with ``seed``, so a run
+with the same request sequence is reproducible.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from llmservice import GenerationRequest, GenerationResult
+
+from impl.token_counter import count_tokens
+
+_WORDS = (
+    "you are capable of real change and every small step matters today focus on one "
+    "clear action breathe notice progress celebrate effort trust the process keep going "
+    "growth takes patience your mindset shapes what you see let us plan the next move"
+).split()
+
+
+class FakeLLMBackend:
+    """
+    Parameters
+    ----------
+    seed : int
+        Seed for latency and error draws.
+    ttft_ms : dict
+        Time-to-first-token distribution, one of
+        ``{"distribution": "fixed", "value": ...}``,
+        ``{"distribution": "uniform", "low": ..., "high": ...}``,
+        ``{"distribution": "normal", "mean": ..., "std": ...}``,
+        ``{"distribution": "lognormal", "median": ..., "sigma": ...}``.
+    tokens_per_second : float
+        Output rate; also paces streamed deltas.
+    reply_tokens : tuple[int, int]
+        Min / max length of a text reply in tokens (words).
+    error_rate : float
+        Probability that a generation fails.
+    tail_rate, tail_multiplier : float
+        Probability that a call is a slow outlier, and by how much its
+        time-to-first-token is multiplied.
+    """
+
+    def __init__(
+        self,
+        *,
+        seed: int = 0,
+        ttft_ms: Optional[Dict[str, Any]] = None,
+        tokens_per_second: float = 80.0,
+        reply_tokens: Tuple[int, int] = (40, 120),
+        error_rate: float = 0.0,
+        tail_rate: float = 0.0,
+        tail_multiplier: float = 5.0,
+    ) -> None:
+        self.ttft_ms = ttft_ms or {"distribution": "lognormal", "median": 400, "sigma": 0.4}
+        self.tokens_per_second = tokens_per_second
+        self.reply_tokens = (int(reply_tokens[0]), int(reply_tokens[1]))
+        self.error_rate = error_rate
+        self.tail_rate = tail_rate
+        self.tail_multiplier = tail_multiplier
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()       # sync calls draw from worker threads
+        self.calls = 0
+        self.errors = 0
+
+    # ──────────────────────────────────────────────────────────────
+    # public api (used by MyLLMService)
+    # ──────────────────────────────────────────────────────────────
+    def generate(self, request: GenerationRequest) -> GenerationResult:
+        plan = self._plan(request)
+        time.sleep(plan["total_s"])
+        return self._result(request, plan)
+
+    async def generate_async(self, request: GenerationRequest) -> GenerationResult:
+        plan = self._plan(request)
+        await asyncio.sleep(plan["total_s"])
+        return self._result(request, plan)
+
+    async def stream(self, request: GenerationRequest, usage_out: Optional[dict] = None) -> AsyncIterator[str]:
+        plan = self._plan(request)
+        await asyncio.sleep(plan["ttft_s"])
+        if plan["error"]:
+            raise RuntimeError("fake LLM: injected error")
+        per_token = 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        for i, word in enumerate(plan["tokens"]):
+            if i:
+                await asyncio.sleep(per_token)
+            yield word if i == 0 else " " + word
+        if usage_out is not None:
+            usage_out.update(self._usage(plan))
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "errors": self.errors}
+
+    # ──────────────────────────────────────────────────────────────
+    # internals
+    # ──────────────────────────────────────────────────────────────
+    @staticmethod
+    def _prompt_of(request: GenerationRequest) -> str:
+        return "\n".join(
+            filter(None, (getattr(request, f, None) for f in ("system_prompt", "user_prompt", "formatted_prompt")))
+        )
+
+    def _plan(self, request: GenerationRequest) -> Dict[str, Any]:
+        prompt = self._prompt_of(request)
+        content_rng = random.Random(hashlib.sha256(f"{request.model}\n{prompt}".encode("utf-8")).digest())
+
+        if request.output_type == "json":
+            content = self._json_content(prompt, content_rng)
+            tokens = content.split()
+        else:
+            n = content_rng.randint(*self.reply_tokens)
+            tokens = [content_rng.choice(_WORDS) for _ in range(n)]
+            content = " ".join(tokens)
+
+        with self._lock:
+            self.calls += 1
+            ttft = self._draw_ms(self.ttft_ms) / 1000.0
+            if self._rng.random() < self.tail_rate:
+                ttft *= self.tail_multiplier
+            error = self._rng.random() < self.error_rate
+            if error:
+                self.errors += 1
+
+        gen_s = len(tokens) / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        return {
+            "prompt": prompt,
+            "content": content,
+            "tokens": tokens,
+            "ttft_s": ttft,
+            "total_s": ttft if error else ttft + gen_s,
+            "error": error,
+        }
+
+    def _draw_ms(self, spec: Dict[str, Any]) -> float:
+        kind = spec.get("distribution", "fixed")
+        if kind == "fixed":
+            value = spec.get("value", 0)
+        elif kind == "uniform":
+            value = self._rng.uniform(spec["low"], spec["high"])
+        elif kind == "normal":
+            value = self._rng.gauss(spec["mean"], spec["std"])
+        elif kind == "lognormal":
+            value = spec["median"] * self._rng.lognormvariate(0.0, spec["sigma"])
+        else:
+            raise ValueError(f"unknown latency distribution: {kind}")
+        return max(0.0, float(value))
+
+    @staticmethod
+    def _json_content(prompt: str, rng: random.Random) -> str:
+        # the only JSON operation is affirmation generation: "Generate {count} ..."
+        match = re.search(r"Generate (\d+)", prompt)
+        count = int(match.group(1)) if match else 5
+        items: List[Dict[str, str]] = [
+            {"content": "I " + " ".join(rng.choice(_WORDS) for _ in range(rng.randint(4, 9)))}
+            for _ in range(count)
+        ]
+        return json.dumps(items)
+
+    @staticmethod
+    def _usage(plan: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "input_tokens": count_tokens(plan["prompt"]),
+            "output_tokens": len(plan["tokens"]),
+            "cached_tokens": 0,
+            "cache_hit_ratio": 0.0,
+            "total_cost": 0.0,
+        }
+
+    def _result(self, request: GenerationRequest, plan: Dict[str, Any]) -> GenerationResult:
+        if plan["error"]:
+            return GenerationResult(
+                success=False,
+                trace_id="fake",
+                error_message="fake LLM: injected error",
+                model=request.model,
+                operation_name=request.operation_name,
+                usage={},
+            )
+        return GenerationResult(
+            success=True,
+            trace_id="fake",
+            content=plan["content"],
+            raw_content=plan["content"],
+            model=request.model,
+            operation_name=request.operation_name,
+            usage=self._usage(plan),
+            elapsed_time=plan["total_s"],
+        )
@@ -0,0 +1,49 @@
+# impl/history_builder.py
+"""Pack as many recent turns as fit a token budget."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# (message kwargs, rendered line, token count) – oldest → newest
+HistoryCandidate = Tuple[Dict[str, Any], str, int]
+
+
+@dataclass
+class HistoryWindow:
+    messages: List[Dict[str, Any]] = field(default_factory=list)
+    text: str = ""
+    tokens: int = 0
+
+
+def build_history(
+    candidates: Sequence[HistoryCandidate],
+    *,
+    token_budget: int,
+    max_messages: Optional[int] = None,
+) -> HistoryWindow:
+    """
+    Walk *candidates* from newest to oldest and keep them while the running
+    token total stays within *token_budget*.
+
+    The newest candidate (the message being answered) is always kept, even
+    when it alone exceeds the budget.  *max_messages* optionally caps the
+    number of turns regardless of the budget.
+    """
+    kept: List[HistoryCandidate] = []
+    total = 0
+    for candidate in reversed(candidates):
+        if max_messages is not None and len(kept) >= max_messages:
+            break
+        tokens = candidate[2]
+        if kept and total + tokens > token_budget:
+            break
+        kept.append(candidate)
+        total += tokens
+
+    kept.reverse()
+    return HistoryWindow(
+        messages=[c[0] for c in kept],
+        text="\n".join(c[1] for c in kept),
+        tokens=total,
+    )
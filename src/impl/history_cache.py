@@ -0,0 +1,201 @@
+# impl/history_cache.py
+"""Process-level LRU cache of hot conversations.
+
+Each entry keeps what the message pipeline needs for the next turn:
+
+* the chat owner and settings (so the ownership check needs no query),
+* the rolling conversation summary, if one exists,
+* the most recent `window` messages as `ChatBackend.add_message` kwargs,
+* the matching pre-formatted history lines and their token counts, so the
+  prompt history can be packed to a token budget without re-tokenizing.
+
+Entries are filled from the DB on a miss, appended to after each successful
+commit and dropped when the chat is deleted.  Eviction is least-recently-used,
+bounded by both an entry count and an approximate byte budget.
+"""
+from __future__ import annotations
+
+import sys
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from impl.chatbackend import ChatBackend
+from impl.history_builder import HistoryCandidate
+from impl.token_counter import count_tokens
+
+# rough per-message bookkeeping cost on top of the text itself
+_MESSAGE_OVERHEAD_BYTES = 400
+
+
+def _message_size(message: Dict[str, Any]) -> int:
+    return (
+        _MESSAGE_OVERHEAD_BYTES
+        + sys.getsizeof(message.get("message") or "")
+        + sys.getsizeof(message.get("user_name") or "")
+    )
+
+
+class CachedChat:
+    """Recent window of a single chat.  Mutated only through `ChatHistoryCache`."""
+
+    __slots__ = ("chat_id", "owner_id", "settings", "summary", "messages", "lines", "tokens", "size_bytes")
+
+    def __init__(
+        self, chat_id: int, owner_id: int, settings: Dict[str, Any], window: int, summary: Optional[str] = None
+    ) -> None:
+        self.chat_id = chat_id
+        self.owner_id = owner_id
+        self.settings = settings
+        self.summary = summary
+        self.messages: Deque[Dict[str, Any]] = deque(maxlen=window)
+        self.lines: Deque[str] = deque(maxlen=window)
+        self.tokens: Deque[int] = deque(maxlen=window)
+        self.size_bytes = 0
+
+    def _append(self, message: Dict[str, Any]) -> None:
+        if len(self.messages) == self.messages.maxlen:
+            self.size_bytes -= _message_size(self.messages[0])
+        line = ChatBackend.format_message_line(message["user_type"], message["user_name"], message["message"])
+        self.messages.append(message)
+        self.lines.append(line)
+        self.tokens.append(count_tokens(line))
+        self.size_bytes += _message_size(message)
+
+    def last_messages(self, n: int) -> List[Dict[str, Any]]:
+        """Return the last *n* messages (oldest → newest)."""
+        if n <= 0:
+            return []
+        return list(self.messages)[-n:]
+
+    def history_text(self, n: int) -> str:
+        """Pre-formatted history block for the last *n* messages."""
+        if n <= 0:
+            return ""
+        return "\n".join(list(self.lines)[-n:])
+
+    def candidates(self) -> List[HistoryCandidate]:
+        """All cached turns as ``(message, line, tokens)`` for `build_history`."""
+        return list(zip(self.messages, self.lines, self.tokens))
+
+
+class ChatHistoryCache:
+    """
+    Bounded LRU of `CachedChat` entries keyed by ``chat_id``.
+
+    Parameters
+    ----------
+    max_chats : int
+        Max number of conversations kept.
+    max_bytes : int
+        Approximate memory cap across all entries.
+    window : int
+        Messages kept per conversation; must cover the largest history the
+        pipeline asks for.
+    """
+
+    def __init__(self, *, max_chats: int = 1000, max_bytes: int = 64 * 1024 * 1024, window: int = 20) -> None:
+        self.max_chats = max_chats
+        self.max_bytes = max_bytes
+        self.window = window
+
+        self._entries: "OrderedDict[int, CachedChat]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ──────────────────────────────────────────────────────────────
+    # public api
+    # ──────────────────────────────────────────────────────────────
+    def get(self, chat_id: int) -> Optional[CachedChat]:
+        with self._lock:
+            entry = self._entries.get(chat_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(chat_id)
+            self.hits += 1
+            return entry
+
+    def put(
+        self,
+        chat_id: int,
+        *,
+        owner_id: int,
+        settings: Dict[str, Any],
+        messages: Iterable[Dict[str, Any]],
+        summary: Optional[str] = None,
+    ) -> CachedChat:
+        """Insert (or replace) a chat loaded from the DB, oldest → newest."""
+        entry = CachedChat(chat_id, owner_id, settings, self.window, summary)
+        for message in messages:
+            entry._append(message)
+
+        with self._lock:
+            old = self._entries.pop(chat_id, None)
+            if old is not None:
+                self._bytes -= old.size_bytes
+            self._entries[chat_id] = entry
+            self._bytes += entry.size_bytes
+            self._evict()
+        return entry
+
+    def append(self, chat_id: int, message: Dict[str, Any]) -> None:
+        """Add a freshly committed message; no-op if the chat is not cached."""
+        with self._lock:
+            entry = self._entries.get(chat_id)
+            if entry is None:
+                return
+            before = entry.size_bytes
+            entry._append(message)
+            self._bytes += entry.size_bytes - before
+            self._entries.move_to_end(chat_id)
+            self._evict()
+
+    def set_summary(self, chat_id: int, summary: str) -> None:
+        """Swap in a freshly stored rolling summary; no-op if the chat is not cached."""
+        with self._lock:
+            entry = self._entries.get(chat_id)
+            if entry is None:
+                return
+            old = sys.getsizeof(entry.summary or "")
+            entry.summary = summary
+            delta = sys.getsizeof(summary) - old
+            entry.size_bytes += delta
+            self._bytes += delta
+
+    def invalidate(self, chat_id: int) -> None:
+        with self._lock:
+            entry = self._entries.pop(chat_id, None)
+            if entry is not None:
+                self._bytes -= entry.size_bytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "chats": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    # ──────────────────────────────────────────────────────────────
+    # internals
+    # ──────────────────────────────────────────────────────────────
+    def _evict(self) -> None:
+        # never evict the entry that was just touched (the last one)
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_chats or self._bytes > self.max_bytes
+        ):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size_bytes
+            self.evictions += 1
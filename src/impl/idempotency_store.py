@@ -0,0 +1,137 @@
+# impl/idempotency_store.py
+"""Short-lived idempotency store with single-flight execution.
+
+Used for ``Idempotency-Key`` on ``POST /chat/{chat_id}/messages``:
+
+* first request with a key  → runs the work, keeps the result for `ttl_seconds`
+* retry while it is running → awaits the same result (no second LLM call)
+* retry after it finished   → gets the stored result back
+* same key, different body  → `IdempotencyKeyConflict`
+
+The work runs in its own task, so a client that disconnects mid-request does
+not cancel a turn other retries are waiting on.  Failures are not stored: the
+waiters see the error and the next retry runs the work again.
+
+State is per process; with several workers a retry that lands on another
+worker is simply executed again.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class IdempotencyKeyConflict(Exception):
+    """The key was already used with a different request payload."""
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "task", "expires_at")
+
+    def __init__(self, fingerprint: str, task: "asyncio.Task", expires_at: float) -> None:
+        self.fingerprint = fingerprint
+        self.task = task
+        self.expires_at = expires_at
+
+
+class IdempotencyStore:
+    """
+    Parameters
+    ----------
+    ttl_seconds : float
+        How long a finished response is replayed for a retried key.
+    max_entries : int
+        Upper bound on remembered keys; the oldest finished ones go first.
+    """
+
+    def __init__(self, *, ttl_seconds: float = 600.0, max_entries: int = 10000) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._next_purge = 0.0
+
+        self.executed = 0
+        self.joined = 0       # retries attached to an in-flight request
+        self.replayed = 0     # retries served from a stored response
+
+    @staticmethod
+    def fingerprint(payload: Any) -> str:
+        """Stable hash of a JSON-serialisable request payload."""
+        raw = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def run(
+        self,
+        key: Hashable,
+        fingerprint: str,
+        work: Callable[[], Awaitable[Any]],
+    ) -> Tuple[Any, bool]:
+        """
+        Run *work* once per *key*; return ``(result, replayed)``.
+
+        Must be called from the event loop (all bookkeeping happens between
+        awaits, so no lock is needed).
+        """
+        now = time.monotonic()
+        self._purge(now)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry.task.done() and entry.expires_at <= now:
+            del self._entries[key]
+            entry = None
+        if entry is not None:
+            if entry.fingerprint != fingerprint:
+                raise IdempotencyKeyConflict(str(key))
+            if entry.task.done():
+                self.replayed += 1
+            else:
+                self.joined += 1
+            return await asyncio.shield(entry.task), True
+
+        task = asyncio.get_running_loop().create_task(work())
+        self._entries[key] = _Entry(fingerprint, task, now + self.ttl_seconds)
+        task.add_done_callback(lambda t, k=key: self._on_done(k, t))
+        self.executed += 1
+        return await asyncio.shield(task), False
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "keys": len(self._entries),
+            "in_flight": sum(1 for e in self._entries.values() if not e.task.done()),
+            "executed": self.executed,
+            "joined": self.joined,
+            "replayed": self.replayed,
+        }
+
+    # ──────────────────────────────────────────────────────────────
+    # internals
+    # ──────────────────────────────────────────────────────────────
+    def _on_done(self, key: Hashable, task: "asyncio.Task") -> None:
+        entry = self._entries.get(key)
+        if entry is None or entry.task is not task:
+            return
+        if task.cancelled() or task.exception() is not None:
+            # don't pin failures: the next retry should try again
+            del self._entries[key]
+            return
+        # the TTL counts from completion, not from the first attempt
+        entry.expires_at = time.monotonic() + self.ttl_seconds
+
+    def _purge(self, now: float) -> None:
+        # full scans at most once a second, or when over the size bound
+        if now < self._next_purge and len(self._entries) <= self.max_entries:
+            return
+        self._next_purge = now + 1.0
+        expired = [k for k, e in self._entries.items() if e.task.done() and e.expires_at <= now]
+        for k in expired:
+            del self._entries[k]
+        if len(self._entries) <= self.max_entries:
+            return
+        for k in [k for k, e in self._entries.items() if e.task.done()]:
+            if len(self._entries) <= self.max_entries:
+                break
+            del self._entries[k]
@@ -0,0 +1,63 @@
+# impl/message_cursor.py
+"""Opaque keyset cursors for message history pages.
+
+A cursor names a position in a chat's ``(timestamp, id)`` order and the
+direction to read from it:
+
+* ``after``  – the next page of newer messages (strictly after the position)
+* ``before`` – the previous page of older messages (strictly before it)
+
+Polling with an ``after`` cursor relies on live rows being written in
+``(timestamp, id)`` order: every row of a message turn is stamped when the
+turn is written, and turns of a chat are written one at a time (see
+`ProcessNewMessageService._persist_turn`), so nothing committed later can
+sort before a cursor already handed out.  Bulk imports are the exception –
+they backfill history at the timestamps they carry and are not reported to
+a poller.
+
+The token is URL-safe base64 of a small JSON object.  It is not signed: it
+only says where to seek, and every read is still scoped to the caller's
+own chat, so a forged cursor can do no more than start a page elsewhere.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+
+AFTER = "after"
+BEFORE = "before"
+DIRECTIONS = (AFTER, BEFORE)
+
+
+@dataclass(frozen=True)
+class MessageCursor:
+    timestamp: datetime
+    message_id: int
+    direction: str = AFTER
+
+    def encode(self) -> str:
+        raw = json.dumps(
+            {"t": self.timestamp.isoformat(), "i": self.message_id, "d": self.direction},
+            separators=(",", ":"),
+        )
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> "MessageCursor":
+        """Parse a token from `encode`; `ValueError` if it is malformed."""
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            data = json.loads(raw)
+            cursor = cls(
+                timestamp=datetime.fromisoformat(data["t"]),
+                message_id=int(data["i"]),
+                direction=data["d"],
+            )
+        except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError) as exc:
+            raise ValueError("malformed cursor") from exc
+        if cursor.direction not in DIRECTIONS:
+            raise ValueError("malformed cursor")
+        return cursor
@@ -0,0 +1,70 @@
+# impl/model_catalog.py
+"""Model names, their prompt/latency budgets and fallbacks, read from assets/model_info.yaml."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+
+@dataclass(frozen=True)
+class ModelBudget:
+    name: str
+    context_window: int
+    history_token_budget: int
+    latency_budget_ms: int
+    fallbacks: Tuple[str, ...] = ()     # tried in order when this model is slow or failing
+
+
+class ModelCatalog:
+    """
+    Lookup of `ModelBudget` by model name.
+
+    Models missing a budget field inherit it from the default model, so a new
+    entry in the YAML only needs the fields it wants to change.
+    """
+
+    # used when neither the model nor the default model sets a field
+    FALLBACK = {"context_window": 128000, "history_token_budget": 2000, "latency_budget_ms": 8000}
+
+    def __init__(
+        self, models: Dict[str, dict], default_model: str, routing: Optional[Dict[str, Any]] = None
+    ) -> None:
+        self.default_model = default_model
+        self.routing: Dict[str, Any] = routing or {}   # raw ``routing:`` section, see ModelRouter
+        base = {**self.FALLBACK, **{k: v for k, v in (models.get(default_model) or {}).items() if k in self.FALLBACK}}
+        self._budgets: Dict[str, ModelBudget] = {
+            name: ModelBudget(
+                name=name,
+                **{field: int((info or {}).get(field, base[field])) for field in self.FALLBACK},
+                fallbacks=tuple((info or {}).get("fallbacks") or ()),
+            )
+            for name, info in models.items()
+        }
+
+    @classmethod
+    def from_yaml(cls, path: str) -> "ModelCatalog":
+        with open(path, "r") as file:
+            data = yaml.safe_load(file) or {}
+        models = data.get("models", {}) or {}
+        default_model = (data.get("defaults", {}) or {}).get("default_model") or next(iter(models), "gpt-4o-mini")
+        return cls(models, default_model, data.get("routing"))
+
+    @property
+    def model_names(self) -> List[str]:
+        return list(self._budgets)
+
+    def get(self, model_name: Optional[str] = None) -> ModelBudget:
+        """
+        Budget for *model_name* (default model when ``None``).
+
+        Raises
+        ------
+        KeyError
+            If the model is not listed in the catalog.
+        """
+        name = model_name or self.default_model
+        if name not in self._budgets:
+            raise KeyError(name)
+        return self._budgets[name]
@@ -0,0 +1,392 @@
+# impl/model_router.py
+"""Latency-SLO routing for LLM calls: deadline, hedging and fallback.
+
+`ModelRouter.run` takes the requested model and a coroutine factory
+``call(model_name) -> GenerationResult`` and
+
+1. starts the call on the requested model,
+2. if it has not answered after the model's observed p95 (or a static
+   ``hedge_after_ms`` until enough samples exist), starts a hedged call on
+   the next model of its ``fallbacks`` list,
+3. when a call fails, immediately moves on down the list,
+4. returns the first successful result and cancels the calls still running,
+5. gives up at the model's ``latency_budget_ms`` deadline.
+
+`ModelRouter.stream` applies the same deadline and fallback order to a
+streamed reply: a model that fails or stays silent before its first chunk
+is replaced by the next one, and the whole stream must finish within the
+budget.  Streams are not hedged, and once a chunk has been yielded there is
+no fallback – the client already has part of the reply.
+
+The policy lives in the ``routing:`` section of assets/model_info.yaml and
+the fallback order in each model's ``fallbacks:`` list.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional
+
+from llmservice import GenerationResult
+
+from impl.model_catalog import ModelCatalog
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RoutingPolicy:
+    hedge: bool = True
+    hedge_after_ms: int = 2500          # hedge delay until a percentile is available
+    hedge_percentile: float = 0.95
+    min_samples: int = 20               # latencies needed before the percentile is trusted
+    max_attempts: int = 3               # primary + hedges/fallbacks per call
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "RoutingPolicy":
+        data = data or {}
+        return cls(**{k: data[k] for k in cls.__dataclass_fields__ if k in data})
+
+
+class LatencyTracker:
+    """Sliding window of successful call latencies per model."""
+
+    def __init__(self, window: int = 200) -> None:
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, model: str, latency_ms: float) -> None:
+        samples = self._samples.get(model)
+        if samples is None:
+            samples = self._samples[model] = deque(maxlen=self.window)
+        samples.append(latency_ms)
+
+    def percentile(self, model: str, q: float, min_samples: int) -> Optional[float]:
+        samples = self._samples.get(model)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {
+            model: {"samples": len(s), "p50_ms": self.percentile(model, 0.5, 1), "p95_ms": self.percentile(model, 0.95, 1)}
+            for model, s in self._samples.items()
+        }
+
+
+class ModelRouter:
+    """
+    Parameters
+    ----------
+    catalog : ModelCatalog
+        Supplies the per-model deadline (``latency_budget_ms``) and fallbacks.
+    policy : RoutingPolicy
+        Hedging knobs.
+    """
+
+    def __init__(self, catalog: ModelCatalog, policy: Optional[RoutingPolicy] = None) -> None:
+        self.catalog = catalog
+        self.policy = policy or RoutingPolicy()
+        self.latency = LatencyTracker()
+        self.first_chunk_latency = LatencyTracker()     # streams: time to the first chunk
+
+        self.hedges_started = 0
+        self.hedges_skipped = 0
+        self.hedge_wins = 0
+        self.fallbacks_used = 0
+        self.deadline_misses = 0
+
+    @classmethod
+    def from_catalog(cls, catalog: ModelCatalog) -> "ModelRouter":
+        return cls(catalog, RoutingPolicy.from_dict(catalog.routing))
+
+    # ──────────────────────────────────────────────────────────────
+    # public api
+    # ──────────────────────────────────────────────────────────────
+    async def run(
+        self,
+        model_name: Optional[str],
+        call: Callable[[str], Awaitable[GenerationResult]],
+        *,
+        deadline_ms: Optional[float] = None,
+        can_hedge_now: Optional[Callable[[], bool]] = None,
+    ) -> GenerationResult:
+        """
+        Route one generation; see the module docstring for the policy.
+
+        *can_hedge_now* is consulted before starting a hedge; returning ``False``
+        (e.g. the rate limiter already has a queue) skips it, since a hedge
+        would only add load to the same bottleneck.
+
+        The returned result's ``usage["routing"]`` records the winning model,
+        whether it was a hedge and how many attempts were started.
+        """
+        budget = self.catalog.get(model_name)
+        candidates = self._candidates(budget.name)
+        deadline_s = (deadline_ms or budget.latency_budget_ms) / 1000.0
+        started_at = time.monotonic()
+        loop = asyncio.get_running_loop()
+
+        running: Dict[asyncio.Task, str] = {}
+        next_idx = 0
+        hedge_task: Optional[asyncio.Task] = None
+        hedge_at = self._hedge_delay_s(candidates[0]) if self.policy.hedge else None
+        last_failure: Optional[GenerationResult] = None
+        losers: List[GenerationResult] = []     # finished calls that are not the returned one
+        outcome: Optional[GenerationResult] = None
+
+        def launch() -> asyncio.Task:
+            nonlocal next_idx
+            model = candidates[next_idx]
+            next_idx += 1
+            task = loop.create_task(self._timed(model, call))
+            running[task] = model
+            return task
+
+        launch()
+        try:
+            while True:
+                elapsed = time.monotonic() - started_at
+                remaining = deadline_s - elapsed
+                if remaining <= 0:
+                    self.deadline_misses += 1
+                    logger.warning("LLM deadline of %.0f ms exceeded (models tried: %s)",
+                                   deadline_s * 1000, candidates[:next_idx])
+                    outcome = self._failure(
+                        f"deadline of {deadline_s * 1000:.0f} ms exceeded",
+                        last_failure, candidates[:next_idx], hedged=hedge_task is not None,
+                    )
+                    return outcome
+
+                # one hedge per call, only while the primary is the sole call in flight
+                can_hedge = (
+                    hedge_at is not None and hedge_task is None
+                    and len(running) == 1 and next_idx < len(candidates)
+                )
+                timeout = min(remaining, max(0.0, hedge_at - elapsed)) if can_hedge else remaining
+
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    if can_hedge and time.monotonic() - started_at >= hedge_at:
+                        if can_hedge_now is not None and not can_hedge_now():
+                            self.hedges_skipped += 1
+                            hedge_at = None
+                            continue
+                        self.hedges_started += 1
+                        logger.debug("hedging %s with %s", candidates[0], candidates[next_idx])
+                        hedge_task = launch()
+                    continue
+
+                for task in done:
+                    model = running.pop(task)
+                    result = self._result_of(task)
+                    if result is None:
+                        continue
+                    if outcome is None and getattr(result, "success", False):
+                        if task is hedge_task:
+                            self.hedge_wins += 1
+                        self._annotate(result, model, hedged=hedge_task is not None, attempts=next_idx)
+                        outcome = result
+                        continue
+                    losers.append(result)
+                    if not getattr(result, "success", False):
+                        last_failure = result
+                        logger.warning("LLM call on %s failed: %s", model, getattr(result, "error_message", None))
+                if outcome is not None:
+                    return outcome
+
+                if not running:
+                    if next_idx >= len(candidates):
+                        outcome = self._failure("all models failed", last_failure, candidates[:next_idx],
+                                                hedged=hedge_task is not None)
+                        return outcome
+                    self.fallbacks_used += 1
+                    launch()
+        finally:
+            # settle the calls still in flight, so none is left pending or
+            # with an unretrieved exception; one may finish before the cancel lands
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+                losers.extend(r for r in map(self._result_of, running) if r is not None)
+            if outcome is not None:
+                self._charge_losers(outcome, losers)
+
+    async def stream(
+        self,
+        model_name: Optional[str],
+        open_stream: Callable[[str], AsyncIterator[str]],
+        *,
+        deadline_ms: Optional[float] = None,
+        routing_out: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Yield the chunks of ``open_stream(model)`` for the first model of the
+        fallback chain that produces one; see the module docstring.  Every
+        model but the last must send its first chunk within its observed
+        time-to-first-chunk percentile (``hedge_percentile`` of
+        `first_chunk_latency`; ``hedge_after_ms`` until ``min_samples``
+        streams have been seen).
+
+        *routing_out* receives ``{"model", "hedged", "attempts"}`` like
+        ``usage["routing"]`` of `run`.
+
+        Raises
+        ------
+        asyncio.TimeoutError
+            The deadline passed, before or after the first chunk.
+        Exception
+            The last model's error when every model failed before its first chunk.
+        """
+        budget = self.catalog.get(model_name)
+        candidates = self._candidates(budget.name)
+        deadline_s = (deadline_ms or budget.latency_budget_ms) / 1000.0
+        started_at = time.monotonic()
+        last_error: Optional[BaseException] = None
+        tried: List[str] = []
+
+        for attempt, model in enumerate(candidates, start=1):
+            remaining = deadline_s - (time.monotonic() - started_at)
+            if remaining <= 0:
+                break
+            if attempt > 1:
+                self.fallbacks_used += 1
+            # a model silent past its usual time to first chunk is given up,
+            # leaving the rest of the budget to the next one
+            first_chunk_s = remaining if attempt == len(candidates) else min(remaining, self._first_chunk_timeout_s(model))
+            tried.append(model)
+            chunks = open_stream(model)
+            opened_at = time.monotonic()
+            try:
+                first = await asyncio.wait_for(chunks.__anext__(), first_chunk_s)
+            except StopAsyncIteration:
+                first = None
+            except Exception as exc:        # incl. the first-chunk timeout
+                await chunks.aclose()
+                last_error = exc
+                logger.warning("LLM stream on %s failed before its first chunk: %r", model, exc)
+                continue
+
+            if first is not None:
+                self.first_chunk_latency.record(model, (time.monotonic() - opened_at) * 1000)
+            if routing_out is not None:
+                routing_out.update({"model": model, "hedged": False, "attempts": attempt})
+            try:
+                if first is None:
+                    return
+                yield first
+                while True:
+                    remaining = deadline_s - (time.monotonic() - started_at)
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), max(0.0, remaining))
+                    except StopAsyncIteration:
+                        return
+                    except asyncio.TimeoutError:
+                        self.deadline_misses += 1
+                        logger.warning("LLM stream deadline of %.0f ms exceeded on %s", deadline_s * 1000, model)
+                        raise
+                    yield chunk
+            finally:
+                await chunks.aclose()
+
+        if last_error is None or isinstance(last_error, asyncio.TimeoutError):
+            self.deadline_misses += 1
+            logger.warning("LLM stream deadline of %.0f ms exceeded (models tried: %s)",
+                           deadline_s * 1000, tried)
+            raise asyncio.TimeoutError(f"deadline of {deadline_s * 1000:.0f} ms exceeded before the first chunk")
+        raise last_error
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hedges_started": self.hedges_started,
+            "hedges_skipped": self.hedges_skipped,
+            "hedge_wins": self.hedge_wins,
+            "fallbacks_used": self.fallbacks_used,
+            "deadline_misses": self.deadline_misses,
+            "latency": self.latency.snapshot(),
+            "first_chunk_latency": self.first_chunk_latency.snapshot(),
+        }
+
+    # ──────────────────────────────────────────────────────────────
+    # internals
+    # ──────────────────────────────────────────────────────────────
+    def _candidates(self, model: str) -> List[str]:
+        chain = [model]
+        for name in self.catalog.get(model).fallbacks:
+            if name not in chain and name in self.catalog.model_names:
+                chain.append(name)
+        return chain[: max(1, self.policy.max_attempts)]
+
+    def _hedge_delay_s(self, model: str) -> float:
+        p = self.latency.percentile(model, self.policy.hedge_percentile, self.policy.min_samples)
+        return (p if p is not None else self.policy.hedge_after_ms) / 1000.0
+
+    def _first_chunk_timeout_s(self, model: str) -> float:
+        p = self.first_chunk_latency.percentile(model, self.policy.hedge_percentile, self.policy.min_samples)
+        return (p if p is not None else self.policy.hedge_after_ms) / 1000.0
+
+    async def _timed(self, model: str, call: Callable[[str], Awaitable[GenerationResult]]) -> GenerationResult:
+        t0 = time.monotonic()
+        result = await call(model)
+        if getattr(result, "success", False):
+            self.latency.record(model, (time.monotonic() - t0) * 1000)
+        return result
+
+    @staticmethod
+    def _result_of(task: asyncio.Task) -> Optional[GenerationResult]:
+        if task.cancelled():
+            return None
+        exc = task.exception()
+        if exc is not None:
+            logger.error("LLM call raised: %s", exc, exc_info=exc)
+            return None
+        return task.result()
+
+    @staticmethod
+    def _charge_losers(outcome: GenerationResult, losers: List[GenerationResult]) -> None:
+        """
+        Add the tokens and cost of the calls that lost (failed attempts, a
+        slower hedge that still finished) to *outcome*'s usage, so the usage
+        rollup bills every completed call, not just the returned one.
+        ``usage["routing"]["losers"]`` keeps their share separately.
+        Cancelled calls report no usage and cannot be billed.
+        """
+        spent = {"calls": 0, "input_tokens": 0, "output_tokens": 0, "total_cost": 0.0}
+        for result in losers:
+            usage = getattr(result, "usage", None) or {}
+            spent["calls"] += 1
+            spent["input_tokens"] += int(usage.get("input_tokens") or 0)
+            spent["output_tokens"] += int(usage.get("output_tokens") or 0)
+            spent["total_cost"] += float(usage.get("total_cost") or 0.0)
+        if not spent["calls"]:
+            return
+        if outcome.usage is None:
+            outcome.usage = {}
+        for key in ("input_tokens", "output_tokens", "total_cost"):
+            outcome.usage[key] = (outcome.usage.get(key) or 0) + spent[key]
+        outcome.usage.setdefault("routing", {})["losers"] = spent
+
+    @staticmethod
+    def _annotate(result: GenerationResult, model: str, *, hedged: bool, attempts: int) -> None:
+        if result.usage is None:
+            result.usage = {}
+        result.usage["routing"] = {"model": model, "hedged": hedged, "attempts": attempts}
+
+    def _failure(
+        self, reason: str, last: Optional[GenerationResult], tried: List[str], *, hedged: bool = False
+    ) -> GenerationResult:
+        detail = getattr(last, "error_message", None)
+        result = GenerationResult(
+            success=False,
+            trace_id="router",
+            error_message=f"{reason}: {detail}" if detail else reason,
+            model=tried[0] if tried else None,
+        )
+        self._annotate(result, tried[-1] if tried else "", hedged=hedged, attempts=len(tried))
+        return result
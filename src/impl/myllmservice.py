@@ -4,40 +4,190 @@ import logging
 
 # logger = logging.getLogger(__name__)
 import asyncio
+import threading
+from contextlib import contextmanager
 from llmservice import BaseLLMService, GenerationRequest, GenerationResult
-from typing import Optional, Union
+from llmservice import base_service as _base_service
+from llmservice.generation_engine import GenerationEngine
+from llmservice.llm_handler import LLMHandler
+from llmservice.providers.new_openai_provider import ResponsesAPIProvider
+from typing import AsyncIterator, Optional, Union
+import httpx
+from openai import AsyncOpenAI, OpenAI
 from . import prompts
+from .rate_limiter import TokenBucketLimiter
+from . import request_timing
+
+
+class _KeyedResponsesAPIProvider(ResponsesAPIProvider):
+    """`ResponsesAPIProvider` whose clients get an explicit key instead of ``OPENAI_API_KEY``."""
+
+    def __init__(self, model_name: str, logger=None, *, api_key: str):
+        self._api_key = api_key
+        super().__init__(model_name, logger)
+
+    def _initialize_client(self) -> OpenAI:
+        return OpenAI(api_key=self._api_key)
+
+    def _initialize_async_client(self) -> AsyncOpenAI:
+        return AsyncOpenAI(api_key=self._api_key)
+
+
+class _KeyedLLMHandler(LLMHandler):
+    """`LLMHandler` building `_KeyedResponsesAPIProvider`s (also on model switches)."""
+
+    def __init__(self, model_name: str, logger=None, *, api_key: str):
+        self.model_name = model_name
+        self.logger = logger or logging.getLogger(__name__)
+        self.max_retries = 2
+        self._api_key = api_key
+        self.provider = _KeyedResponsesAPIProvider(model_name, self.logger, api_key=api_key)
+
+    def change_model(self, model_name: str) -> None:
+        if model_name == self.model_name:
+            return
+        self.model_name = model_name
+        self.provider = _KeyedResponsesAPIProvider(model_name, self.logger, api_key=self._api_key)
+
+
+_engine_lock = threading.Lock()
+
+
+@contextmanager
+def _base_engine(api_key: Optional[str]):
+    """
+    Have `BaseLLMService.__init__` build its engine on a keyed handler.
+
+    llmservice builds its provider eagerly and reads the key from the
+    environment only; with *api_key* the engine it constructs is a keyed one
+    instead.  The swap lasts for the (synchronous) constructor call only.
+    """
+    if api_key is None:
+        yield
+        return
+    with _engine_lock:
+        default = _base_service.GenerationEngine
+        _base_service.GenerationEngine = lambda model_name=None, **kwargs: GenerationEngine(
+            llm_handler=_KeyedLLMHandler(model_name, api_key=api_key), **kwargs,
+        )
+        try:
+            yield
+        finally:
+            _base_service.GenerationEngine = default
 
 
 class MyLLMService(BaseLLMService):
-    def __init__(self, logger=None, max_concurrent_requests=200):
-        super().__init__(
-            logger=logging.getLogger(__name__),
-            # default_model_name="gpt-4o-mini",
-            default_model_name="gpt-4.1-nano",
-            max_rpm=500,
+    """
+    Project LLM service.
+
+    Meant to be created once per process (see `Services.llm_service`): the
+    token-bucket limiter, the keep-alive HTTP pool used for streaming and the
+    provider clients inside llmservice are then shared by every request.
+    """
+
+    def __init__(
+        self,
+        logger=None,
+        max_concurrent_requests=200,
+        max_rpm=500,
+        rate_limit_burst=None,
+        max_connections=100,
+        max_keepalive_connections=20,
+        keepalive_expiry=30.0,
+        router=None,
+        backend=None,
+        db_pools=None,
+        api_key=None,
+    ):
+        if api_key is None and backend is not None:
+            # llmservice insists on a key for its OpenAI clients; with a local
+            # backend no request ever reaches them
+            api_key = "fake-llm-backend"
+        self.api_key = api_key      # None → OPENAI_API_KEY, read by the clients
+        with _base_engine(api_key):
+            super().__init__(
+                logger=logging.getLogger(__name__),
+                # default_model_name="gpt-4o-mini",
+                default_model_name="gpt-4.1-nano",
+                max_rpm=max_rpm,
+                max_concurrent_requests=max_concurrent_requests,
+            )
+        self.limiter = TokenBucketLimiter(
+            max_rpm=max_rpm,
             max_concurrent_requests=max_concurrent_requests,
+            burst=rate_limit_burst,
+        )
+        self._http_limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
         )
-       
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._stream_client: Optional[AsyncOpenAI] = None
+        # impl.model_router.ModelRouter – deadline / hedging / fallback for answers
+        self.router = router
+        # impl.fake_llm.FakeLLMBackend (LLM_BACKEND=fake) – replaces the provider
+        self.backend = backend
+        # name → db.session.TimedQueuePool, reported next to the LLM queue
+        self.db_pools = db_pools or {}
+
+    # ------------------------------------------------------------------ #
+    # shared limiter / connection pool
+    # ------------------------------------------------------------------ #
+    def execute_generation(self, generation_request: GenerationRequest, operation_name: Optional[str] = None,
+    ) -> GenerationResult:
+        with self.limiter.slot_sync(), request_timing.span("llm"):
+            if self.backend is not None:
+                return self.backend.generate(generation_request)
+            return super().execute_generation(generation_request, operation_name)
+
+    async def execute_generation_async(self, generation_request: GenerationRequest, operation_name: Optional[str] = None,
+    ) -> GenerationResult:
+        async with self.limiter.slot():
+            with request_timing.span("llm"):
+                if self.backend is not None:
+                    return await self.backend.generate_async(generation_request)
+                return await super().execute_generation_async(generation_request, operation_name)
+
+    def get_queue_metrics(self) -> dict:
+        """Limiter queue depth / wait stats, llmservice's live RPM and TPM, routing and DB pool stats."""
+        metrics = self.limiter.snapshot()
+        metrics["rpm"] = self.get_current_rpm()
+        metrics["tpm"] = self.get_current_tpm()
+        if self.router is not None:
+            metrics["routing"] = self.router.stats()
+        if self.db_pools:
+            # in-memory SQLite engines keep a plain single-connection pool
+            metrics["db_pools"] = {
+                name: pool.snapshot() for name, pool in self.db_pools.items() if hasattr(pool, "snapshot")
+            }
+        return metrics
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client (called on app shutdown)."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+            self._stream_client = None
+
     # def filter, parse
 
 
    
 
-    def generate_ai_answer(self, chat_history: str, user_msg=None, model = None,
-    ) -> GenerationResult:
-        
-        formatted_prompt = prompts.GENERATE_AI_ANSWER_PROMPT.format(
+    def _build_ai_answer_request(self, chat_history: str, user_msg=None, model=None) -> GenerationRequest:
+        # constant system prefix first, per-turn content after it → prefix-cacheable
+        user_prompt = prompts.GENERATE_AI_ANSWER_USER_PROMPT.format(
             chat_history=chat_history,
             user_msg=user_msg
         )
-       
-        
+
         if model is None:
             model= "gpt-4o-mini"
 
-        generation_request = GenerationRequest(
-            formatted_prompt=formatted_prompt,
+        return GenerationRequest(
+            system_prompt=prompts.GENERATE_AI_ANSWER_SYSTEM_PROMPT,
+            user_prompt=user_prompt,
             model=model,
             output_type="str",
             operation_name="generate_ai_answer",
@@ -45,9 +195,188 @@ class MyLLMService(BaseLLMService):
             # request_id=request_id,
         )
 
+    def generate_ai_answer(self, chat_history: str, user_msg=None, model = None,
+    ) -> GenerationResult:
+        generation_request = self._build_ai_answer_request(chat_history, user_msg, model)
         result = self.execute_generation(generation_request)
+        self._record_cached_tokens(result)
+        return result
+
+    async def generate_ai_answer_async(self, chat_history: str, user_msg=None, model=None,
+    ) -> GenerationResult:
+        """
+        Awaitable twin of `generate_ai_answer`.
+
+        Goes through `execute_generation_async`, so the RPM/TPM gates and the
+        concurrency semaphore wait on the event loop instead of blocking it.
+        With a router configured the call gets the model's deadline, a hedged
+        request after its p95 and fallback down its ``fallbacks`` list.
+        """
+        if self.router is not None:
+            return await self.router.run(
+                model,
+                lambda routed_model: self._generate_ai_answer_once(chat_history, user_msg, routed_model),
+                can_hedge_now=self.limiter.has_capacity,
+            )
+        return await self._generate_ai_answer_once(chat_history, user_msg, model)
+
+    async def _generate_ai_answer_once(self, chat_history: str, user_msg=None, model=None,
+    ) -> GenerationResult:
+        generation_request = self._build_ai_answer_request(chat_history, user_msg, model)
+        result = await self.execute_generation_async(generation_request)
+        self._record_cached_tokens(result)
         return result
     
+    async def stream_ai_answer(self, chat_history: str, user_msg=None, model=None,
+                               usage_out: Optional[dict] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream the coach reply as text deltas while the model generates it.
+
+        llmservice only returns finished completions, so this path talks to the
+        provider's streaming chat-completions API directly.  It still shares the
+        prompt with `generate_ai_answer` and goes through the same limiter.
+        Token usage (incl. ``cached_tokens`` and the ``total_cost`` llmservice
+        would have charged) is written to *usage_out* once the provider sends
+        it with the final chunk.
+
+        With a router configured the stream gets the model's deadline and
+        falls back down its ``fallbacks`` list until the first chunk is sent
+        (see `ModelRouter.stream`); ``usage_out["routing"]`` names the model.
+        """
+        if self.router is None:
+            async for delta in self._stream_ai_answer_once(chat_history, user_msg, model, usage_out):
+                yield delta
+            return
+
+        routing: dict = {}
+        async for delta in self.router.stream(
+            model,
+            lambda routed_model: self._stream_ai_answer_once(chat_history, user_msg, routed_model, usage_out),
+            routing_out=routing,
+        ):
+            yield delta
+        if usage_out is not None:
+            usage_out["routing"] = routing
+
+    async def _stream_ai_answer_once(self, chat_history: str, user_msg=None, model=None,
+                                     usage_out: Optional[dict] = None,
+    ) -> AsyncIterator[str]:
+        generation_request = self._build_ai_answer_request(chat_history, user_msg, model)
+
+        if self.backend is not None:
+            async with self.limiter.slot():
+                with request_timing.span("llm"):
+                    async for delta in self.backend.stream(generation_request, usage_out):
+                        yield delta
+            return
+
+        async with self.limiter.slot():
+            with request_timing.span("llm"):
+                stream = await self._get_stream_client().chat.completions.create(
+                    model=generation_request.model,
+                    messages=[
+                        {"role": "system", "content": generation_request.system_prompt},
+                        {"role": "user", "content": generation_request.user_prompt},
+                    ],
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+                async for chunk in stream:
+                    if chunk.usage is not None:     # final chunk, no choices
+                        stats = self._usage_with_cache_hits(chunk.usage)
+                        stats["total_cost"] = self._usage_cost(generation_request.model, stats)
+                        self.logger.debug("stream usage: %s", stats)
+                        if usage_out is not None:
+                            usage_out.update(stats)
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        yield delta
+
+    # ------------------------------------------------------------------ #
+    # prompt-cache accounting
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def _usage_with_cache_hits(usage) -> dict:
+        """
+        Normalise a provider usage object to
+        ``{input_tokens, output_tokens, cached_tokens, cache_hit_ratio}``.
+
+        Understands both the Responses API (``input_tokens_details``) and
+        chat completions (``prompt_tokens_details``) shapes.
+        """
+        input_tokens = getattr(usage, "input_tokens", None)
+        if input_tokens is None:
+            input_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        output_tokens = getattr(usage, "output_tokens", None)
+        if output_tokens is None:
+            output_tokens = getattr(usage, "completion_tokens", 0) or 0
+        details = getattr(usage, "input_tokens_details", None) or getattr(usage, "prompt_tokens_details", None)
+        cached = (getattr(details, "cached_tokens", 0) or 0) if details is not None else 0
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cached_tokens": cached,
+            "cache_hit_ratio": round(cached / input_tokens, 4) if input_tokens else 0.0,
+        }
+
+    @staticmethod
+    def _usage_cost(model: str, stats: dict) -> float:
+        """
+        ``total_cost`` of *stats* at llmservice's per-token prices, so streamed
+        replies are costed like `execute_generation` results (unknown models
+        cost 0 there as well).
+        """
+        prices = ResponsesAPIProvider.MODEL_COSTS.get(model, {})
+        return (
+            stats["input_tokens"] * prices.get("input_token_cost", 0)
+            + stats["output_tokens"] * prices.get("output_token_cost", 0)
+        )
+
+    def _record_cached_tokens(self, result: GenerationResult) -> None:
+        """Add ``cached_tokens`` / ``cache_hit_ratio`` to ``result.usage``."""
+        usage = getattr(getattr(result, "raw_response", None), "usage", None)
+        if usage is None:
+            return
+        stats = self._usage_with_cache_hits(usage)
+        if result.usage is None:
+            result.usage = {}
+        result.usage["cached_tokens"] = stats["cached_tokens"]
+        result.usage["cache_hit_ratio"] = stats["cache_hit_ratio"]
+
+    async def summarize_conversation_async(self, previous_summary: str, new_messages: str,
+                                           max_words: int = 250, model: Optional[str] = None,
+    ) -> GenerationResult:
+        """
+        Fold *new_messages* (rendered history lines) into *previous_summary*.
+
+        Used by the background conversation summarizer, never on the request path.
+        """
+        formatted_prompt = prompts.SUMMARIZE_CONVERSATION_PROMPT.format(
+            previous_summary=previous_summary or "(none yet)",
+            new_messages=new_messages,
+            max_words=max_words,
+        )
+
+        if model is None:
+            model = "gpt-4o-mini"
+
+        generation_request = GenerationRequest(
+            user_prompt=formatted_prompt,
+            model=model,
+            output_type="str",
+            operation_name="summarize_conversation",
+        )
+        return await self.execute_generation_async(generation_request)
+
+    def _get_stream_client(self) -> AsyncOpenAI:
+        if self._stream_client is None:
+            self._http_client = httpx.AsyncClient(limits=self._http_limits)
+            self._stream_client = AsyncOpenAI(api_key=self.api_key, http_client=self._http_client)
+        return self._stream_client
+
     def generate_affirmations_with_llm(self, context: str, category: Optional[str] = None, 
                                      count: int = 5, model: Optional[str] = None) -> GenerationResult:
         """
@@ -73,7 +402,7 @@ class MyLLMService(BaseLLMService):
             model = "gpt-4o-mini"
         
         generation_request = GenerationRequest(
-            formatted_prompt=formatted_prompt,
+            user_prompt=formatted_prompt,
             model=model,
             output_type="json",
             operation_name="generate_affirmations"
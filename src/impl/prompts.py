@@ -97,6 +97,33 @@ Here is last user message:
 Now, respond as PowerManifest, staying true to your identity and coaching approach outlined above. Remember to be warm, empowering, and action-oriented in your response."""
 
 
+# Role-separated variant of GENERATE_AI_ANSWER_PROMPT.
+# The system part must stay byte-identical between calls (no formatting, no
+# per-user data) so providers can serve it from their prompt-prefix cache;
+# everything that changes per turn goes into the user part.
+GENERATE_AI_ANSWER_SYSTEM_PROMPT = f"""{POWERMANIFEST_SYSTEM_PROMPT}
+
+You will receive the chat history and the user's latest message. Respond as PowerManifest, staying true to your identity and coaching approach outlined above. Remember to be warm, empowering, and action-oriented in your response."""
+
+GENERATE_AI_ANSWER_USER_PROMPT = """Here is the chat_history:
+{chat_history}
+
+Here is last user message:
+{user_msg}"""
+
+
+
+
+
+SUMMARIZE_CONVERSATION_PROMPT = """You maintain a running summary of a coaching conversation between a user and PowerManifest, their AI life coach.
+
+Here is the current summary (may be empty):
+{previous_summary}
+
+Here are the new messages since that summary:
+{new_messages}
+
+Write an updated summary that merges the new messages into the current one. Keep the user's goals, commitments, emotional state, important personal details and any advice already given; drop small talk. Write in third person, plain prose, at most {max_words} words. Return only the summary."""
 
 
 
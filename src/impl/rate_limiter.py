@@ -0,0 +1,267 @@
+"""Process-wide token-bucket limiter for outbound LLM calls.
+
+One instance lives on the shared `MyLLMService`, so `max_rpm` and
+`max_concurrent_requests` hold for the whole worker instead of per request.
+
+Callers that cannot start right away join one FIFO queue and are granted a
+token and an in-flight slot strictly in arrival order: a `release` hands
+the freed slot to the head of the queue, and only the head sleeps – until
+the bucket has its next token.  Nobody polls.
+
+The bucket state is guarded by a plain `threading.Lock` that is never held
+across an await, which lets the same limiter gate both the async routes
+(`acquire`) and the remaining sync call sites that run in the threadpool
+(`acquire_sync`); both kinds of waiter share the queue.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Deque, Dict, Optional
+
+from impl import request_timing
+
+
+class _Waiter:
+    """A queued caller: woken through its loop (async) or a `threading.Event` (sync)."""
+
+    __slots__ = ("granted", "_loop", "_event")
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        self.granted = False
+        self._loop = loop
+        self._event = asyncio.Event() if loop is not None else threading.Event()
+
+    def wake(self) -> None:
+        if self._loop is None:
+            self._event.set()
+        else:
+            self._loop.call_soon_threadsafe(self._event.set)
+
+    async def wait(self, timeout: Optional[float]) -> None:
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._event.clear()
+
+    def wait_sync(self, timeout: Optional[float]) -> None:
+        self._event.wait(timeout)
+        self._event.clear()
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket (rate) + in-flight cap (concurrency) with queue-depth metrics.
+
+    Parameters
+    ----------
+    max_rpm : int
+        Sustained requests per minute; the bucket refills at ``max_rpm / 60``
+        tokens per second.
+    max_concurrent_requests : int
+        Max calls in flight at once.
+    burst : int | None
+        Bucket capacity.  Defaults to one second worth of tokens (min 1).
+
+    All limits must be positive.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_rpm: int,
+        max_concurrent_requests: int,
+        burst: Optional[int] = None,
+    ) -> None:
+        if max_rpm <= 0:
+            raise ValueError("max_rpm must be positive")
+        if max_concurrent_requests <= 0:
+            raise ValueError("max_concurrent_requests must be positive")
+        if burst is not None and burst <= 0:
+            raise ValueError("burst must be positive")
+        self.max_rpm = max_rpm
+        self.max_concurrent_requests = max_concurrent_requests
+        self.rate_per_sec = max_rpm / 60.0
+        self.capacity = float(burst or max(1, int(self.rate_per_sec)))
+
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._in_flight = 0
+        self._waiters: Deque[_Waiter] = deque()
+
+        # metrics
+        self._queued = 0
+        self._max_queued = 0
+        self._acquired = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    # ------------------------------------------------------------------ #
+    # public api
+    # ------------------------------------------------------------------ #
+    async def acquire(self) -> None:
+        started = self._enter_queue()
+        acquired = False
+        waiter = None
+        try:
+            with self._lock:
+                acquired = self._take_now()
+                if not acquired:
+                    waiter = _Waiter(asyncio.get_running_loop())
+                    self._waiters.append(waiter)
+                    timeout = self._dispatch(waiter)
+                    acquired = waiter.granted
+            while not acquired:
+                await waiter.wait(timeout)
+                with self._lock:
+                    timeout = self._dispatch(waiter)
+                    acquired = waiter.granted
+        except BaseException:
+            if waiter is not None and not acquired:
+                self._abandon(waiter)
+            raise
+        finally:
+            self._leave_queue(started, acquired)
+
+    def acquire_sync(self) -> None:
+        started = self._enter_queue()
+        acquired = False
+        waiter = None
+        try:
+            with self._lock:
+                acquired = self._take_now()
+                if not acquired:
+                    waiter = _Waiter()
+                    self._waiters.append(waiter)
+                    timeout = self._dispatch(waiter)
+                    acquired = waiter.granted
+            while not acquired:
+                waiter.wait_sync(timeout)
+                with self._lock:
+                    timeout = self._dispatch(waiter)
+                    acquired = waiter.granted
+        except BaseException:
+            if waiter is not None and not acquired:
+                self._abandon(waiter)
+            raise
+        finally:
+            self._leave_queue(started, acquired)
+
+    def release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self):
+        """``async with limiter.slot(): ...`` – one rate token + one in-flight slot."""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    @contextmanager
+    def slot_sync(self):
+        self.acquire_sync()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def has_capacity(self) -> bool:
+        """True if nobody is queued and an in-flight slot is free."""
+        with self._lock:
+            return self._queued == 0 and self._in_flight < self.max_concurrent_requests
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current queue depth and wait statistics."""
+        with self._lock:
+            self._refill()
+            return {
+                "queued": self._queued,
+                "max_queued": self._max_queued,
+                "in_flight": self._in_flight,
+                "acquired": self._acquired,
+                "tokens_available": round(self._tokens, 3),
+                "avg_wait_ms": round(self._total_wait / self._acquired * 1000, 3) if self._acquired else 0.0,
+                "max_wait_ms": round(self._max_wait * 1000, 3),
+                "max_rpm": self.max_rpm,
+                "max_concurrent_requests": self.max_concurrent_requests,
+            }
+
+    # ------------------------------------------------------------------ #
+    # internals
+    # ------------------------------------------------------------------ #
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate_per_sec)
+        self._last_refill = now
+
+    def _take(self) -> bool:
+        """Take a token and a slot if both are free (lock held)."""
+        self._refill()
+        if self._in_flight >= self.max_concurrent_requests or self._tokens < 1.0:
+            return False
+        self._tokens -= 1.0
+        self._in_flight += 1
+        return True
+
+    def _take_now(self) -> bool:
+        """Fast path (lock held): only when nobody is queued ahead."""
+        return not self._waiters and self._take()
+
+    def _dispatch(self, waiter: Optional[_Waiter] = None) -> Optional[float]:
+        """
+        Grant tokens and slots to the queue head, in order (lock held).
+
+        Returns how long *waiter* should sleep before looking again: until
+        the next token when it heads a queue that is short of tokens, else
+        until it is woken (``None``).
+        """
+        granted = False
+        while self._waiters and self._take():
+            head = self._waiters.popleft()
+            head.granted = True
+            head.wake()
+            granted = True
+        if not self._waiters:
+            return None
+        head = self._waiters[0]
+        if granted and head is not waiter:
+            head.wake()             # new head: let it time the next token itself
+        if head is waiter and self._in_flight < self.max_concurrent_requests:
+            return (1.0 - self._tokens) / self.rate_per_sec
+        return None
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        """A queued caller gave up (cancelled): drop it or hand back its grant."""
+        with self._lock:
+            if waiter.granted:
+                self._in_flight -= 1
+                self._tokens = min(self.capacity, self._tokens + 1.0)
+            else:
+                self._waiters.remove(waiter)
+            self._dispatch()
+
+    def _enter_queue(self) -> float:
+        with self._lock:
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+        return time.monotonic()
+
+    def _leave_queue(self, started: float, acquired: bool) -> None:
+        waited = time.monotonic() - started
+        with self._lock:
+            self._queued -= 1
+            if not acquired:
+                return
+            self._acquired += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+        request_timing.add("llm_queue", waited)
@@ -0,0 +1,180 @@
+# impl/request_timing.py
+"""Request-scoped timing spans, reported as ``Server-Timing`` and in the log.
+
+`RequestIDMiddleware` starts a `RequestTimer` per request and keeps it in a
+context variable.  Code anywhere below the route records into it:
+
+    with request_timing.span("auth"):
+        ...
+
+or ``request_timing.add("llm_queue", seconds)`` for durations measured
+elsewhere.  Spans with the same name are summed and counted.  Nothing is
+recorded outside a request (``current()`` is ``None``), so the helpers are
+safe to call from scripts and background jobs.
+
+Recorded spans:
+
+* ``auth``          – bearer token decode
+* ``password_hash`` – bcrypt hash / verify on login and registration
+* ``db``            – SQL statement execution (all statements of the request)
+* ``llm_queue``     – waiting for a rate-limiter slot
+* ``llm``           – model generation
+* ``endpoint``      – the route function itself
+* ``serialize``     – response model validation + JSON encoding
+* ``total``         – the whole request as seen by the middleware
+
+The context variable is copied into worker threads (``run_in_threadpool``) and
+into tasks started during the request; they all share the same timer, so
+spans that overlap (e.g. a hedged LLM call) add up to more than wall time.
+Background jobs that outlive the request call `detach()` first.
+"""
+from __future__ import annotations
+
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+_current: contextvars.ContextVar[Optional["RequestTimer"]] = contextvars.ContextVar("request_timer", default=None)
+
+
+class RequestTimer:
+    """Accumulates named durations for one request."""
+
+    def __init__(self, request_id: str) -> None:
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self._spans: Dict[str, List[float]] = {}      # name → [seconds, count]
+        self._marks: Dict[str, float] = {}
+        self._lock = threading.Lock()                 # worker threads record too
+
+    def add(self, name: str, seconds: float, count: int = 1) -> None:
+        with self._lock:
+            entry = self._spans.get(name)
+            if entry is None:
+                self._spans[name] = [seconds, count]
+            else:
+                entry[0] += seconds
+                entry[1] += count
+
+    def mark(self, name: str) -> None:
+        self._marks[name] = time.perf_counter()
+
+    def since(self, name: str) -> Optional[float]:
+        started = self._marks.get(name)
+        return None if started is None else time.perf_counter() - started
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def spans(self) -> Dict[str, Tuple[float, int]]:
+        """``{name: (milliseconds, count)}``"""
+        with self._lock:
+            return {name: (round(s * 1000, 3), n) for name, (s, n) in self._spans.items()}
+
+    def server_timing(self) -> str:
+        """Value for the ``Server-Timing`` response header."""
+        parts = []
+        for name, (ms, n) in self.spans().items():
+            parts.append(f'{name};dur={ms};desc="x{n}"' if n > 1 else f"{name};dur={ms}")
+        parts.append(f"total;dur={round(self.elapsed() * 1000, 3)}")
+        return ", ".join(parts)
+
+
+# ──────────────────────────────────────────────────────────────
+# module-level helpers
+# ──────────────────────────────────────────────────────────────
+def start(request_id: str) -> Tuple[RequestTimer, contextvars.Token]:
+    timer = RequestTimer(request_id)
+    return timer, _current.set(timer)
+
+
+def reset(token: contextvars.Token) -> None:
+    _current.reset(token)
+
+
+def current() -> Optional[RequestTimer]:
+    return _current.get()
+
+
+def detach() -> None:
+    """Stop recording in the current context (for background tasks)."""
+    _current.set(None)
+
+
+def add(name: str, seconds: float, count: int = 1) -> None:
+    timer = _current.get()
+    if timer is not None:
+        timer.add(name, seconds, count)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - t0)
+
+
+def timed_endpoint(endpoint: Callable) -> Callable:
+    """Wrap a route function so its runtime lands in the ``endpoint`` span."""
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            try:
+                with span("endpoint"):
+                    return await endpoint(*args, **kwargs)
+            finally:
+                _mark_endpoint_done()
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            try:
+                with span("endpoint"):
+                    return endpoint(*args, **kwargs)
+            finally:
+                _mark_endpoint_done()
+    return wrapper
+
+
+def _mark_endpoint_done() -> None:
+    timer = _current.get()
+    if timer is not None:
+        timer.mark("endpoint_done")
+
+
+def instrument_sqlalchemy() -> None:
+    """Record SQL execution time of every engine into the ``db`` span."""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    if event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _on_cursor_error)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("timing_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stack = conn.info.get("timing_started")
+    if stack:
+        add("db", time.perf_counter() - stack.pop())
+
+
+def _on_cursor_error(exception_context):
+    conn = exception_context.connection
+    stack = conn.info.get("timing_started") if conn is not None else None
+    if stack:
+        add("db", time.perf_counter() - stack.pop())
@@ -1,7 +1,7 @@
 
 # schemes.py
 from pydantic import BaseModel, Field
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from datetime import datetime
 
 class ChatMessage(BaseModel):
@@ -15,3 +15,49 @@ class ChatMessage(BaseModel):
     userData: Dict[str, Any] = Field(default_factory=dict)
     chatContextNotes: List[str] = Field(default_factory=list)
     coachContext: Dict[str, Any] = Field(default_factory=dict)
+
+
+class MessageRecord:
+    """
+    Compact in-memory message used by `ChatBackend`'s store.
+
+    Same attribute names as `ChatMessage`, but a plain ``__slots__`` object:
+    no validation and no per-instance ``__dict__`` on every append.  Use
+    `to_chat_message` where the pydantic model is needed.
+    """
+
+    __slots__ = (
+        "user_id", "user_name", "user_type", "id", "message", "message_type", "timestamp",
+        "userData", "chatContextNotes", "coachContext",
+    )
+
+    def __init__(
+        self,
+        *,
+        user_id: int,
+        user_name: str,
+        user_type: str,
+        id: int,
+        message: str,
+        message_type: str,
+        timestamp: datetime,
+        userData: Optional[Dict[str, Any]] = None,
+        chatContextNotes: Optional[List[str]] = None,
+        coachContext: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.user_id = user_id
+        self.user_name = user_name
+        self.user_type = user_type
+        self.id = id
+        self.message = message
+        self.message_type = message_type
+        self.timestamp = timestamp
+        self.userData = userData if userData is not None else {}
+        self.chatContextNotes = chatContextNotes if chatContextNotes is not None else []
+        self.coachContext = coachContext if coachContext is not None else {}
+
+    def to_chat_message(self) -> ChatMessage:
+        return ChatMessage(**{name: getattr(self, name) for name in self.__slots__})
+
+    def __repr__(self) -> str:
+        return f"<MessageRecord id={self.id} user_type={self.user_type} user_id={self.user_id}>"
@@ -3,6 +3,7 @@
 import logging
 import json
 from fastapi import HTTPException
+from db.request_session import use_session
 from traceback import format_exc
 from typing import List
 
@@ -23,17 +24,13 @@ class AiCreateAffirmationsService:
         self.user_id = user_id
         self.dependencies = dependencies
         self.response = None
-        self.llm_service = MyLLMService()
+        self.llm_service: MyLLMService = dependencies.llm_service()
         
         logger.debug(f"AiCreateAffirmationsService initialized for user_id: {user_id}")
         
         self._preprocess_request_data()
         self._process_request()
     
-    def _get_session(self):
-        """Get database session from dependencies."""
-        return self.dependencies.session_factory()()
-    
     def _preprocess_request_data(self):
         """Generate affirmations using LLM based on user context."""
         # Validate request has context
@@ -85,44 +82,46 @@ class AiCreateAffirmationsService:
     
     def _save_affirmations_to_db(self, affirmations_data: List[dict]) -> List[dict]:
         """Save multiple affirmations to the database and return their data."""
-        session = self._get_session()
         created_affirmations_data = []
         
-        try:
-            # Get the affirmation repository
-            affirmation_repo = self.dependencies.affirmation_repository(session=session)
+        with use_session(self.dependencies) as db:
+            try:
+                # Unit-of-work mode: every row is only flushed ...
+                affirmation_repo = db.repository("affirmation")
             
-            # Create each affirmation in the database
-            for affirmation_data in affirmations_data:
-                affirmation = affirmation_repo.create_affirmation(
-                    user_id=self.user_id,
-                    content=affirmation_data['content'],
-                    category=affirmation_data.get('category'),
-                    voice_enabled=affirmation_data.get('voice_enabled', False),
-                    voice_id=affirmation_data.get('voice_id')
-                )
+                # Create each affirmation in the database
+                for affirmation_data in affirmations_data:
+                    affirmation = affirmation_repo.create_affirmation(
+                        user_id=self.user_id,
+                        content=affirmation_data['content'],
+                        category=affirmation_data.get('category'),
+                        voice_enabled=affirmation_data.get('voice_enabled', False),
+                        voice_id=affirmation_data.get('voice_id')
+                    )
                 
-                # Extract data while session is still open
-                affirmation_dict = {
-                    'id': affirmation.id,
-                    'content': affirmation.content,
-                    'category': affirmation.category,
-                    'voice_id': affirmation.voice_id,
-                    'created_at': affirmation.created_at,
-                    'updated_at': affirmation.updated_at
-                }
-                created_affirmations_data.append(affirmation_dict)
-            
-            logger.debug(f"Created {len(created_affirmations_data)} affirmations for user {self.user_id}")
-            return created_affirmations_data
+                    # Extract data while session is still open
+                    affirmation_dict = {
+                        'id': affirmation.id,
+                        'content': affirmation.content,
+                        'category': affirmation.category,
+                        'voice_id': affirmation.voice_id,
+                        'created_at': affirmation.created_at,
+                        'updated_at': affirmation.updated_at
+                    }
+                    created_affirmations_data.append(affirmation_dict)
+
+                # ... but the 201 body hands out their ids, so commit here rather
+                # than at the end of the request, where a failure would bypass
+                # this service's error handling
+                db.commit()
+
+                logger.debug(f"Created {len(created_affirmations_data)} affirmations for user {self.user_id}")
+                return created_affirmations_data
             
-        except Exception as e:
-            session.rollback()
-            logger.error(f"Error saving affirmations to database: {e}\n{format_exc()}")
-            raise HTTPException(status_code=500, detail="Failed to save affirmations")
-        finally:
-            session.close()
-    
+            except Exception as e:
+                logger.error(f"Error saving affirmations to database: {e}\n{format_exc()}")
+                raise HTTPException(status_code=500, detail="Failed to save affirmations")
+
     def _process_request(self):
         """Save generated affirmations and build the response."""
         # Save to database
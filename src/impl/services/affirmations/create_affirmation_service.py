@@ -2,6 +2,7 @@
 
 import logging
 from fastapi import HTTPException
+from db.request_session import use_session
 from traceback import format_exc
 
 from models.affirmation.create_affirmation201_response import CreateAffirmation201Response
@@ -27,10 +28,6 @@ class CreateAffirmationService:
         self._preprocess_request_data()
         self._process_request()
     
-    def _get_session(self):
-        """Get database session from dependencies."""
-        return self.dependencies.session_factory()()
-    
     def _preprocess_request_data(self):
         """Validate request and prepare data for database insertion."""
         # Validate text is not empty
@@ -49,26 +46,23 @@ class CreateAffirmationService:
     
     def _save_affirmation_to_db(self):
         """Save the affirmation to the database using the repository."""
-        session = self._get_session()
-        try:
-            # Get the affirmation repository
-            affirmation_repo = self.dependencies.affirmation_repository(session=session)
+        with use_session(self.dependencies) as db:
+            try:
+                # Get the affirmation repository
+                affirmation_repo = db.repository("affirmation")
             
-            # Create the affirmation in the database
-            affirmation = affirmation_repo.create_affirmation(
-                user_id=self.user_id,
-                **self.prepared_data
-            )
+                # Create the affirmation in the database
+                affirmation = affirmation_repo.create_affirmation(
+                    user_id=self.user_id,
+                    **self.prepared_data
+                )
             
-            return affirmation
+                return affirmation
             
-        except Exception as e:
-            session.rollback()
-            logger.error(f"Error saving affirmation to database: {e}\n{format_exc()}")
-            raise HTTPException(status_code=500, detail="Failed to save affirmation")
-        finally:
-            session.close()
-    
+            except Exception as e:
+                logger.error(f"Error saving affirmation to database: {e}\n{format_exc()}")
+                raise HTTPException(status_code=500, detail="Failed to save affirmation")
+
     def _process_request(self):
         """Process the request and build the response."""
         # Save to database
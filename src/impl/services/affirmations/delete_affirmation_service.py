@@ -2,6 +2,7 @@
 
 import logging
 from fastapi import HTTPException, status
+from db.request_session import use_session
 from traceback import format_exc
 
 logger = logging.getLogger(__name__)
@@ -22,10 +23,6 @@ class DeleteAffirmationService:
         self._preprocess_request_data()
         self._process_request()
     
-    def _get_session(self):
-        """Get database session from dependencies."""
-        return self.dependencies.session_factory()()
-    
     def _verify_ownership(self, affirmation, user_id):
         """Verify that the affirmation belongs to the user."""
         logger.debug(f"Checking ownership: affirmation.user_id={affirmation.user_id} (type: {type(affirmation.user_id)}), user_id={user_id} (type: {type(user_id)})")
@@ -38,48 +35,46 @@ class DeleteAffirmationService:
     
     def _preprocess_request_data(self):
         """Validate and soft delete affirmation from database."""
-        session = self._get_session()
-        try:
-            # Get the affirmation repository
-            affirmation_repo = self.dependencies.affirmation_repository(session=session)
+        with use_session(self.dependencies) as db:
+            try:
+                # Get the affirmation repository
+                affirmation_repo = db.repository("affirmation")
             
-            # Fetch the affirmation to verify it exists and check ownership
-            affirmation = affirmation_repo.get_affirmation_by_id(self.request.affirmation_id)
-            if not affirmation:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Affirmation not found"
-                )
+                # Fetch the affirmation to verify it exists and check ownership
+                affirmation = affirmation_repo.get_affirmation_by_id(self.request.affirmation_id)
+                if not affirmation:
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail="Affirmation not found"
+                    )
             
-            # Verify ownership
-            self._verify_ownership(affirmation, self.request.user_id)
+                # Verify ownership
+                self._verify_ownership(affirmation, self.request.user_id)
             
-            # Check if already deleted
-            if not affirmation.is_active:
-                raise HTTPException(
-                    status_code=status.HTTP_410_GONE,
-                    detail="Affirmation already deleted"
-                )
+                # Check if already deleted
+                if not affirmation.is_active:
+                    raise HTTPException(
+                        status_code=status.HTTP_410_GONE,
+                        detail="Affirmation already deleted"
+                    )
             
-            # Perform soft delete
-            success = affirmation_repo.delete_affirmation(self.request.affirmation_id)
+                # Perform soft delete
+                success = affirmation_repo.delete_affirmation(self.request.affirmation_id)
             
-            if not success:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Failed to delete affirmation"
-                )
+                if not success:
+                    raise HTTPException(
+                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                        detail="Failed to delete affirmation"
+                    )
             
-            logger.debug(f"Successfully deleted affirmation {self.request.affirmation_id}")
+                logger.debug(f"Successfully deleted affirmation {self.request.affirmation_id}")
             
-        except HTTPException:
-            raise
-        except Exception as e:
-            logger.error(f"Error deleting affirmation: {e}\n{format_exc()}")
-            raise HTTPException(status_code=500, detail="Failed to delete affirmation")
-        finally:
-            session.close()
-    
+            except HTTPException:
+                raise
+            except Exception as e:
+                logger.error(f"Error deleting affirmation: {e}\n{format_exc()}")
+                raise HTTPException(status_code=500, detail="Failed to delete affirmation")
+
     def _process_request(self):
         """Process is complete after deletion - no response body needed."""
         # For DELETE endpoints that return 204, we don't set self.response
@@ -2,6 +2,7 @@
 
 import logging
 from fastapi import HTTPException, status
+from db.request_session import use_session
 from traceback import format_exc
 
 from models.affirmation.edit_affirmation200_response import EditAffirmation200Response
@@ -27,10 +28,6 @@ class EditAffirmationService:
         self._preprocess_request_data()
         self._process_request()
     
-    def _get_session(self):
-        """Get database session from dependencies."""
-        return self.dependencies.session_factory()()
-    
     def _verify_ownership(self, affirmation, user_id):
         """Verify that the affirmation belongs to the user."""
         if affirmation.user_id != user_id:
@@ -42,67 +39,65 @@ class EditAffirmationService:
     
     def _preprocess_request_data(self):
         """Validate and update affirmation in database."""
-        session = self._get_session()
-        try:
-            # Get the affirmation repository
-            affirmation_repo = self.dependencies.affirmation_repository(session=session)
+        with use_session(self.dependencies) as db:
+            try:
+                # Get the affirmation repository
+                affirmation_repo = db.repository("affirmation")
             
-            # Fetch the affirmation
-            affirmation = affirmation_repo.get_affirmation_by_id(self.affirmation_id)
-            if not affirmation:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Affirmation not found"
-                )
+                # Fetch the affirmation
+                affirmation = affirmation_repo.get_affirmation_by_id(self.affirmation_id)
+                if not affirmation:
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail="Affirmation not found"
+                    )
             
-            # Verify ownership
-            self._verify_ownership(affirmation, self.user_id)
+                # Verify ownership
+                self._verify_ownership(affirmation, self.user_id)
             
-            # Prepare update data (only include fields that are present in the request)
-            update_data = {}
+                # Prepare update data (only include fields that are present in the request)
+                update_data = {}
             
-            if hasattr(self.request, 'text') and self.request.text:
-                update_data['content'] = self.request.text.strip()
+                if hasattr(self.request, 'text') and self.request.text:
+                    update_data['content'] = self.request.text.strip()
             
-            if hasattr(self.request, 'category'):
-                update_data['category'] = self.request.category
+                if hasattr(self.request, 'category'):
+                    update_data['category'] = self.request.category
             
-            if hasattr(self.request, 'voice_enabled'):
-                update_data['voice_enabled'] = self.request.voice_enabled
+                if hasattr(self.request, 'voice_enabled'):
+                    update_data['voice_enabled'] = self.request.voice_enabled
             
-            if hasattr(self.request, 'playing_voice'):
-                update_data['voice_id'] = self.request.playing_voice
+                if hasattr(self.request, 'playing_voice'):
+                    update_data['voice_id'] = self.request.playing_voice
             
-            if not update_data:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="No fields to update"
-                )
+                if not update_data:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="No fields to update"
+                    )
             
-            # Update the affirmation
-            updated_affirmation = affirmation_repo.update_affirmation(
-                affirmation_id=self.affirmation_id,
-                **update_data
-            )
+                # Update the affirmation
+                updated_affirmation = affirmation_repo.update_affirmation(
+                    affirmation_id=self.affirmation_id,
+                    **update_data
+                )
             
-            # Extract data while session is still open
-            self.updated_affirmation_data = {
-                'id': updated_affirmation.id,
-                'content': updated_affirmation.content,
-                'voice_id': updated_affirmation.voice_id,
-                'updated_at': updated_affirmation.updated_at
-            }
+                # Extract data while session is still open
+                self.updated_affirmation_data = {
+                    'id': updated_affirmation.id,
+                    'content': updated_affirmation.content,
+                    'voice_id': updated_affirmation.voice_id,
+                    'updated_at': updated_affirmation.updated_at
+                }
             
-            logger.debug(f"Successfully updated affirmation {self.affirmation_id}")
+                logger.debug(f"Successfully updated affirmation {self.affirmation_id}")
             
-        except HTTPException:
-            raise
-        except Exception as e:
-            logger.error(f"Error updating affirmation: {e}\n{format_exc()}")
-            raise HTTPException(status_code=500, detail="Failed to update affirmation")
-        finally:
-            session.close()
-    
+            except HTTPException:
+                raise
+            except Exception as e:
+                logger.error(f"Error updating affirmation: {e}\n{format_exc()}")
+                raise HTTPException(status_code=500, detail="Failed to update affirmation")
+
     def _process_request(self):
         """Build the response with updated affirmation."""
         # Build response with the expected fields
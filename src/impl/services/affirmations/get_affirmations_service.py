@@ -2,6 +2,7 @@
 
 import logging
 from fastapi import HTTPException
+from db.request_session import use_session
 from traceback import format_exc
 
 from models.affirmation.get_affirmations200_response import GetAffirmations200Response
@@ -25,40 +26,34 @@ class GetAffirmationsService:
         self._preprocess_request_data()
         self._process_request()
     
-    def _get_session(self):
-        """Get database session from dependencies."""
-        return self.dependencies.session_factory()()
-    
     def _preprocess_request_data(self):
         """Fetch affirmations from database based on filters."""
-        session = self._get_session()
-        try:
-            # Get the affirmation repository
-            affirmation_repo = self.dependencies.affirmation_repository(session=session)
+        with use_session(self.dependencies) as db:
+            try:
+                # Get the affirmation repository
+                affirmation_repo = db.repository("affirmation")
             
-            # Extract filters from request
-            user_id = self.request.user_id
-            category = getattr(self.request, 'category', None)
-            scheduled_only = getattr(self.request, 'scheduled_only', False)
+                # Extract filters from request
+                user_id = self.request.user_id
+                category = getattr(self.request, 'category', None)
+                scheduled_only = getattr(self.request, 'scheduled_only', False)
             
-            logger.debug(f"Fetching affirmations - category: {category}, scheduled_only: {scheduled_only}")
+                logger.debug(f"Fetching affirmations - category: {category}, scheduled_only: {scheduled_only}")
             
-            # Fetch affirmations from repository
-            affirmations = affirmation_repo.get_user_affirmations(
-                user_id=user_id,
-                category=category,
-                scheduled_only=scheduled_only
-            )
+                # Fetch affirmations from repository
+                affirmations = affirmation_repo.get_user_affirmations(
+                    user_id=user_id,
+                    category=category,
+                    scheduled_only=scheduled_only
+                )
             
-            self.affirmations = affirmations
-            logger.debug(f"Found {len(affirmations)} affirmations for user {user_id}")
+                self.affirmations = affirmations
+                logger.debug(f"Found {len(affirmations)} affirmations for user {user_id}")
             
-        except Exception as e:
-            logger.error(f"Error fetching affirmations: {e}\n{format_exc()}")
-            raise HTTPException(status_code=500, detail="Failed to fetch affirmations")
-        finally:
-            session.close()
-    
+            except Exception as e:
+                logger.error(f"Error fetching affirmations: {e}\n{format_exc()}")
+                raise HTTPException(status_code=500, detail="Failed to fetch affirmations")
+
     def _process_request(self):
         """Build the response with fetched affirmations."""
         # Convert SQLAlchemy models to Pydantic response models
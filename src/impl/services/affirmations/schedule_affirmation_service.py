@@ -2,6 +2,7 @@
 
 import logging
 from fastapi import HTTPException, status
+from db.request_session import use_session
 from traceback import format_exc
 
 from models.affirmation.schedule_affirmation200_response import ScheduleAffirmation200Response
@@ -25,10 +26,6 @@ class ScheduleAffirmationService:
         self._preprocess_request_data()
         self._process_request()
     
-    def _get_session(self):
-        """Get database session from dependencies."""
-        return self.dependencies.session_factory()()
-    
     def _verify_ownership(self, affirmation, user_id):
         """Verify that the affirmation belongs to the user."""
         if affirmation.user_id != user_id:
@@ -52,49 +49,47 @@ class ScheduleAffirmationService:
     
     def _preprocess_request_data(self):
         """Validate and set schedule for affirmation."""
-        session = self._get_session()
-        try:
-            # Get the affirmation repository
-            affirmation_repo = self.dependencies.affirmation_repository(session=session)
+        with use_session(self.dependencies) as db:
+            try:
+                # Get the affirmation repository
+                affirmation_repo = db.repository("affirmation")
             
-            # Fetch the affirmation
-            affirmation = affirmation_repo.get_affirmation_by_id(self.request.affirmation_id)
-            if not affirmation:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Affirmation not found"
-                )
+                # Fetch the affirmation
+                affirmation = affirmation_repo.get_affirmation_by_id(self.request.affirmation_id)
+                if not affirmation:
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail="Affirmation not found"
+                    )
             
-            # Verify ownership
-            self._verify_ownership(affirmation, self.request.user_id)
+                # Verify ownership
+                self._verify_ownership(affirmation, self.request.user_id)
             
-            # Validate schedule data
-            if not hasattr(self.request, 'schedule') or not self.request.schedule:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Schedule configuration is required"
-                )
+                # Validate schedule data
+                if not hasattr(self.request, 'schedule') or not self.request.schedule:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Schedule configuration is required"
+                    )
             
-            # Create or update schedule configuration
-            schedule_config_id = self._create_or_update_schedule_config(self.request.schedule)
+                # Create or update schedule configuration
+                schedule_config_id = self._create_or_update_schedule_config(self.request.schedule)
             
-            # Update affirmation with schedule_config_id
-            updated_affirmation = affirmation_repo.update_affirmation(
-                affirmation_id=self.request.affirmation_id,
-                schedule_config_id=schedule_config_id
-            )
+                # Update affirmation with schedule_config_id
+                updated_affirmation = affirmation_repo.update_affirmation(
+                    affirmation_id=self.request.affirmation_id,
+                    schedule_config_id=schedule_config_id
+                )
             
-            self.schedule_config_id = schedule_config_id
-            logger.debug(f"Successfully scheduled affirmation {self.request.affirmation_id}")
+                self.schedule_config_id = schedule_config_id
+                logger.debug(f"Successfully scheduled affirmation {self.request.affirmation_id}")
             
-        except HTTPException:
-            raise
-        except Exception as e:
-            logger.error(f"Error scheduling affirmation: {e}\n{format_exc()}")
-            raise HTTPException(status_code=500, detail="Failed to schedule affirmation")
-        finally:
-            session.close()
-    
+            except HTTPException:
+                raise
+            except Exception as e:
+                logger.error(f"Error scheduling affirmation: {e}\n{format_exc()}")
+                raise HTTPException(status_code=500, detail="Failed to schedule affirmation")
+
     def _process_request(self):
         """Build the response with schedule information."""
         # Build schedule config response
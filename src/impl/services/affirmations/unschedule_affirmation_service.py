@@ -2,6 +2,7 @@
 
 import logging
 from fastapi import HTTPException, status
+from db.request_session import use_session
 from traceback import format_exc
 
 logger = logging.getLogger(__name__)
@@ -22,10 +23,6 @@ class UnscheduleAffirmationService:
         self._preprocess_request_data()
         self._process_request()
     
-    def _get_session(self):
-        """Get database session from dependencies."""
-        return self.dependencies.session_factory()()
-    
     def _verify_ownership(self, affirmation, user_id):
         """Verify that the affirmation belongs to the user."""
         if affirmation.user_id != user_id:
@@ -37,49 +34,47 @@ class UnscheduleAffirmationService:
     
     def _preprocess_request_data(self):
         """Validate and remove schedule from affirmation."""
-        session = self._get_session()
-        try:
-            # Get the affirmation repository
-            affirmation_repo = self.dependencies.affirmation_repository(session=session)
+        with use_session(self.dependencies) as db:
+            try:
+                # Get the affirmation repository
+                affirmation_repo = db.repository("affirmation")
             
-            # Fetch the affirmation
-            affirmation = affirmation_repo.get_affirmation_by_id(self.request.affirmation_id)
-            if not affirmation:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Affirmation not found"
-                )
+                # Fetch the affirmation
+                affirmation = affirmation_repo.get_affirmation_by_id(self.request.affirmation_id)
+                if not affirmation:
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail="Affirmation not found"
+                    )
             
-            # Verify ownership
-            self._verify_ownership(affirmation, self.request.user_id)
+                # Verify ownership
+                self._verify_ownership(affirmation, self.request.user_id)
             
-            # Check if affirmation is scheduled
-            if not affirmation.schedule_config_id:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Affirmation is not scheduled"
-                )
+                # Check if affirmation is scheduled
+                if not affirmation.schedule_config_id:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Affirmation is not scheduled"
+                    )
             
-            # Remove schedule by setting schedule_config_id to None
-            updated_affirmation = affirmation_repo.update_affirmation(
-                affirmation_id=self.request.affirmation_id,
-                schedule_config_id=None
-            )
+                # Remove schedule by setting schedule_config_id to None
+                updated_affirmation = affirmation_repo.update_affirmation(
+                    affirmation_id=self.request.affirmation_id,
+                    schedule_config_id=None
+                )
             
-            # In a real implementation, you might also want to:
-            # 1. Delete or deactivate the schedule configuration
-            # 2. Cancel any pending notifications
+                # In a real implementation, you might also want to:
+                # 1. Delete or deactivate the schedule configuration
+                # 2. Cancel any pending notifications
             
-            logger.debug(f"Successfully unscheduled affirmation {self.request.affirmation_id}")
+                logger.debug(f"Successfully unscheduled affirmation {self.request.affirmation_id}")
             
-        except HTTPException:
-            raise
-        except Exception as e:
-            logger.error(f"Error unscheduling affirmation: {e}\n{format_exc()}")
-            raise HTTPException(status_code=500, detail="Failed to unschedule affirmation")
-        finally:
-            session.close()
-    
+            except HTTPException:
+                raise
+            except Exception as e:
+                logger.error(f"Error unscheduling affirmation: {e}\n{format_exc()}")
+                raise HTTPException(status_code=500, detail="Failed to unschedule affirmation")
+
     def _process_request(self):
         """Process is complete after unscheduling - no response body needed."""
         # For DELETE endpoints that return 204, we don't set self.response
@@ -2,6 +2,7 @@
 import logging
 from email_validator import validate_email, EmailNotValidError
 from passlib.context import CryptContext
+from impl import request_timing
 from datetime import datetime, timedelta
 from fastapi import HTTPException
 import jwt
@@ -10,6 +11,7 @@ from traceback import format_exc
 from models.auth_login_post200_response import AuthLoginPost200Response
 from db.models.login_time_log import LoginTimeLog
 from db.models.user_details import UserDetails
+from db.request_session import use_session
 
 from dotenv import load_dotenv
 import os
@@ -90,20 +92,9 @@ class LoginService:
     #     return session_factory
     
     
-    def _get_db_session(self):
-        logger.debug("Accessing session_factory")
-     
-        session_factory = self.dependencies.session_factory()
-        # "session_factory" here is presumably a 'providers.Singleton(sessionmaker, bind=engine)'
-
-        # To create a *session*, call it:
-        return session_factory()  # This returns a Session object
-
-
-    def _get_user_repository(self, session):
-        """Obtain the user repository from dependencies, given a DB session."""
-        user_repository_provider = self.dependencies.user_repository
-        return user_repository_provider(session=session)
+    def _get_user_repository(self, db):
+        """The request's user repository (see `db.request_session`)."""
+        return db.repository("user")
 
     def _fetch_user_by_email(self, user_repository, email: str):
         """Fetch a User by email or raise HTTP 400 if not found."""
@@ -117,7 +108,9 @@ class LoginService:
     def _verify_user_password(self, db_user, password: str):
         """Verify that the given password matches the stored hash."""
         logger.debug("Verifying password")
-        if not pwd_context.verify(password, db_user.password_hash):
+        with request_timing.span("password_hash"):
+            valid = pwd_context.verify(password, db_user.password_hash)
+        if not valid:
             logger.error("Invalid password")
             raise HTTPException(status_code=400, detail="Invalid email or password")
 
@@ -152,12 +145,14 @@ class LoginService:
                 new_log = LoginTimeLog(login_datetime=datetime.utcnow())
                 user_settings.login_time_logs.append(new_log)
                 session.add(user_settings)
-                session.commit()
+                session.flush()         # committed with the request
                 logger.debug(f"Inserted new LoginTimeLog for user_id={user_id}")
             else:
                 logger.debug(f"UserDetails not found for user_id={user_id}. "
                             "Skipping login_time_log insertion.")
         except Exception as e:
+            # the log is optional: drop it, keep the login
+            session.rollback()
             logger.error(f"Error inserting login log: {e}")
 
     # def _insert_login_log(self, session, user_id: int):
@@ -199,28 +194,21 @@ class LoginService:
             # 1) Validate email
             email = self._validate_email_address(self.request.email)
 
-            # 2) Access the DB session and user repository
-            session = self._get_db_session()
-
-
-            logger.debug(type(session))
-
-            
-
-
-            user_repository = self._get_user_repository(session)
+            # 2) Access the request's DB session and user repository
+            with use_session(self.dependencies) as db:
+                user_repository = self._get_user_repository(db)
 
-            # 3) Fetch the user by email
-            db_user = self._fetch_user_by_email(user_repository, email)
+                # 3) Fetch the user by email
+                db_user = self._fetch_user_by_email(user_repository, email)
 
-            # 4) Verify the password
-            self._verify_user_password(db_user, self.request.password)
+                # 4) Verify the password
+                self._verify_user_password(db_user, self.request.password)
 
-            # 5) Create the JWT
-            access_token = self._create_jwt_for_user(db_user.user_id)
+                # 5) Create the JWT
+                access_token = self._create_jwt_for_user(db_user.user_id)
 
-            # 6) Insert the login log if user settings exist
-            self._insert_login_log(session, db_user.user_id)
+                # 6) Insert the login log if user settings exist
+                self._insert_login_log(db.session, db_user.user_id)
 
             # 7) Save the result for process_request
             self.preprocessed_data = access_token
@@ -3,6 +3,7 @@
 import logging
 from email_validator import validate_email, EmailNotValidError
 from passlib.context import CryptContext
+from impl import request_timing
 from datetime import datetime, timedelta
 from fastapi import HTTPException, Response
 import jwt
@@ -11,6 +12,7 @@ from traceback import format_exc
 from models.auth_login_with_refresh_logic_post200_response import AuthLoginWithRefreshLogicPost200Response
 from db.models.login_time_log import LoginTimeLog
 from db.models.user_details import UserDetails
+from db.request_session import use_session
 
 
 
@@ -99,14 +101,8 @@ class LoginWithRefreshService:
             logger.error(f"Email validation failed: {e}")
             raise HTTPException(status_code=400, detail=str(e))
 
-    def _get_db_session(self):
-        logger.debug("Accessing session_factory")
-        session_factory = self.dependencies.session_factory()
-        return session_factory()
-
-    def _get_user_repository(self, session):
-        user_repository_provider = self.dependencies.user_repository
-        return user_repository_provider(session=session)
+    def _get_user_repository(self, db):
+        return db.repository("user")
     
     def _fetch_user_by_email(self, user_repository, email: str):
         logger.debug(f"Retrieving user with email: {email}")
@@ -118,7 +114,9 @@ class LoginWithRefreshService:
     
     def _verify_user_password(self, db_user, password: str):
         logger.debug("Verifying password")
-        if not pwd_context.verify(password, db_user.password_hash):
+        with request_timing.span("password_hash"):
+            valid = pwd_context.verify(password, db_user.password_hash)
+        if not valid:
             logger.error("Invalid password")
             raise HTTPException(status_code=400, detail="Invalid email or password")
 
@@ -138,26 +136,27 @@ class LoginWithRefreshService:
                 new_log = LoginTimeLog(login_datetime=datetime.utcnow())
                 user_settings.login_time_logs.append(new_log)
                 session.add(user_settings)
-                session.commit()
+                session.flush()         # committed with the request
                 logger.debug(f"Inserted new LoginTimeLog for user_id={user_id}")
             else:
                 logger.debug(f"UserDetails not found for user_id={user_id}. Skipping login_time_log insertion.")
         except Exception as e:
+            # the log is optional: drop it, keep the login
+            session.rollback()
             logger.error(f"Error inserting login log: {e}")
 
     def _preprocess_request_data(self):
         try:
             # Validate and normalize email
             email = self._validate_email_address(self.request.email)
-            # Get DB session and user repository
-            session = self._get_db_session()
-            user_repository = self._get_user_repository(session)
-            # Fetch user by email and verify password
-            db_user = self._fetch_user_by_email(user_repository, email)
-            self._verify_user_password(db_user, self.request.password)
-            # Insert login log if user settings exist
-            self._insert_login_log(session, db_user.user_id)
-            # session.close()
+            # The request's DB session and user repository
+            with use_session(self.dependencies) as db:
+                user_repository = self._get_user_repository(db)
+                # Fetch user by email and verify password
+                db_user = self._fetch_user_by_email(user_repository, email)
+                self._verify_user_password(db_user, self.request.password)
+                # Insert login log if user settings exist
+                self._insert_login_log(db.session, db_user.user_id)
             # Generate tokens
             self.access_token, self.refresh_token = self._create_tokens_for_user(db_user.user_id)
         except HTTPException:
@@ -5,6 +5,7 @@ from email_validator import validate_email, EmailNotValidError
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from fastapi import HTTPException
+from db.request_session import use_session
 import jwt
 from traceback import format_exc
 
@@ -64,57 +65,47 @@ class RefreshTokenService:
                 logger.error(f"Email validation failed: {str(e)}")
                 raise HTTPException(status_code=400, detail=str(e))
 
-            # Access session_factory and user_repository providers from dependencies
-            logger.debug("Accessing session_factory and user_repository providers")
-            session_factory = self.dependencies.session_factory()
-            user_repository_provider = self.dependencies.user_repository
-
-            # Create a new database session
-            session = session_factory()
-            try:
-                logger.debug("Now inside the database session")
-                # Instantiate the UserRepository with the session
-                user_repository = user_repository_provider(session=session)
-
-                # Retrieve the user by email
-                logger.debug(f"Retrieving user with email: {email}")
-                db_user = user_repository.get_user_by_email(email)
-                if not db_user:
-                    logger.error(f"User not found with email: {email}")
-                    raise HTTPException(status_code=400, detail="User not found")
-
-                # Hash the new password
-                logger.debug("Hashing new password")
-                hashed_password = pwd_context.hash(new_password)
-                logger.debug("New password hashed successfully")
-
-                # Update the user's password in the database
-                logger.debug("Updating user's password in the database")
-                db_user.hashed_password = hashed_password
-                session.commit()
-                logger.debug("User's password updated successfully")
-
-                # Optionally, generate a new JWT token for the user
-                logger.debug(f"Generating new JWT token for user_id: {db_user.user_id}")
-                access_token_expires = timedelta(minutes=30)
-                access_token = create_access_token(
-                    data={"sub": str(db_user.user_id)},
-                    expires_delta=access_token_expires
-                )
-
-                # Store the generated token
-                self.preprocessed_data = {
-                    "msg": "Password reset successfully",
-                    "access_token": access_token
-                }
-                logger.debug("Token generated successfully")
-
-            except Exception as e:
-                session.rollback()
-                logger.error(f"An error occurred during password reset: {e}\n{format_exc()}")
-                raise e
-            finally:
-                session.close()
+            # The request's DB session and user repository
+            with use_session(self.dependencies) as db:
+                try:
+                    logger.debug("Now inside the database session")
+                    user_repository = db.repository("user")
+
+                    # Retrieve the user by email
+                    logger.debug(f"Retrieving user with email: {email}")
+                    db_user = user_repository.get_user_by_email(email)
+                    if not db_user:
+                        logger.error(f"User not found with email: {email}")
+                        raise HTTPException(status_code=400, detail="User not found")
+
+                    # Hash the new password
+                    logger.debug("Hashing new password")
+                    hashed_password = pwd_context.hash(new_password)
+                    logger.debug("New password hashed successfully")
+
+                    # Update the user's password in the database
+                    logger.debug("Updating user's password in the database")
+                    db_user.hashed_password = hashed_password
+                    logger.debug("User's password updated successfully")
+
+                    # Optionally, generate a new JWT token for the user
+                    logger.debug(f"Generating new JWT token for user_id: {db_user.user_id}")
+                    access_token_expires = timedelta(minutes=30)
+                    access_token = create_access_token(
+                        data={"sub": str(db_user.user_id)},
+                        expires_delta=access_token_expires
+                    )
+
+                    # Store the generated token
+                    self.preprocessed_data = {
+                        "msg": "Password reset successfully",
+                        "access_token": access_token
+                    }
+                    logger.debug("Token generated successfully")
+
+                except Exception as e:
+                    logger.error(f"An error occurred during password reset: {e}\n{format_exc()}")
+                    raise e
 
         except HTTPException as http_exc:
             # Re-raise HTTP exceptions to be handled by FastAPI
@@ -3,8 +3,10 @@
 import logging
 from email_validator import validate_email, EmailNotValidError
 from passlib.context import CryptContext
+from impl import request_timing
 from datetime import datetime, timedelta
 from fastapi import HTTPException
+from db.request_session import use_session
 import jwt
 from traceback import format_exc
 
@@ -75,56 +77,46 @@ class RegisterService:
             raise HTTPException(status_code=400, detail=str(e))
 
         try:
-            # Access session_factory and user_repository providers from dependencies
-            logger.debug("Accessing session_factory and user_repository providers")
-            session_factory = self.dependencies.session_factory()
-            user_repository_provider = self.dependencies.user_repository
-
-            # Create a new database session
-            session = session_factory()
-            try:
-                logger.debug("Now inside the database session")
-                # Instantiate the UserRepository with the session
-                user_repository = user_repository_provider(session=session)
-
-                # Check if the user already exists
-                logger.debug(f"Checking if user exists with email: {email}")
-                if user_repository.check_user_by_email(email):
-                    logger.error(f"Email already registered: {email}")
-                    raise HTTPException(status_code=400, detail="Email already registered")
-
-                # Hash the user's password
-                logger.debug("Hashing password")
-                hashed_password = pwd_context.hash(password)
-                logger.debug("Password hashed successfully")
-
-                # Add the new user to the database
-                logger.debug("Adding new user to the database")
-                user_id = user_repository.add_new_user(email, hashed_password)
-                logger.debug(f"User added successfully with ID: {user_id}")
-                self.new_user_id = user_id    
-
-                # Commit the user creation
-                session.commit()
-
-                # Generate a JWT token for the new user
-                logger.debug(f"Generating JWT token for user_id: {user_id}")
-                access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-                access_token = create_access_token(
-                    data={"sub": str(user_id)},
-                    expires_delta=access_token_expires
-                )
-
-                # Store the generated token
-                self.preprocessed_data = access_token
-                logger.debug("Token generated successfully")
-
-            except Exception as e:
-                session.rollback()
-                logger.error(f"An error occurred during registration: {e}\n{format_exc()}")
-                raise e
-            finally:
-                session.close()
+            # The request's DB session (shared with the chat created right after
+            # registration; one commit for both)
+            with use_session(self.dependencies) as db:
+                try:
+                    logger.debug("Now inside the database session")
+                    user_repository = db.repository("user")
+
+                    # Check if the user already exists
+                    logger.debug(f"Checking if user exists with email: {email}")
+                    if user_repository.check_user_by_email(email):
+                        logger.error(f"Email already registered: {email}")
+                        raise HTTPException(status_code=400, detail="Email already registered")
+
+                    # Hash the user's password
+                    logger.debug("Hashing password")
+                    with request_timing.span("password_hash"):
+                        hashed_password = pwd_context.hash(password)
+                    logger.debug("Password hashed successfully")
+
+                    # Add the new user to the database
+                    logger.debug("Adding new user to the database")
+                    user_id = user_repository.add_new_user(email, hashed_password)
+                    logger.debug(f"User added successfully with ID: {user_id}")
+                    self.new_user_id = user_id    
+
+                    # Generate a JWT token for the new user
+                    logger.debug(f"Generating JWT token for user_id: {user_id}")
+                    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+                    access_token = create_access_token(
+                        data={"sub": str(user_id)},
+                        expires_delta=access_token_expires
+                    )
+
+                    # Store the generated token
+                    self.preprocessed_data = access_token
+                    logger.debug("Token generated successfully")
+
+                except Exception as e:
+                    logger.error(f"An error occurred during registration: {e}\n{format_exc()}")
+                    raise e
 
         except HTTPException as http_exc:
             # Re-raise HTTP exceptions to be handled by FastAPI
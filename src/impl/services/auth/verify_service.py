@@ -2,6 +2,7 @@
 
 import logging
 from fastapi import HTTPException
+from db.request_session import use_session
 from datetime import datetime, timedelta
 import jwt
 from traceback import format_exc
@@ -52,40 +53,30 @@ class VerifyService:
 
             logger.debug(f"Email extracted from token: {email}")
 
-            # Access session_factory and user_repository providers from dependencies
-            logger.debug("Accessing session_factory and user_repository providers")
-            session_factory = self.dependencies.session_factory()
-            user_repository_provider = self.dependencies.user_repository
-
-            # Create a new database session
-            session = session_factory()
-            try:
-                logger.debug("Now inside the database session")
-                # Instantiate the UserRepository with the session
-                user_repository = user_repository_provider(session=session)
-
-                # Retrieve the user by email
-                logger.debug(f"Retrieving user with email: {email}")
-                db_user = user_repository.get_user_by_email(email)
-                if not db_user:
-                    logger.error(f"User not found with email: {email}")
-                    raise HTTPException(status_code=400, detail="User not found")
-
-                # Update the user's verified status in the database
-                logger.debug("Updating user's verified status in the database")
-                db_user.is_verified = True
-                session.commit()
-                logger.debug("User's verified status updated successfully")
-
-                # Prepare the success message
-                self.preprocessed_data = {"msg": "Email verified successfully"}
-
-            except Exception as e:
-                session.rollback()
-                logger.error(f"An error occurred during email verification: {e}\n{format_exc()}")
-                raise e
-            finally:
-                session.close()
+            # The request's DB session and user repository
+            with use_session(self.dependencies) as db:
+                try:
+                    logger.debug("Now inside the database session")
+                    user_repository = db.repository("user")
+
+                    # Retrieve the user by email
+                    logger.debug(f"Retrieving user with email: {email}")
+                    db_user = user_repository.get_user_by_email(email)
+                    if not db_user:
+                        logger.error(f"User not found with email: {email}")
+                        raise HTTPException(status_code=400, detail="User not found")
+
+                    # Update the user's verified status in the database
+                    logger.debug("Updating user's verified status in the database")
+                    db_user.is_verified = True
+                    logger.debug("User's verified status updated successfully")
+
+                    # Prepare the success message
+                    self.preprocessed_data = {"msg": "Email verified successfully"}
+
+                except Exception as e:
+                    logger.error(f"An error occurred during email verification: {e}\n{format_exc()}")
+                    raise e
 
         except HTTPException as http_exc:
             # Re-raise HTTP exceptions to be handled by FastAPI
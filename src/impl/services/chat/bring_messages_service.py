@@ -10,6 +10,8 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from models.chat_message import ChatMessage  # Pydantic response model
 from db.models.message import Message        # SQLAlchemy ORM model
+from db.request_session import use_session
+from impl.message_cursor import AFTER, BEFORE, MessageCursor
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +20,18 @@ class BringMessagesService:
     """
     Load a slice of message history for a given chat.
 
+    Pages are keyset reads on ``(timestamp, id)`` – a single index range seek
+    however far back the page is.  The slice is always returned oldest →
+    newest; after the run:
+
+    • `next_cursor` – continues in the reading direction (newer messages when
+      reading forward – also the token to poll for new ones, see
+      `impl.message_cursor` – older when reading backward); ``None`` for an
+      empty page
+    • `prev_cursor` – reads the other way from this page; ``None`` on a
+      forward read that starts at the chat's first message
+    • `has_more`    – whether `next_cursor` currently leads to more rows
+
     Parameters
     ----------
     user_id : int
@@ -29,9 +43,17 @@ class BringMessagesService:
     limit : int, optional
         Max rows to return (default 50).
     offset : int, optional
-        Skip this many rows (default 0).
+        Skip this many rows (default 0).  Legacy, forward reads only, in the
+        same ``(timestamp, id)`` order as cursors; a cursor is the scalable
+        way to page.
     since : datetime | None, optional
         If supplied, return messages created strictly after this timestamp.
+    cursor : str | None, optional
+        Opaque token from a previous page (`next_cursor` / `prev_cursor`);
+        carries its own direction and excludes `offset` / `since`.
+    direction : str, optional
+        Without a cursor: ``"forward"`` (default) starts at the oldest
+        message (or `since`), ``"backward"`` at the newest.
     """
 
     def __init__(
@@ -43,6 +65,8 @@ class BringMessagesService:
         limit: int = 50,
         offset: int = 0,
         since: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        direction: str = "forward",
     ) -> None:
         self.user_id = user_id
         self.chat_id = chat_id
@@ -50,8 +74,13 @@ class BringMessagesService:
         self.limit = limit
         self.offset = offset
         self.since = since
+        self.cursor = cursor
+        self.direction = direction
 
         self.response: List[ChatMessage] = []
+        self.next_cursor: Optional[str] = None
+        self.prev_cursor: Optional[str] = None
+        self.has_more = False
 
         logger.debug("BringMessagesService(user_id=%s chat_id=%s)", user_id, chat_id)
 
@@ -62,58 +91,93 @@ class BringMessagesService:
     # Helpers
     # ------------------------------------------------------------------ #
 
-    def _get_session(self):
-        return self.dependencies.session_factory()()
+    def _page_request(self) -> dict:
+        """Validate paging params → `MessageRepository.fetch_page` kwargs (+ ``at_edge``)."""
+        if self.direction not in ("forward", "backward"):
+            raise HTTPException(status_code=400, detail="direction must be 'forward' or 'backward'")
+
+        if self.cursor:
+            if self.offset or self.since is not None:
+                raise HTTPException(status_code=400, detail="cursor cannot be combined with offset or since")
+            try:
+                cursor = MessageCursor.decode(self.cursor)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            position = (cursor.timestamp, cursor.message_id)
+            if cursor.direction == AFTER:
+                return dict(after=position, at_edge=False)
+            return dict(before=position, newest_first=True, at_edge=False)
+
+        if self.direction == "backward":
+            if self.offset or self.since is not None:
+                raise HTTPException(status_code=400, detail="offset and since apply to forward reads only")
+            return dict(newest_first=True, at_edge=False)
+        return dict(since=self.since, at_edge=self.since is None and not self.offset)
 
     # ------------------------------------------------------------------ #
     # Workflow
     # ------------------------------------------------------------------ #
 
     def _preprocess_request_data(self):
-        session = self._get_session()
-        try:
-            chat_repo = self.dependencies.chat_repository(session=session)
-            msg_repo  = self.dependencies.message_repository(session=session)
-
-            # 1 ─ Verify ownership (ensures caller can only read their chats)
-            chat_row = chat_repo.get_chat_by_id(self.chat_id)
-            if chat_row is None or chat_row.user_id != self.user_id:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Chat not found",
-                )
-
-            # 2 ─ Fetch messages (oldest → newest)
-            orm_messages: List[Message] = msg_repo.fetch_messages(
-                chat_id=self.chat_id,
-                limit=self.limit,
-                offset=self.offset,
-                since=self.since,
-            )
-
-            # 3 ─ Map ORM → Pydantic
-            self.preprocessed_data = [
-                ChatMessage(
-                    message_id = m.id,           
-                    chat_id=m.chat_id,
-                    user_id=m.user_id,
-                    user_name=m.user_name,
-                    user_type=m.user_type,
-                    message=m.message,
-                    message_format=m.message_format,
-                    timestamp=m.timestamp,
-                )
-                for m in orm_messages
-            ]
-
-        except HTTPException:
-            raise
-        except SQLAlchemyError as e:
-            session.rollback()
-            logger.error("DB error while fetching messages: %s", e, exc_info=True)
-            raise HTTPException(status_code=500, detail="Database error")
-        finally:
-            session.close()
+        with use_session(self.dependencies) as db:
+            try:
+                chat_repo = db.repository("chat")
+                msg_repo  = db.repository("message")
+
+                # 1 ─ Verify ownership (ensures caller can only read their chats)
+                chat_row = chat_repo.get_chat_by_id(self.chat_id)
+                if chat_row is None or chat_row.user_id != self.user_id:
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail="Chat not found",
+                    )
+
+                # 2 ─ Fetch one page (+1 row to learn whether there is more)
+                page = self._page_request()
+                at_edge = page.pop("at_edge")
+                if self.offset:
+                    orm_messages: List[Message] = msg_repo.fetch_messages(
+                        chat_id=self.chat_id, limit=self.limit + 1, offset=self.offset, since=self.since,
+                    )
+                else:
+                    orm_messages = msg_repo.fetch_page(chat_id=self.chat_id, limit=self.limit + 1, **page)
+
+                self.has_more = len(orm_messages) > self.limit
+                orm_messages = orm_messages[:self.limit]
+                backward = page.get("newest_first", False)
+                if backward:
+                    orm_messages.reverse()              # always oldest → newest
+
+                if orm_messages:
+                    first = (orm_messages[0].timestamp, orm_messages[0].id)
+                    last = (orm_messages[-1].timestamp, orm_messages[-1].id)
+                    if backward:
+                        self.next_cursor = MessageCursor(*first, BEFORE).encode()
+                        self.prev_cursor = MessageCursor(*last, AFTER).encode()     # newer (polling) side
+                    else:
+                        self.next_cursor = MessageCursor(*last, AFTER).encode()
+                        self.prev_cursor = None if at_edge else MessageCursor(*first, BEFORE).encode()
+
+                # 3 ─ Map ORM → Pydantic
+                self.preprocessed_data = [
+                    ChatMessage(
+                        message_id = m.id,           
+                        chat_id=m.chat_id,
+                        user_id=m.user_id,
+                        user_name=m.user_name,
+                        user_type=m.user_type,
+                        message=m.message,
+                        message_format=m.message_format,
+                        timestamp=m.timestamp,
+                    )
+                    for m in orm_messages
+                ]
+
+            except HTTPException:
+                raise
+            except SQLAlchemyError as e:
+                logger.error("DB error while fetching messages: %s", e, exc_info=True)
+                raise HTTPException(status_code=500, detail="Database error")
 
     def _process_request(self):
         # For this simple service, the preprocessed data is already
@@ -0,0 +1,110 @@
+# impl/services/chat/chat_usage_service.py
+import logging
+from traceback import format_exc
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, status
+from db.request_session import use_session
+
+from models.usage_metrics import UsageMetrics
+
+logger = logging.getLogger(__name__)
+
+
+class ChatUsageService:
+    """
+    Usage & cost metrics for one chat.
+
+    Steps
+    -----
+    1. Validate caller supplied `user_id` and `chat_id`.
+    2. Use the request's DB session (`use_session`).
+    3. Check the caller owns the chat (404 otherwise).
+    4. Read the chat's per-day rollups for the window via
+       `usage_repository.get_chat_usage(...)` – no per-message scan.
+    5. Return `UsageMetrics`; times are in seconds, cost in USD.
+
+    The window is applied at UTC-day granularity: `var_from` / `to` select
+    the days they fall on, inclusive.
+    """
+
+    # ──────────────────────────────────────────────────────────────
+    # construction
+    # ──────────────────────────────────────────────────────────────
+    def __init__(
+        self,
+        user_id: int,
+        chat_id: int,
+        dependencies,
+        var_from: Optional[datetime] = None,
+        to: Optional[datetime] = None,
+    ):
+        self.user_id = user_id
+        self.chat_id = chat_id
+        self.var_from = var_from
+        self.to = to
+        self.dependencies = dependencies
+        self.response = None
+
+        logger.debug("ChatUsageService initialised (chat_id=%s, user_id=%s)", chat_id, user_id)
+
+        self._preprocess_request_data()
+        self._process_request()
+
+    # ──────────────────────────────────────────────────────────────
+    # helpers
+    # ──────────────────────────────────────────────────────────────
+    @staticmethod
+    def _seconds(ms: Optional[float]) -> Optional[float]:
+        return round(ms / 1000.0, 3) if ms is not None else None
+
+    # ──────────────────────────────────────────────────────────────
+    # main workflow
+    # ──────────────────────────────────────────────────────────────
+    def _preprocess_request_data(self):
+        if not self.chat_id:
+            raise HTTPException(status_code=400, detail="Missing chat_id")
+        if not self.user_id:
+            raise HTTPException(status_code=400, detail="Missing user_id")
+        if self.var_from and self.to and self.var_from > self.to:
+            raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+
+        with use_session(self.dependencies) as db:
+            try:
+                chat_repo = db.repository("chat")
+                usage_repo = db.repository("usage")
+
+                chat_row = chat_repo.get_chat_by_id(self.chat_id)
+                if chat_row is None or chat_row.user_id != int(self.user_id):
+                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="This chat not found for this user")
+
+                usage = usage_repo.get_chat_usage(
+                    self.chat_id,
+                    from_day=self.var_from.date() if self.var_from else None,
+                    to_day=self.to.date() if self.to else None,
+                )
+                logger.debug("Usage for chat_id=%s: %s", self.chat_id, usage)
+
+                # Stash data for use in _process_request
+                self.preprocessed_data = {
+                    "usage": usage
+                }
+
+            except HTTPException:
+                raise
+            except Exception as e:
+                logger.error("Error fetching chat usage: %s\n%s", e, format_exc())
+                raise HTTPException(status_code=500, detail="Unable to fetch chat usage")
+
+    def _process_request(self):
+        """Build the response - UsageMetrics."""
+        usage = self.preprocessed_data["usage"]
+        self.response = UsageMetrics(
+            cost=round(usage["cost"], 6),
+            total_usage_time=self._seconds(usage["total_latency_ms"]),
+            avg_response_time=self._seconds(usage["avg_latency_ms"]),
+            biggest_response_time=self._seconds(usage["max_latency_ms"]),
+            shortest_response_time=self._seconds(usage["min_latency_ms"]),
+            median_response_time=self._seconds(usage["median_latency_ms"]),
+        )
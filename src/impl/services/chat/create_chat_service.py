@@ -3,6 +3,7 @@ import logging
 from datetime import datetime
 from traceback import format_exc
 from fastapi import HTTPException
+from db.request_session import use_session
 
 from models.chat_post201_response import ChatPost201Response  # adjust if the name differs
 
@@ -16,10 +17,10 @@ class CreateChatService:
     Steps
     -----
     1. Validate caller supplied `user_id`.
-    2. Open a DB session via the DI container.
+    2. Use the request's DB session (`use_session`).
     3. Use `chat_repository.create_chat(...)` to insert the row.
-    4. Commit → close the session.
-    5. Build the `ChatPost201Response`.
+    4. Build the `ChatPost201Response` (the request commits once the
+       endpoint returns).
     """
 
     # ──────────────────────────────────────────────────────────────
@@ -35,14 +36,6 @@ class CreateChatService:
         self._preprocess_request_data()
         self._process_request()
 
-    # ──────────────────────────────────────────────────────────────
-    # helpers
-    # ──────────────────────────────────────────────────────────────
-    def _open_session(self):
-        """Return a fresh SQLAlchemy Session object."""
-        session_factory = self.dependencies.session_factory()
-        return session_factory()                      # type: sqlalchemy.orm.Session
-
     # ──────────────────────────────────────────────────────────────
     # main workflow
     # ──────────────────────────────────────────────────────────────
@@ -50,39 +43,32 @@ class CreateChatService:
         if not self.user_id:
             raise HTTPException(status_code=400, detail="Missing user_id")
 
-        # Providers from the DI container
-        chat_repo_provider = self.dependencies.chat_repository
-
-        session = self._open_session()
-        try:
-            chat_repo = chat_repo_provider(session=session)
-
-            # Default settings; tweak as necessary
-            default_settings = {
-                "system_prompt": "You are a helpful assistant."
-            }
-
-            # Insert the new chat
-            chat_row = chat_repo.create_chat(
-                user_id=self.user_id,
-                settings=default_settings
-            )
-
-            session.commit()
-            logger.debug("Chat created (id=%s)", chat_row.id)
-
-            # Stash data for use in _process_request
-            self.preprocessed_data = {
-                "chat_id": chat_row.id,
-                "created_at": chat_row.created_at,
-            }
-
-        except Exception as e:
-            session.rollback()
-            logger.error("Error creating chat: %s\n%s", e, format_exc())
-            raise HTTPException(status_code=500, detail="Unable to create chat")
-        finally:
-            session.close()
+        with use_session(self.dependencies) as db:
+            try:
+                chat_repo = db.repository("chat")
+
+                # Default settings; tweak as necessary
+                default_settings = {
+                    "system_prompt": "You are a helpful assistant."
+                }
+
+                # Insert the new chat
+                chat_row = chat_repo.create_chat(
+                    user_id=self.user_id,
+                    settings=default_settings
+                )
+
+                logger.debug("Chat created (id=%s)", chat_row.id)
+
+                # Stash data for use in _process_request
+                self.preprocessed_data = {
+                    "chat_id": chat_row.id,
+                    "created_at": chat_row.created_at,
+                }
+
+            except Exception as e:
+                logger.error("Error creating chat: %s\n%s", e, format_exc())
+                raise HTTPException(status_code=500, detail="Unable to create chat")
 
     def _process_request(self):
         """Build the FastAPI response model."""
@@ -2,6 +2,7 @@
 import logging
 from traceback import format_exc
 from fastapi import HTTPException, status
+from db.request_session import use_session
 
 logger = logging.getLogger(__name__)
 
@@ -13,10 +14,10 @@ class DeleteChatService:
     Steps
     -----
     1. Validate caller supplied `user_id` and `chat_id`.
-    2. Open a DB session via the DI container.
+    2. Use the request's DB session (`use_session`).
     3. Use `chat_repository.delete_chat(...)` to delete the chat.
     4. Ensure user owns the chat before deletion.
-    5. Close the session.
+    5. Evict the chat from the history cache once the delete is committed.
     6. Return 204 No Content on success, 404 if not found or not owned.
     """
 
@@ -34,14 +35,6 @@ class DeleteChatService:
         self._preprocess_request_data()
         self._process_request()
 
-    # ──────────────────────────────────────────────────────────────
-    # helpers
-    # ──────────────────────────────────────────────────────────────
-    def _open_session(self):
-        """Return a fresh SQLAlchemy Session object."""
-        session_factory = self.dependencies.session_factory()
-        return session_factory()                      # type: sqlalchemy.orm.Session
-
     # ──────────────────────────────────────────────────────────────
     # main workflow
     # ──────────────────────────────────────────────────────────────
@@ -51,42 +44,40 @@ class DeleteChatService:
         if not self.user_id:
             raise HTTPException(status_code=400, detail="Missing user_id")
 
-        # Providers from the DI container
-        chat_repo_provider = self.dependencies.chat_repository
-
-        session = self._open_session()
-        try:
-            chat_repo = chat_repo_provider(session=session)
+        with use_session(self.dependencies) as db:
+            try:
+                chat_repo = db.repository("chat")
 
-            # Delete the chat (verifies ownership)
-            deleted = chat_repo.delete_chat(
-                chat_id=self.chat_id,
-                user_id=self.user_id
-            )
-
-            if not deleted:
-                # Chat not found or user doesn't own it
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Chat not found or access denied"
+                # Delete the chat (verifies ownership)
+                deleted = chat_repo.delete_chat(
+                    chat_id=self.chat_id,
+                    user_id=self.user_id
                 )
 
-            logger.debug("Chat deleted successfully (id=%s)", self.chat_id)
-
-            # Stash data for use in _process_request
-            self.preprocessed_data = {
-                "deleted": True
-            }
-
-        except HTTPException:
-            # Re-raise HTTP exceptions
-            raise
-        except Exception as e:
-            session.rollback()
-            logger.error("Error deleting chat: %s\n%s", e, format_exc())
-            raise HTTPException(status_code=500, detail="Unable to delete chat")
-        finally:
-            session.close()
+                if not deleted:
+                    # Chat not found or user doesn't own it
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail="Chat not found or access denied"
+                    )
+
+                # only once the delete is committed: until then a concurrent turn
+                # still sees the chat and would re-populate the cache with it
+                db.after_commit(lambda: self.dependencies.history_cache().invalidate(self.chat_id))
+                db.after_commit(lambda: self.dependencies.conversation_summarizer().forget(self.chat_id))
+                logger.debug("Chat deleted successfully (id=%s)", self.chat_id)
+
+                # Stash data for use in _process_request
+                self.preprocessed_data = {
+                    "deleted": True
+                }
+
+            except HTTPException:
+                # Re-raise HTTP exceptions
+                raise
+            except Exception as e:
+                logger.error("Error deleting chat: %s\n%s", e, format_exc())
+                raise HTTPException(status_code=500, detail="Unable to delete chat")
 
     def _process_request(self):
         """Build the response - None for 204 No Content."""
@@ -0,0 +1,179 @@
+# impl/services/messages/audio_message_service.py
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from typing import AsyncIterator, Optional
+
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from models.audio_message_response import AudioMessageResponse
+from models.new_message_request import NewMessageRequest
+from impl import request_timing
+from impl.services.messages.process_new_message_service import ProcessNewMessageService
+
+logger = logging.getLogger(__name__)
+
+
+class AudioMessageService:
+    """
+    Voice message: streamed audio upload → transcript → normal message turn.
+
+    • The body is read chunk by chunk (plain or ``Transfer-Encoding: chunked``)
+      and spooled to a temp file; the whole recording is never held in memory
+    • Every chunk is also handed to a `TranscriptionStream` running in a
+      background task, so recognition overlaps the upload and only the tail
+      of the audio is left to transcribe once the last chunk arrives
+    • The transcript becomes the user message (``message_format="audio"``,
+      ``transcription`` set) and goes through `ProcessNewMessageService`
+      exactly like a typed message
+    • Returns `AudioMessageResponse`; the spooled file is removed afterwards
+
+    The ``stt`` span covers the wait for the transcript after the upload
+    ended – the part of end-of-speech → reply latency owed to recognition.
+
+    Build the service, then ``await service.run()``.
+    """
+
+    def __init__(
+        self,
+        user_id: int,
+        chat_id: int,
+        body: AsyncIterator[bytes],
+        *,
+        dependencies,
+        content_type: Optional[str] = None,
+        language: Optional[str] = None,
+        config: Optional[dict] = None,
+        max_bytes: int = 25 * 1024 * 1024,
+        spool_dir: Optional[str] = None,
+        queue_chunks: int = 64,
+    ) -> None:
+        self.user_id = int(user_id)
+        self.chat_id = int(chat_id)
+        self.body = body
+        self.deps = dependencies
+        self.content_type = content_type
+        self.language = language
+        self.config = config
+        self.max_bytes = max_bytes
+        self.spool_dir = spool_dir
+        self.queue_chunks = queue_chunks
+
+        self.audio_bytes = 0
+
+        logger.debug("AudioMessageService(user_id=%s chat_id=%s)", self.user_id, self.chat_id)
+
+    async def run(self) -> AudioMessageResponse:
+        stt = self.deps.speech_to_text()
+        if stt is None:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Speech-to-text is not configured")
+
+        # reject before reading (and spooling) a whole recording for nothing
+        if not await self._owns_chat():
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="This chat not found for this user")
+
+        transcript = await self._receive_and_transcribe(stt)
+        if not transcript:
+            raise HTTPException(status_code=422, detail="No speech recognised")
+
+        req = NewMessageRequest(message=transcript, message_format="audio", config=self.config)
+        turn = ProcessNewMessageService(
+            self.user_id, self.chat_id, req, dependencies=self.deps, transcription=transcript,
+        )
+        reply = await turn.run()
+
+        return AudioMessageResponse(
+            message_id=reply.message_id,
+            timestamp=reply.timestamp,
+            assistant_message_id=reply.assistant_message_id,
+            assistant_text=reply.assistant_text,
+            transcription=transcript,
+            audio_bytes=self.audio_bytes,
+        )
+
+    # ----------------------------
+    # internal helpers
+    # ----------------------------
+    async def _owns_chat(self) -> bool:
+        """Ownership from the history cache, else one (async) query."""
+        entry = self.deps.history_cache().get(self.chat_id)
+        if entry is not None:
+            return entry.owner_id == self.user_id
+        session = self.deps.async_session_factory()()
+        try:
+            chat_row = await self.deps.async_chat_repository(session=session).get_chat_by_id(self.chat_id)
+            return chat_row is not None and chat_row.user_id == self.user_id
+        finally:
+            await session.close()
+
+    async def _receive_and_transcribe(self, stt) -> str:
+        stream = stt.open_stream(self.content_type, self.language)
+        # bounded: a recogniser that falls behind slows the upload instead of buffering it
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_chunks)
+
+        async def transcribe() -> None:
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    return
+                await stream.feed(chunk)
+
+        spool = await run_in_threadpool(
+            tempfile.NamedTemporaryFile, prefix="voice-", suffix=".part", dir=self.spool_dir, delete=False,
+        )
+        worker = asyncio.create_task(transcribe())
+        try:
+            async for chunk in self.body:
+                if not chunk:
+                    continue
+                self.audio_bytes += len(chunk)
+                if self.audio_bytes > self.max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Audio larger than {self.max_bytes} bytes",
+                    )
+                await run_in_threadpool(spool.write, chunk)
+                await self._put(queue, chunk, worker)
+            await run_in_threadpool(spool.close)
+            if not self.audio_bytes:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty audio upload")
+
+            upload_done = time.perf_counter()
+            await self._put(queue, None, worker)
+            await worker
+            transcript = await stream.finish(spool.name)
+            request_timing.add("stt", time.perf_counter() - upload_done)
+
+            logger.debug("Transcribed %s audio bytes for chat %s: %r", self.audio_bytes, self.chat_id, transcript)
+            return transcript.strip()
+        finally:
+            if not worker.done():
+                worker.cancel()
+            spool.close()
+            await run_in_threadpool(self._discard, spool.name)
+
+    @staticmethod
+    async def _put(queue: asyncio.Queue, item, worker: asyncio.Task) -> None:
+        """`queue.put`, but surface a failed recogniser instead of blocking on a full queue."""
+        if worker.done():
+            worker.result()         # raises the recogniser's error
+        if not queue.full():
+            queue.put_nowait(item)
+            return
+        put = asyncio.ensure_future(queue.put(item))
+        await asyncio.wait({put, worker}, return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            put.cancel()
+            worker.result()
+
+    @staticmethod
+    def _discard(path: str) -> None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,121 @@
+# impl/services/messages/chat_socket_service.py
+from __future__ import annotations
+
+import logging
+from contextlib import aclosing
+from typing import Any, Dict
+
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
+
+from models.new_message_request import NewMessageRequest
+from impl.services.messages.stream_new_message_service import StreamNewMessageService
+
+logger = logging.getLogger(__name__)
+
+
+class ChatSocketService:
+    """
+    One ``/chat/{chat_id}/ws`` connection: many turns over one socket.
+
+    The token is decoded by the endpoint before this service exists, and
+    chat ownership is checked once in `run` (warming the history cache);
+    each turn then goes through `StreamNewMessageService`, which finds the
+    chat in the cache and issues no ownership query.  A DB session is still
+    opened per turn, so an idle socket never pins a pooled connection.
+
+    Frames (JSON)
+    -------------
+    client → ``{"type": "message", "message", "message_format"?, "config"?}``
+             ``{"type": "ping"}``
+    server → ``{"type": "ready", "chat_id"}``                 after the ownership check
+             ``{"type": "delta", "text"}``                    per generated chunk
+             ``{"type": "done", "message_id", "timestamp",
+                "assistant_message_id", "text"}``             after both rows are committed
+             ``{"type": "error", "detail", "status"?}``       bad frame / failed turn
+             ``{"type": "pong"}``
+
+    Turns on one connection run one after another, in the order received.
+    """
+
+    def __init__(self, websocket: WebSocket, user_id: int, chat_id: int, *, dependencies) -> None:
+        self.ws = websocket
+        self.user_id = int(user_id)
+        self.chat_id = int(chat_id)
+        self.deps = dependencies
+        self.turns = 0
+
+        logger.debug("ChatSocketService(user_id=%s chat_id=%s)", self.user_id, self.chat_id)
+
+    async def run(self) -> None:
+        if not await self._owns_chat():
+            await self.ws.close(code=status.WS_1008_POLICY_VIOLATION, reason="This chat not found for this user")
+            return
+
+        await self.ws.accept()
+        await self._send("ready", {"chat_id": self.chat_id})
+        try:
+            while True:
+                try:
+                    frame = await self.ws.receive_json()
+                except ValueError:
+                    await self._send("error", {"detail": "Frames must be JSON objects"})
+                    continue
+
+                kind = frame.get("type", "message") if isinstance(frame, dict) else None
+                if kind == "message":
+                    if not await self._turn(frame):
+                        return
+                elif kind == "ping":
+                    await self._send("pong", {})
+                else:
+                    await self._send("error", {"detail": f"Unknown frame type: {kind}"})
+        except WebSocketDisconnect:
+            logger.debug("WebSocket closed (chat_id=%s, turns=%s)", self.chat_id, self.turns)
+
+    # ----------------------------
+    # internal helpers
+    # ----------------------------
+    async def _owns_chat(self) -> bool:
+        """Ownership from the history cache, else one (async) query."""
+        entry = self.deps.history_cache().get(self.chat_id)
+        if entry is not None:
+            return entry.owner_id == self.user_id
+        session = self.deps.async_session_factory()()
+        try:
+            chat_row = await self.deps.async_chat_repository(session=session).get_chat_by_id(self.chat_id)
+            return chat_row is not None and chat_row.user_id == self.user_id
+        finally:
+            await session.close()
+
+    async def _turn(self, frame: Dict[str, Any]) -> bool:
+        """Run one turn; ``False`` when the connection should end (chat gone)."""
+        try:
+            req = NewMessageRequest.from_dict(frame)
+        except ValidationError as exc:
+            await self._send("error", {"detail": exc.errors(include_url=False)})
+            return True
+        if not req.message:
+            await self._send("error", {"detail": "'message' must be a non-empty string"})
+            return True
+
+        service = StreamNewMessageService(self.user_id, self.chat_id, req, dependencies=self.deps)
+        try:
+            await service.prepare()
+        except HTTPException as exc:
+            await self._send("error", {"detail": exc.detail, "status": exc.status_code})
+            if exc.status_code == status.HTTP_404_NOT_FOUND:      # deleted meanwhile
+                await self.ws.close(code=status.WS_1008_POLICY_VIOLATION, reason="Chat no longer available")
+                return False
+            return True
+
+        # aclosing: a client that disconnects mid-reply still releases the session
+        async with aclosing(service.turn_events()) as events:
+            async for event, data in events:
+                await self._send(event, data)
+        self.turns += 1
+        return True
+
+    async def _send(self, kind: str, data: Dict[str, Any]) -> None:
+        await self.ws.send_json({"type": kind, **jsonable_encoder(data)})
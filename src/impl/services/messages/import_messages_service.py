@@ -0,0 +1,192 @@
+# impl/services/messages/import_messages_service.py
+from __future__ import annotations
+
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.concurrency import run_in_threadpool
+
+from models.import_messages_response import ImportMessagesResponse
+
+logger = logging.getLogger(__name__)
+
+USER_TYPES = ("user", "assistant")
+
+
+class ImportMessagesService:
+    """
+    Bulk-load a transcript into a chat from an NDJSON stream.
+
+    • One JSON object per line:
+      ``{"message": str, "user_type": "user"|"assistant", "user_name"?: str,
+      "timestamp"?: ISO-8601, "message_format"?: str}``
+      (``user_type`` defaults to ``"user"``; blank lines are skipped)
+    • Lines are collected into batches of `batch_size`; each batch is parsed,
+      validated and written with one batched INSERT and one commit in the
+      threadpool, so the body is never held in memory as a whole
+    • No LLM call, no summary update – this only stores history
+    • Returns the inserted id ranges (``[[first, last], …]``)
+
+    A malformed line stops the import with 422; the detail names the line
+    and the ranges already committed by earlier batches, so a client can
+    resume after them.
+
+    The import runs as a turn of the chat: it holds the chat's lane in
+    `chat_turn_queue` (like a streamed reply, since it reads the request
+    body in the caller's task), so it never interleaves with a message turn
+    that has already read the history.  The chat's history cache entry is
+    dropped before the lane is released.
+
+    Build the service, then ``await service.run()``.
+    """
+
+    def __init__(
+        self,
+        user_id: int,
+        chat_id: int,
+        body: AsyncIterator[bytes],
+        *,
+        dependencies,
+        batch_size: int = 5000,
+        max_line_bytes: int = 1024 * 1024,
+    ) -> None:
+        self.user_id = int(user_id)
+        self.chat_id = int(chat_id)
+        self.body = body
+        self.deps = dependencies
+        self.batch_size = batch_size
+        self.max_line_bytes = max_line_bytes
+
+        self.inserted = 0
+        self.id_ranges: List[List[int]] = []
+
+        logger.debug("ImportMessagesService(user_id=%s chat_id=%s)", self.user_id, self.chat_id)
+
+    async def run(self) -> ImportMessagesResponse:
+        async with self.deps.chat_turn_queue().exclusive(self.chat_id):
+            try:
+                return await self._run()
+            finally:
+                # still holding the lane: the next turn reloads the window
+                if self.inserted:
+                    self.deps.history_cache().invalidate(self.chat_id)
+
+    async def _run(self) -> ImportMessagesResponse:
+        session = self.deps.session_factory()()
+        try:
+            await run_in_threadpool(self._check_chat, session)
+
+            batch: List[Tuple[int, bytes]] = []
+            async for line_no, line in self._lines():
+                batch.append((line_no, line))
+                if len(batch) >= self.batch_size:
+                    await run_in_threadpool(self._insert_batch, session, batch)
+                    batch = []
+            if batch:
+                await run_in_threadpool(self._insert_batch, session, batch)
+
+            logger.debug("Imported %s messages into chat %s: %s", self.inserted, self.chat_id, self.id_ranges)
+            return ImportMessagesResponse(chat_id=self.chat_id, inserted=self.inserted, id_ranges=self.id_ranges)
+
+        except HTTPException:
+            raise
+        except SQLAlchemyError as exc:
+            session.rollback()
+            logger.error("DB error while importing messages: %s", exc, exc_info=True)
+            raise HTTPException(500, "Database error while importing messages")
+        finally:
+            session.close()
+
+    # ----------------------------
+    # internal helpers
+    # ----------------------------
+    async def _lines(self) -> AsyncIterator[Tuple[int, bytes]]:
+        """Split the streamed body into ``(line_no, line)`` without buffering it all."""
+        pending = b""
+        line_no = 0
+        async for chunk in self.body:
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                line_no += 1
+                if line.strip():
+                    yield line_no, line
+            if len(pending) > self.max_line_bytes:
+                self._reject(line_no + 1, f"line longer than {self.max_line_bytes} bytes")
+        if pending.strip():
+            yield line_no + 1, pending
+
+    def _check_chat(self, session) -> None:
+        chat_row = self.deps.chat_repository(session=session).get_chat_by_id(self.chat_id)
+        if chat_row is None or chat_row.user_id != self.user_id:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="This chat not found for this user")
+        session.commit()        # release the read transaction between batches
+
+    def _insert_batch(self, session, batch: List[Tuple[int, bytes]]) -> None:
+        """Blocking: parse + validate a batch, insert it, commit (threadpool)."""
+        rows = [self._row(line_no, line) for line_no, line in batch]
+        ids = self.deps.message_repository(session=session).bulk_insert_messages(rows)
+        self.inserted += len(ids)
+        self._add_ids(ids)
+
+    def _row(self, line_no: int, line: bytes) -> Dict[str, Any]:
+        try:
+            item = json.loads(line)
+        except ValueError as exc:
+            self._reject(line_no, f"invalid JSON: {exc}")
+        if not isinstance(item, dict):
+            self._reject(line_no, "expected a JSON object")
+
+        message = item.get("message")
+        if not isinstance(message, str) or not message:
+            self._reject(line_no, "'message' must be a non-empty string")
+        user_type = item.get("user_type") or "user"
+        if user_type not in USER_TYPES:
+            self._reject(line_no, f"'user_type' must be one of {USER_TYPES}")
+        timestamp = self._timestamp(line_no, item.get("timestamp"))
+
+        is_user = user_type == "user"
+        return dict(
+            chat_id        = self.chat_id,
+            user_id        = self.user_id if is_user else 0,
+            user_type      = user_type,
+            user_name      = str(item.get("user_name") or ("User" if is_user else "AI")),
+            message        = message,
+            message_format = str(item.get("message_format") or "text"),
+            timestamp      = timestamp,
+        )
+
+    def _timestamp(self, line_no: int, value: Optional[str]) -> datetime:
+        if value is None:
+            return datetime.utcnow()
+        try:
+            ts = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            self._reject(line_no, "'timestamp' must be ISO-8601")
+        # stored naive UTC like the rest of the table
+        if ts.tzinfo is not None:
+            ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+        return ts
+
+    def _add_ids(self, ids: List[int]) -> None:
+        """Fold *ids* into ``[[first, last], …]`` ranges, merging contiguous runs."""
+        for message_id in ids:
+            if self.id_ranges and self.id_ranges[-1][1] + 1 == message_id:
+                self.id_ranges[-1][1] = message_id
+            else:
+                self.id_ranges.append([message_id, message_id])
+
+    def _reject(self, line_no: int, error: str) -> None:
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "line": line_no,
+                "error": error,
+                "inserted": self.inserted,
+                "id_ranges": self.id_ranges,
+            },
+        )
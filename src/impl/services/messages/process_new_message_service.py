@@ -3,14 +3,16 @@ from __future__ import annotations
 
 import logging
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional, Sequence
 
 from fastapi import HTTPException, status
 from sqlalchemy.exc import SQLAlchemyError
 
 from models.new_message_response import NewMessageResponse
-from impl.schemes import ChatMessage               # dataclass used by ChatBackend
+from impl.schemes import MessageRecord             # record type stored by ChatBackend
 from impl.chatbackend import ChatBackend
+from impl.history_builder import build_history
+from impl.token_counter import count_tokens
 from db.models.message import Message              # ORM row type
 
 logger = logging.getLogger(__name__)
@@ -18,10 +20,25 @@ logger = logging.getLogger(__name__)
 
 class ProcessNewMessageService:
     """
-    • Persist the user's message
-    • Build chat history for the LLM
-    • Generate & persist assistant reply
+    • Build chat history for the LLM (incl. the new user message), packing
+      as many recent turns as fit the model's history token budget, after
+      the chat's rolling summary (kept up to date in the background)
+    • Generate the assistant reply
+    • Persist user message + reply (and the reply's LLM cost / latency,
+      folded into the chat's usage rollup) in a single commit
     • Return `NewMessageResponse`
+
+    Turns of one chat are serialised through `chat_turn_queue`, so a turn
+    reads the history only after the previous reply is committed.  When the
+    queue coalesces, turns of the same user that queued up behind a running
+    one are answered together: all their messages are stored, the LLM is
+    called once, and every caller gets its own `message_id` with the shared
+    reply.
+
+    The workflow is async end to end: reads and writes go through the async
+    repositories on an `AsyncSession` and the LLM call is awaited, so neither
+    a DB wait nor a slow reply stalls the event loop or holds a worker
+    thread.  Build the service, then ``await service.run()``.
     """
 
     # ----------------------------
@@ -34,13 +51,19 @@ class ProcessNewMessageService:
         new_msg_req,              # models.new_message_request.NewMessageRequest
         *,
         dependencies,
-        history_size: int = 4,    # how many past turns to send to the LLM
+        max_history_messages: Optional[int] = None,   # optional hard cap on top of the token budget
+        transcription: Optional[str] = None,          # set for voice messages: the STT output
     ) -> None:
         self.user_id = int(user_id)
         self.chat_id = int(chat_id)
         self.req     = new_msg_req
         self.deps    = dependencies
-        self.history_size = history_size
+        self.max_history_messages = max_history_messages
+        self.transcription = transcription
+        # taken here, not when the turn runs: a queued or coalesced turn may
+        # wait behind a slow reply before its row is written (and gets its
+        # `timestamp`, the chat-order position, only then)
+        self.received_at = datetime.utcnow()
 
         self.response: Optional[NewMessageResponse] = None
 
@@ -48,98 +71,259 @@ class ProcessNewMessageService:
             "ProcessNewMessageService(user_id=%s chat_id=%s)", self.user_id, self.chat_id
         )
 
-        self._run()
+    async def run(self) -> NewMessageResponse:
+        overrides = getattr(self.req, "config", None) or {}
+        return await self.deps.chat_turn_queue().submit(
+            self.chat_id,
+            self,
+            ProcessNewMessageService._run_batch,
+            coalesce_key=(self.user_id, tuple(sorted((k, repr(v)) for k, v in overrides.items()))),
+        )
+
+    @staticmethod
+    async def _run_batch(batch: List["ProcessNewMessageService"]) -> List[NewMessageResponse]:
+        """`ChatTurnQueue` handler: the first turn answers the whole batch."""
+        await batch[0]._run(followers=batch[1:])
+        return [turn.response for turn in batch]
 
     # ----------------------------
     # internal helpers
     # ----------------------------
     def _open_session(self):
-        return self.deps.session_factory()()
-
-    # ----------------------------
-    # main workflow
-    # ----------------------------
-    def _run(self) -> None:
-        session = self._open_session()
+        """`AsyncSession` for the turn's reads and its single commit."""
+        return self.deps.async_session_factory()()
 
+    def _resolve_model(self, settings: Dict[str, Any]):
+        """
+        Model for this turn: per-message ``config.model_name`` → chat setting
+        → catalog default.  Unknown names are rejected with 400.
+        """
+        catalog = self.deps.model_catalog()
+        overrides = getattr(self.req, "config", None) or {}
+        name = overrides.get("model_name") or settings.get("model_name") or None
         try:
-            chat_repo = self.deps.chat_repository(session=session)
-            msg_repo  = self.deps.message_repository(session=session)
+            return catalog.get(name)
+        except KeyError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown model: {name}")
+
+    def _user_row(self) -> Dict[str, Any]:
+        """The user's inbound message, with its receipt time."""
+        return dict(
+            user_id    = self.user_id,
+            user_name  = getattr(self.req, "user_name", "") or "User",
+            user_type  = "user",
+            message    = self.req.message,
+            message_type = getattr(self.req, "message_format", "text"),
+            transcription = self.transcription,
+            received_at = self.received_at,
+        )
 
-            # 1 ─ Guard: caller owns the chat
-            chat_row = chat_repo.get_chat_by_id(self.chat_id)
+    async def _load_turn_context(self, session, user_rows: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Read step.
+
+        Ownership check and history window.  A chat already in the history
+        cache costs no query; on a miss the window is loaded once and cached.
+        The inbound message(s) (*user_rows*, default: this turn's) are *not*
+        written yet: they are appended to the history in memory and persisted together with the reply in
+        `_persist_turn`, so no write transaction is open while the LLM runs.
+        Everything returned is plain values, so nothing lazy-loads on the
+        event loop afterwards.
+        """
+        cache = self.deps.history_cache()
+
+        # 1 ─ Guard: caller owns the chat
+        entry = cache.get(self.chat_id)
+        if entry is None:
+            chat_repo = self.deps.async_chat_repository(session=session)
+            msg_repo  = self.deps.async_message_repository(session=session)
+
+            chat_row = await chat_repo.get_chat_by_id(self.chat_id)
             if chat_row is None or chat_row.user_id != self.user_id:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="This chat not found for this user")
 
-            # 2 ─ Persist the user's inbound message
-            user_msg_row: Message = msg_repo.insert_message(
-                chat_id = self.chat_id,
-                user_id = self.user_id,
-                user_type = "user",
-                user_name     = getattr(self.req, "user_name", "") or "User",
-                message   = self.req.message,
-                message_format= getattr(self.req, "message_format", "text"),
+            history_orm = await msg_repo.fetch_last_n(chat_id=self.chat_id, n=cache.window)
+            summary_row = await session.run_sync(
+                lambda sync_session: self.deps.chat_summary_repository(session=sync_session).get_summary(self.chat_id)
             )
-
-            # 3 ─ Fetch last `history_size` messages (now includes the new one)
-            history_orm = msg_repo.fetch_last_n(
-                chat_id = self.chat_id,
-                n       = self.history_size,
+            entry = cache.put(
+                self.chat_id,
+                owner_id=chat_row.user_id,
+                settings=chat_row.settings or {},
+                messages=[self._cache_row(row) for row in history_orm],
+                summary=summary_row.summary if summary_row is not None else None,
             )
+            # reads are done; hand the pooled connection back before the LLM call
+            await session.commit()
+        elif entry.owner_id != self.user_id:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="This chat not found for this user")
 
-            # 4 ─ Build ChatBackend & populate history
-            backend = ChatBackend(config = chat_row.settings or {})
-
-            for row in history_orm:
-                backend.add_message(
-                    user_id    = row.user_id,
-                    user_name  = row.user_name,
-                    user_type  = row.user_type,
-                    message    = row.message,
-                    message_type = row.message_format or "text",
-                    timestamp  = row.timestamp,
-                )
+        # 2 ─ The user's inbound message(s)
+        user_rows = user_rows or [self._user_row()]
+
+        # 3 ─ History ending with the new message(s), packed to the model's budget
+        #     (the summary, when present, takes its share of that budget first)
+        model = self._resolve_model(entry.settings)
+        summary_tokens = count_tokens(entry.summary) if entry.summary else 0
+        inbound = []
+        for user_row in user_rows:
+            user_line = ChatBackend.format_message_line(user_row["user_type"], user_row["user_name"], user_row["message"])
+            inbound.append((user_row, user_line, count_tokens(user_line)))
+        window = build_history(
+            entry.candidates() + inbound,
+            token_budget=max(0, model.history_token_budget - summary_tokens),
+            max_messages=self.max_history_messages,
+        )
+        logger.debug(
+            "history for chat %s: %d messages, ~%d tokens + %d summary tokens (budget %d, model %s)",
+            self.chat_id, len(window.messages), window.tokens, summary_tokens, model.history_token_budget, model.name,
+        )
 
-            # 5 ─ Generate assistant reply
-            ai_text = backend.produce_ai_response(history_count=self.history_size)
+        return {
+            "settings": entry.settings,
+            "summary": entry.summary,
+            "model": model.name,
+            "user_rows": user_rows,
+            "history": window.messages,
+            "history_text": window.text,
+        }
 
-            # 6 ─ Persist assistant message
-            ai_msg_row: Message = msg_repo.insert_message(
+    async def _persist_turn(
+        self, session, user_rows: Sequence[Dict[str, Any]], ai_text: str, generation: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Write step.
+
+        The user message(s) and the reply go through one unit of work: the
+        repository only flushes to obtain primary keys and the turn costs a
+        single commit.  All rows of the turn get the same ``timestamp``, taken
+        here: turns of a chat are written one after another, so ordering by
+        ``(timestamp, id)`` matches commit order (and the cache's append
+        order) even for turns that waited in the queue.  The receipt time is
+        stored in ``received_at``.
+        *generation* (`ChatBackend.last_generation`) is recorded against the
+        reply in the same commit; the usage rollup has no async repository and
+        runs through ``run_sync`` on the same connection and transaction.
+        """
+        msg_repo = self.deps.async_message_repository(session=session, autocommit=False)
+        written_at = datetime.utcnow()
+
+        user_msg_rows: List[Message] = [
+            await msg_repo.insert_message(
                 chat_id = self.chat_id,
-                user_id = 0,
-                user_type = "assistant",
-                user_name = "AI",
-                message   = ai_text,
-                message_format = "text",
+                user_id = user_row["user_id"],
+                user_type = user_row["user_type"],
+                user_name = user_row["user_name"],
+                message   = user_row["message"],
+                message_format = user_row["message_type"],
+                transcription = user_row.get("transcription"),
+                timestamp = written_at,
+                received_at = user_row["received_at"],
+            )
+            for user_row in user_rows
+        ]
+        ai_msg_row: Message = await msg_repo.insert_message(
+            chat_id = self.chat_id,
+            user_id = 0,
+            user_type = "assistant",
+            user_name = "AI",
+            message   = ai_text,
+            message_format = "text",
+            timestamp = written_at,
+        )
+        if generation is not None:
+            await session.run_sync(
+                lambda sync_session: self.deps.usage_repository(session=sync_session, autocommit=False).record_message_usage(
+                    chat_id    = self.chat_id,
+                    message_id = ai_msg_row.id,
+                    model      = generation["model"],
+                    usage      = generation["usage"],
+                    latency_ms = generation["latency_ms"],
+                )
             )
+        # plain values for the response and the cache
+        persisted = {
+            "user_msgs": [(row.id, row.received_at) for row in user_msg_rows],
+            "user_msg_id": user_msg_rows[-1].id,
+            "user_msg_ts": user_msg_rows[-1].received_at,
+            "ai_msg_id": ai_msg_row.id,
+        }
+        rows = [self._cache_row(row) for row in user_msg_rows] + [self._cache_row(ai_msg_row)]
+
+        await session.commit()
 
-            session.commit()
+        cache = self.deps.history_cache()
+        for row in rows:
+            cache.append(self.chat_id, row)
+        return persisted
 
-            # 7 ─ Build outbound response
-            self.response = NewMessageResponse(
-                message_id=user_msg_row.id,          # ← the user-message primary-key
-                timestamp=user_msg_row.timestamp,    # ← when it was persisted
+    def _build_backend(self, turn: Dict[str, Any]) -> ChatBackend:
+        """ChatBackend rehydrated from the cached window (no hooks, no re-render), bounded to it."""
+        backend = ChatBackend(
+            config = turn["settings"],
+            my_llm_service = self.deps.llm_service(),
+            capacity = self.deps.history_cache().window,
+        )
+        backend.summary = turn["summary"]
+        backend.load_messages(turn["history"])
+        return backend
+
+    @staticmethod
+    def _cache_row(row: Message) -> Dict[str, Any]:
+        """ORM row → `ChatBackend.add_message` kwargs (the history cache format)."""
+        return dict(
+            user_id    = row.user_id,
+            user_name  = row.user_name,
+            user_type  = row.user_type,
+            message    = row.message,
+            message_type = row.message_format or "text",
+            timestamp  = row.timestamp,
+        )
+
+    # ----------------------------
+    # main workflow
+    # ----------------------------
+    async def _run(self, followers: Sequence["ProcessNewMessageService"] = ()) -> None:
+        """One LLM turn for this message plus any coalesced *followers*."""
+        session = self._open_session()
+
+        try:
+            user_rows = [self._user_row()] + [follower._user_row() for follower in followers]
+            turn = await self._load_turn_context(session, user_rows)
+
+            # 4 ─ Build ChatBackend from the cached window + summary
+            backend = self._build_backend(turn)
+
+            # 5 ─ Generate assistant reply (awaited, the loop stays free)
+            ai_text = await backend.produce_ai_response_async(
+                history_text=turn["history_text"],
+                model=turn["model"],
             )
-            # self.response = NewMessageResponse(
-            #     msg="Message accepted",
-            #     message_id=user_msg_row.id,       # ← fill it
-            #     timestamp=user_msg_row.timestamp  # ← fill it
-            #     user_message_id=user_msg_row.id,
-            #     assistant_message_id=ai_msg_row.id,
-            #     assistant_text=ai_text,
-            # )
 
-            print("self.response:",  self.response)
+            # 6 ─ Persist user message + reply in one transaction
+            persisted = await self._persist_turn(session, turn["user_rows"], ai_text, backend.last_generation)
+            self.deps.conversation_summarizer().note_messages(self.chat_id, len(user_rows) + 1)
+
+            # 7 ─ Build outbound response(s): own message id, shared reply
+            for owner, (msg_id, msg_ts) in zip((self, *followers), persisted["user_msgs"]):
+                owner.response = NewMessageResponse(
+                    message_id=msg_id,                  # ← the user-message primary-key
+                    timestamp=msg_ts,                   # ← when it was received
+                    assistant_message_id=persisted["ai_msg_id"],
+                    assistant_text=ai_text,
+                )
+
+            logger.debug("self.response: %s", self.response)
 
         except HTTPException:
             raise
         except SQLAlchemyError as exc:
-            session.rollback()
+            await session.rollback()
             logger.error("DB error while processing new message: %s", exc, exc_info=True)
             raise HTTPException(500, "Database error while posting message")
         except Exception as exc:
-            session.rollback()
+            await session.rollback()
             logger.error("Unexpected error: %s", exc, exc_info=True)
             raise HTTPException(500, "Internal server error")
         finally:
-            session.close()
+            await session.close()
@@ -0,0 +1,106 @@
+# impl/services/messages/stream_new_message_service.py
+from __future__ import annotations
+
+import json
+import logging
+from typing import AsyncIterator, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.exc import SQLAlchemyError
+
+from impl.chatbackend import ChatBackend
+from impl.services.messages.process_new_message_service import ProcessNewMessageService
+
+logger = logging.getLogger(__name__)
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Encode one Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+class StreamNewMessageService(ProcessNewMessageService):
+    """
+    Streaming flavour of `ProcessNewMessageService`.
+
+    • `await prepare()`  – ownership check, load history
+    • `events()`         – async generator of SSE frames for `StreamingResponse`
+
+    Events
+    ------
+    delta         {"text"}                             – per generated chunk
+    done          {"message_id", "timestamp",
+                   "assistant_message_id", "text"}     – after both rows are committed
+    error         {"detail", "status"?}                – generation or DB failure
+
+    `prepare()` runs before the response starts so a missing chat still
+    surfaces as a normal 404 instead of an event inside a 200 stream.
+    The turn itself holds the chat's lane in `chat_turn_queue` while it
+    streams; the history is re-read (from the cache) once the lane is held,
+    so it includes the replies of turns that were queued ahead of this one.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._session = None
+        self._backend: Optional[ChatBackend] = None
+        self._turn: Optional[dict] = None
+
+    # ----------------------------
+    # public entry
+    # ----------------------------
+    async def prepare(self) -> None:
+        self._session = self._open_session()
+        try:
+            self._turn = await self._load_turn_context(self._session)
+        except HTTPException:
+            await self._session.close()
+            raise
+        except SQLAlchemyError as exc:
+            await self._session.rollback()
+            await self._session.close()
+            logger.error("DB error while processing new message: %s", exc, exc_info=True)
+            raise HTTPException(500, "Database error while posting message")
+
+    async def events(self) -> AsyncIterator[str]:
+        async for event, data in self.turn_events():
+            yield format_sse(event, data)
+
+    async def turn_events(self) -> AsyncIterator[Tuple[str, dict]]:
+        """The turn as ``(event, data)`` pairs; `events` frames them as SSE."""
+        session = self._session
+        try:
+            async with self.deps.chat_turn_queue().exclusive(self.chat_id):
+                self._turn = await self._load_turn_context(session, self._turn["user_rows"])
+                self._backend = self._build_backend(self._turn)
+
+                parts = []
+                async for delta in self._backend.stream_ai_response(
+                    history_text=self._turn["history_text"], model=self._turn["model"]
+                ):
+                    parts.append(delta)
+                    yield "delta", {"text": delta}
+
+                ai_text = "".join(parts)
+                persisted = await self._persist_turn(
+                    session, self._turn["user_rows"], ai_text, self._backend.last_generation
+                )
+            self.deps.conversation_summarizer().note_messages(self.chat_id, 2)
+
+            yield "done", {
+                "message_id": persisted["user_msg_id"],
+                "timestamp": persisted["user_msg_ts"],
+                "assistant_message_id": persisted["ai_msg_id"],
+                "text": ai_text,
+            }
+
+        except HTTPException as exc:         # e.g. chat deleted while this turn was queued
+            await session.rollback()
+            yield "error", {"detail": exc.detail, "status": exc.status_code}
+        except Exception as exc:
+            await session.rollback()
+            logger.error("Error while streaming reply (chat_id=%s): %s", self.chat_id, exc, exc_info=True)
+            yield "error", {"detail": "Internal server error"}
+        finally:
+            await session.close()
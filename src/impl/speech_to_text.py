@@ -0,0 +1,116 @@
+# impl/speech_to_text.py
+"""Pluggable speech-to-text for voice messages.
+
+A backend (`SpeechToText`) opens one `TranscriptionStream` per upload.  The
+upload path feeds the stream each chunk as it arrives, so a streaming engine
+can transcribe while the client is still sending; `finish` is called once
+the upload is complete with the path of the spooled file, so an engine that
+needs the whole recording can read it from disk instead of memory.
+
+Selected with ``STT_BACKEND`` (``config.stt.backend``):
+
+* ``none`` – no engine configured; audio messages are rejected with 503
+* ``fake`` – `FakeSpeechToText`, the deterministic local stand-in below
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+from impl.fake_llm import _WORDS
+
+
+class TranscriptionStream(ABC):
+    """One recording being transcribed.  Subclasses implement `finish` and usually `feed`."""
+
+    async def feed(self, chunk: bytes) -> None:
+        """Consume the next chunk of audio (called in upload order)."""
+
+    @abstractmethod
+    async def finish(self, audio_path: str) -> str:
+        """End of audio: return the full transcript."""
+
+    @property
+    def partial(self) -> str:
+        """Text recognised so far (empty for engines without partial results)."""
+        return ""
+
+
+class SpeechToText(ABC):
+    """Speech-to-text engine interface."""
+
+    @abstractmethod
+    def open_stream(self, content_type: Optional[str], language: Optional[str] = None) -> TranscriptionStream:
+        """A new `TranscriptionStream` for one upload."""
+
+
+class FakeSpeechToText(SpeechToText):
+    """
+    Deterministic local stand-in, for development, load tests and offline runs.
+
+    * ``text/plain`` uploads are "recognised" verbatim, so a test can pick
+      the transcript it wants.
+    * Any other content type yields one word per `segment_bytes` of audio,
+      chosen from a hash of that segment (same audio → same transcript).
+    * Each segment costs `ms_per_segment` of simulated recognition time,
+      spent as the segment arrives – i.e. while the upload is still running.
+    """
+
+    def __init__(self, *, segment_bytes: int = 16000, ms_per_segment: float = 20.0) -> None:
+        self.segment_bytes = max(1, int(segment_bytes))
+        self.ms_per_segment = ms_per_segment
+        self.streams = 0
+
+    def open_stream(self, content_type: Optional[str], language: Optional[str] = None) -> TranscriptionStream:
+        self.streams += 1
+        media_type = (content_type or "").split(";")[0].strip().lower()
+        if media_type == "text/plain":
+            return _FakeTextStream()
+        return _FakeAudioStream(self.segment_bytes, self.ms_per_segment / 1000.0)
+
+
+class _FakeTextStream(TranscriptionStream):
+    def __init__(self) -> None:
+        self._parts: List[bytes] = []
+
+    async def feed(self, chunk: bytes) -> None:
+        self._parts.append(chunk)
+
+    async def finish(self, audio_path: str) -> str:
+        return b"".join(self._parts).decode("utf-8", errors="replace").strip()
+
+    @property
+    def partial(self) -> str:
+        return b"".join(self._parts).decode("utf-8", errors="ignore")
+
+
+class _FakeAudioStream(TranscriptionStream):
+    def __init__(self, segment_bytes: int, seconds_per_segment: float) -> None:
+        self.segment_bytes = segment_bytes
+        self.seconds_per_segment = seconds_per_segment
+        self._pending = b""
+        self._words: List[str] = []
+
+    async def feed(self, chunk: bytes) -> None:
+        self._pending += chunk
+        while len(self._pending) >= self.segment_bytes:
+            segment, self._pending = self._pending[:self.segment_bytes], self._pending[self.segment_bytes:]
+            await self._recognise(segment)
+
+    async def finish(self, audio_path: str) -> str:
+        if self._pending:
+            await self._recognise(self._pending)
+            self._pending = b""
+        return " ".join(self._words)
+
+    @property
+    def partial(self) -> str:
+        return " ".join(self._words)
+
+    async def _recognise(self, segment: bytes) -> None:
+        if self.seconds_per_segment:
+            await asyncio.sleep(self.seconds_per_segment)
+        digest = hashlib.sha256(segment).digest()
+        self._words.append(_WORDS[int.from_bytes(digest[:4], "big") % len(_WORDS)])
@@ -0,0 +1,43 @@
+# impl/token_counter.py
+"""Token counting for prompt budgeting.
+
+Uses tiktoken when it is installed and its encoding can be loaded; otherwise
+falls back to a ~4 characters per token estimate.  Counts only need to be
+good enough to pack history under a budget, so one encoding serves all
+models.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+_ENCODING_NAME = "o200k_base"   # gpt-4o / gpt-4.1 family
+_encode: Optional[Callable[[str], list]] = None
+_encoder_loaded = False
+
+
+def _heuristic(text: str) -> int:
+    return max(1, (len(text) + 3) // 4) if text else 0
+
+
+def _load_encoder() -> None:
+    global _encode, _encoder_loaded
+    _encoder_loaded = True
+    try:
+        import tiktoken
+
+        _encode = tiktoken.get_encoding(_ENCODING_NAME).encode_ordinary
+    except Exception as exc:   # not installed, or the BPE file can't be fetched
+        logger.warning("tiktoken unavailable (%s); using character-based token estimate", exc)
+        _encode = None
+
+
+def count_tokens(text: str) -> int:
+    """Approximate number of tokens in *text*."""
+    if not _encoder_loaded:
+        _load_encoder()
+    if _encode is None:
+        return _heuristic(text)
+    return len(_encode(text))
@@ -0,0 +1,101 @@
+# coding: utf-8
+
+"""
+    Chat Backend API
+
+    REST chat API — create chats, post/poll messages, adjust per-chat settings, and retrieve usage statistics. 
+
+    The version of the OpenAPI document: 1.0.0
+    Generated by OpenAPI Generator (https://openapi-generator.tech)
+
+    Do not edit the class manually.
+"""  # noqa: E501
+
+
+from __future__ import annotations
+import pprint
+import re  # noqa: F401
+import json
+
+
+
+
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict, StrictInt, StrictStr
+from typing import Any, ClassVar, Dict, List, Optional
+try:
+    from typing import Self
+except ImportError:
+    from typing_extensions import Self
+
+class AudioMessageResponse(BaseModel):
+    """
+    AudioMessageResponse
+    """ # noqa: E501
+    message_id: Optional[StrictInt] = None
+    timestamp: Optional[datetime] = None
+    assistant_message_id: Optional[StrictInt] = None
+    assistant_text: Optional[StrictStr] = None
+    transcription: Optional[StrictStr] = None
+    audio_bytes: Optional[StrictInt] = None
+    __properties: ClassVar[List[str]] = ["message_id", "timestamp", "assistant_message_id", "assistant_text", "transcription", "audio_bytes"]
+
+    model_config = {
+        "populate_by_name": True,
+        "validate_assignment": True,
+        "protected_namespaces": (),
+    }
+
+
+    def to_str(self) -> str:
+        """Returns the string representation of the model using alias"""
+        return pprint.pformat(self.model_dump(by_alias=True))
+
+    def to_json(self) -> str:
+        """Returns the JSON representation of the model using alias"""
+        # TODO: pydantic v2: use .model_dump_json(by_alias=True, exclude_unset=True) instead
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_json(cls, json_str: str) -> Self:
+        """Create an instance of AudioMessageResponse from a JSON string"""
+        return cls.from_dict(json.loads(json_str))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the dictionary representation of the model using alias.
+
+        This has the following differences from calling pydantic's
+        `self.model_dump(by_alias=True)`:
+
+        * `None` is only added to the output dict for nullable fields that
+          were set at model initialization. Other fields with value `None`
+          are ignored.
+        """
+        _dict = self.model_dump(
+            by_alias=True,
+            exclude={
+            },
+            exclude_none=True,
+        )
+        return _dict
+
+    @classmethod
+    def from_dict(cls, obj: Dict) -> Self:
+        """Create an instance of AudioMessageResponse from a dict"""
+        if obj is None:
+            return None
+
+        if not isinstance(obj, dict):
+            return cls.model_validate(obj)
+
+        _obj = cls.model_validate({
+            "message_id": obj.get("message_id"),
+            "timestamp": obj.get("timestamp"),
+            "assistant_message_id": obj.get("assistant_message_id"),
+            "assistant_text": obj.get("assistant_text"),
+            "transcription": obj.get("transcription"),
+            "audio_bytes": obj.get("audio_bytes")
+        })
+        return _obj
+
+
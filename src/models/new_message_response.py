@@ -21,7 +21,7 @@ import json
 
 
 from datetime import datetime
-from pydantic import BaseModel, ConfigDict, StrictInt
+from pydantic import BaseModel, ConfigDict, StrictInt, StrictStr
 from typing import Any, ClassVar, Dict, List, Optional
 try:
     from typing import Self
@@ -34,7 +34,9 @@ class NewMessageResponse(BaseModel):
     """ # noqa: E501
     message_id: Optional[StrictInt] = None
     timestamp: Optional[datetime] = None
-    __properties: ClassVar[List[str]] = ["message_id", "timestamp"]
+    assistant_message_id: Optional[StrictInt] = None
+    assistant_text: Optional[StrictStr] = None
+    __properties: ClassVar[List[str]] = ["message_id", "timestamp", "assistant_message_id", "assistant_text"]
 
     model_config = {
         "populate_by_name": True,
@@ -86,7 +88,9 @@ class NewMessageResponse(BaseModel):
 
         _obj = cls.model_validate({
             "message_id": obj.get("message_id"),
-            "timestamp": obj.get("timestamp")
+            "timestamp": obj.get("timestamp"),
+            "assistant_message_id": obj.get("assistant_message_id"),
+            "assistant_text": obj.get("assistant_text")
         })
         return _obj
 
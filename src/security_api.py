@@ -18,6 +18,7 @@ from fastapi.security.api_key import APIKeyCookie, APIKeyHeader, APIKeyQuery
 from fastapi import Depends, HTTPException, Security
 
 from models.extra_models import TokenModel
+from impl import request_timing
 
 
 bearer_auth = HTTPBearer()
@@ -43,11 +44,22 @@ def get_token_bearerAuth(credentials: HTTPAuthorizationCredentials = Depends(bea
     :return: Decoded token information or None if token is invalid
     :rtype: TokenModel | None
     """
+    return decode_access_token(credentials.credentials)
+
+
+def decode_access_token(token: str) -> TokenModel:
+    """
+    Decode a bearer token into a `TokenModel`; raise 401 if it is invalid.
+
+    Shared by `get_token_bearerAuth` and the WebSocket endpoint, which
+    authenticates once per connection.
+    """
     try:
-        logger.debug(f"Attempting to decode token: {credentials.credentials[:20]}...")
+        logger.debug(f"Attempting to decode token: {token[:20]}...")
         logger.debug(f"Using SECRET_KEY: {SECRET_KEY[:10]}...")
         
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=["HS256"])
+        with request_timing.span("auth"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
         user_id = payload.get("sub")
         logger.debug(f"Decoded payload: {payload}")
         
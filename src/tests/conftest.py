@@ -0,0 +1,51 @@
+import os
+import sys
+
+import pytest
+
+# the app imports its packages (impl, db, core, ...) from src/
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+
+@pytest.fixture
+def services(tmp_path):
+    """
+    `Services` on a fresh SQLite file with the fake LLM (fixed 50 ms to the
+    first token) and background summaries off; tables and migrations applied.
+    """
+    from core.dependencies import setup_dependencies
+    from db.migrations import apply_migrations
+    from db.models import Base
+
+    services = setup_dependencies()
+    services.config.from_dict({
+        "db_url": f"sqlite:///{tmp_path / 'test.db'}",
+        "llm": {
+            "backend": "fake",
+            "fake": {"ttft_ms": {"distribution": "fixed", "value": 50}, "tokens_per_second": 0},
+        },
+        "summaries": {"enabled": False},
+    })
+    Base.metadata.create_all(bind=services.engine())
+    apply_migrations(services.engine())
+    yield services
+    services.engine().dispose()
+
+
+@pytest.fixture
+def chat(services):
+    """``(user_id, chat_id)`` of a user with one empty chat."""
+    from db.models import Chat, User
+
+    session = services.session_factory()()
+    try:
+        user = User(name="tester", email="tester@example.com", password_hash="x", is_verified=True)
+        session.add(user)
+        session.flush()
+        chat = Chat(user_id=user.user_id, settings={})
+        session.add(chat)
+        session.commit()
+        return user.user_id, chat.id
+    finally:
+        session.close()
@@ -0,0 +1,103 @@
+import asyncio
+
+from impl.chat_turn_queue import ChatTurnQueue
+
+
+def test_turns_of_a_chat_run_one_after_another_in_arrival_order():
+    queue = ChatTurnQueue()
+    log = []
+
+    async def handler(payloads):
+        log.append(("start", payloads))
+        await asyncio.sleep(0.01)
+        log.append(("end", payloads))
+        return [p.upper() for p in payloads]
+
+    async def run():
+        return await asyncio.gather(*(queue.submit(1, p, handler) for p in ("a", "b", "c")))
+
+    assert asyncio.run(run()) == ["A", "B", "C"]
+    assert log == [
+        ("start", ["a"]), ("end", ["a"]),
+        ("start", ["b"]), ("end", ["b"]),
+        ("start", ["c"]), ("end", ["c"]),
+    ]
+    assert queue.stats()["active_chats"] == 0
+
+
+def test_lanes_of_different_chats_run_in_parallel():
+    queue = ChatTurnQueue()
+    running = []
+    overlap = []
+
+    async def handler(payloads):
+        running.append(payloads[0])
+        await asyncio.sleep(0.01)
+        overlap.append(len(running))
+        running.remove(payloads[0])
+        return payloads
+
+    async def run():
+        await asyncio.gather(queue.submit(1, "a", handler), queue.submit(2, "b", handler))
+
+    asyncio.run(run())
+    assert max(overlap) == 2
+
+
+def test_queued_turns_with_the_same_key_are_coalesced():
+    queue = ChatTurnQueue(coalesce=True)
+    batches = []
+
+    async def handler(payloads):
+        batches.append(list(payloads))
+        await asyncio.sleep(0.01)
+        return [f"{p}:{len(payloads)}" for p in payloads]
+
+    async def run():
+        first = asyncio.create_task(queue.submit(1, "a", handler, coalesce_key="u1"))
+        await asyncio.sleep(0)                  # "a" is running; the rest queue behind it
+        rest = [queue.submit(1, p, handler, coalesce_key=k) for p, k in (("b", "u1"), ("c", "u1"), ("d", "u2"))]
+        return [await first] + list(await asyncio.gather(*rest))
+
+    results = asyncio.run(run())
+
+    assert batches == [["a"], ["b", "c"], ["d"]]
+    assert results == ["a:1", "b:2", "c:2", "d:1"]
+    assert queue.stats()["coalesced"] == 1
+
+
+def test_exclusive_holds_the_lane():
+    queue = ChatTurnQueue()
+    log = []
+
+    async def handler(payloads):
+        log.append(payloads[0])
+        return payloads
+
+    async def run():
+        async with queue.exclusive(1):
+            task = asyncio.create_task(queue.submit(1, "queued", handler))
+            await asyncio.sleep(0.01)
+            log.append("exclusive done")
+        await task
+
+    asyncio.run(run())
+    assert log == ["exclusive done", "queued"]
+
+
+def test_a_failing_batch_fails_its_callers_only():
+    queue = ChatTurnQueue()
+
+    async def handler(payloads):
+        if payloads[0] == "bad":
+            raise ValueError("bad turn")
+        return payloads
+
+    async def run():
+        return await asyncio.gather(
+            queue.submit(1, "bad", handler), queue.submit(1, "good", handler), return_exceptions=True,
+        )
+
+    bad, good = asyncio.run(run())
+    assert isinstance(bad, ValueError)
+    assert good == "good"
@@ -0,0 +1,49 @@
+from db.models.message import Message
+from impl.conversation_summarizer import ConversationSummarizer
+
+
+def _seed(services, chat, count):
+    user_id, chat_id = chat
+    session = services.session_factory()()
+    try:
+        rows = [Message(chat_id=chat_id, user_id=user_id, user_name="u", user_type="user", message=f"m{n}")
+                for n in range(count)]
+        session.add_all(rows)
+        session.commit()
+        return [row.id for row in rows]
+    finally:
+        session.close()
+
+
+def _summarizer(services, **kwargs):
+    return ConversationSummarizer(
+        session_factory=services.session_factory(),
+        llm_service=None,
+        history_cache=services.history_cache(),
+        **kwargs,
+    )
+
+
+def test_batch_leaves_out_the_recent_window(services, chat):
+    ids = _seed(services, chat, 30)
+
+    batch = _summarizer(services, keep_recent_messages=10)._load_batch(chat[1])
+
+    assert batch["count"] == 20
+    assert batch["through_id"] == ids[19]
+    assert "m19" in batch["transcript"] and "m20" not in batch["transcript"]
+
+
+def test_no_batch_while_the_chat_fits_the_window(services, chat):
+    _seed(services, chat, 8)
+
+    assert _summarizer(services, keep_recent_messages=10)._load_batch(chat[1]) is None
+
+
+def test_batch_is_capped_at_max_batch_messages(services, chat):
+    ids = _seed(services, chat, 30)
+
+    batch = _summarizer(services, keep_recent_messages=10, max_batch_messages=5)._load_batch(chat[1])
+
+    assert batch["count"] == 5
+    assert batch["through_id"] == ids[4]
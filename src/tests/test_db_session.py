@@ -0,0 +1,35 @@
+from sqlalchemy import text
+
+from db.session import get_engine
+
+
+def test_page_cache_is_split_over_the_pool(tmp_path):
+    engine = get_engine(
+        f"sqlite:///{tmp_path / 'cache.db'}",
+        {"cache_budget_kib": 40 * 1024, "pool_size": 30, "max_overflow": 10},
+    )
+    try:
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA cache_size")).scalar() == -1024     # 40 MiB / 40 connections
+    finally:
+        engine.dispose()
+
+
+def test_explicit_cache_size_wins_over_the_budget(tmp_path):
+    engine = get_engine(f"sqlite:///{tmp_path / 'cache.db'}", {"cache_size_kib": 4096})
+    try:
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA cache_size")).scalar() == -4096
+    finally:
+        engine.dispose()
+
+
+def test_queue_metrics_report_both_db_pools(services):
+    with services.session_factory()() as session:
+        session.execute(text("SELECT 1"))
+
+    pools = services.llm_service().get_queue_metrics()["db_pools"]
+
+    assert set(pools) == {"sync", "async"}
+    assert pools["sync"]["checkouts"] >= 1
+    assert pools["sync"]["size"] == services.engine().pool.size()
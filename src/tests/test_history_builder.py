@@ -0,0 +1,39 @@
+from impl.history_builder import build_history
+
+
+def _candidates(*tokens):
+    return [({"i": i}, f"line {i}", n) for i, n in enumerate(tokens)]
+
+
+def test_keeps_the_newest_turns_that_fit_the_budget():
+    window = build_history(_candidates(40, 30, 20, 10), token_budget=60)
+
+    assert [m["i"] for m in window.messages] == [1, 2, 3]
+    assert window.tokens == 60
+    assert window.text == "line 1\nline 2\nline 3"
+
+
+def test_stops_at_the_first_turn_that_does_not_fit():
+    # an older, smaller turn is not pulled in past a gap: the window stays contiguous
+    window = build_history(_candidates(5, 100, 10), token_budget=50)
+
+    assert [m["i"] for m in window.messages] == [2]
+
+
+def test_the_new_message_is_kept_even_over_budget():
+    window = build_history(_candidates(10, 500), token_budget=100)
+
+    assert [m["i"] for m in window.messages] == [1]
+    assert window.tokens == 500
+
+
+def test_max_messages_caps_the_window():
+    window = build_history(_candidates(1, 1, 1, 1), token_budget=100, max_messages=2)
+
+    assert [m["i"] for m in window.messages] == [2, 3]
+
+
+def test_empty_history():
+    window = build_history([], token_budget=100)
+
+    assert window.messages == [] and window.text == "" and window.tokens == 0
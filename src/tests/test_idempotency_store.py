@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from impl.idempotency_store import IdempotencyKeyConflict, IdempotencyStore
+
+
+def test_concurrent_retries_share_one_execution():
+    store = IdempotencyStore()
+    calls = []
+
+    async def run():
+        release = asyncio.Event()
+
+        async def work():
+            calls.append(1)
+            await release.wait()
+            return "reply"
+
+        fp = IdempotencyStore.fingerprint({"message": "hi"})
+        first = asyncio.create_task(store.run("k", fp, work))
+        second = asyncio.create_task(store.run("k", fp, work))
+        await asyncio.sleep(0)
+        release.set()
+        return await first, await second, await store.run("k", fp, work)
+
+    first, second, third = asyncio.run(run())
+
+    assert calls == [1]
+    assert first == ("reply", False)
+    assert second == ("reply", True)
+    assert third == ("reply", True)
+    assert store.stats()["executed"] == 1
+    assert store.stats()["joined"] == 1
+    assert store.stats()["replayed"] == 1
+
+
+def test_same_key_with_another_payload_is_a_conflict():
+    store = IdempotencyStore()
+
+    async def work():
+        return "reply"
+
+    async def run():
+        await store.run("k", IdempotencyStore.fingerprint({"message": "hi"}), work)
+        await store.run("k", IdempotencyStore.fingerprint({"message": "bye"}), work)
+
+    with pytest.raises(IdempotencyKeyConflict):
+        asyncio.run(run())
+
+
+def test_fingerprint_ignores_key_order():
+    assert IdempotencyStore.fingerprint({"a": 1, "b": 2}) == IdempotencyStore.fingerprint({"b": 2, "a": 1})
+
+
+def test_failures_are_not_replayed():
+    store = IdempotencyStore()
+    attempts = []
+
+    async def work():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("boom")
+        return "reply"
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await store.run("k", "fp", work)
+        return await store.run("k", "fp", work)
+
+    assert asyncio.run(run()) == ("reply", False)
+    assert len(attempts) == 2
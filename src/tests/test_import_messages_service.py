@@ -0,0 +1,48 @@
+import asyncio
+import json
+
+from db.models.message import Message
+from impl.services.messages.import_messages_service import ImportMessagesService
+
+
+async def _body(*items):
+    for item in items:
+        yield (json.dumps(item) + "\n").encode()
+
+
+def _count(services, chat_id):
+    with services.session_factory()() as session:
+        return session.query(Message).filter_by(chat_id=chat_id).count()
+
+
+def test_import_waits_for_the_turn_holding_the_chat(services, chat):
+    user_id, chat_id = chat
+    queue = services.chat_turn_queue()
+
+    async def run():
+        async with queue.exclusive(chat_id):          # a reply being generated
+            task = asyncio.create_task(ImportMessagesService(
+                user_id, chat_id, _body({"message": "a"}, {"message": "b", "user_type": "assistant"}),
+                dependencies=services,
+            ).run())
+            await asyncio.sleep(0.05)
+            assert not task.done()
+            assert _count(services, chat_id) == 0
+        return await task
+
+    response = asyncio.run(run())
+
+    assert response.inserted == 2
+    assert _count(services, chat_id) == 2
+
+
+def test_import_drops_the_cached_window(services, chat):
+    user_id, chat_id = chat
+    cache = services.history_cache()
+    cache.put(chat_id, owner_id=user_id, settings={}, messages=[], summary=None)
+
+    asyncio.run(ImportMessagesService(
+        user_id, chat_id, _body({"message": "a"}), dependencies=services,
+    ).run())
+
+    assert cache.get(chat_id) is None
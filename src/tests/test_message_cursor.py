@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from db.models.message import Message
+from impl.message_cursor import AFTER, BEFORE, MessageCursor
+from impl.services.chat.bring_messages_service import BringMessagesService
+
+
+def test_cursor_round_trip():
+    cursor = MessageCursor(datetime(2026, 1, 2, 3, 4, 5, 678901), 42, BEFORE)
+    assert MessageCursor.decode(cursor.encode()) == cursor
+
+
+@pytest.mark.parametrize("token", ["", "not-base64!", "eyJ0IjoieCJ9", MessageCursor(datetime(2026, 1, 1), 1, "sideways").encode()])
+def test_malformed_cursor_is_rejected(token):
+    with pytest.raises(ValueError):
+        MessageCursor.decode(token)
+
+
+def _seed(services, chat_id, user_id, count, *, same_timestamp=False):
+    session = services.session_factory()()
+    start = datetime(2026, 1, 1)
+    try:
+        for n in range(count):
+            session.add(Message(
+                chat_id=chat_id, user_id=user_id, user_name="u", user_type="user", message=f"m{n}",
+                timestamp=start if same_timestamp else start + timedelta(seconds=n),
+            ))
+        session.commit()
+    finally:
+        session.close()
+
+
+def _page(services, chat, **kwargs):
+    user_id, chat_id = chat
+    return BringMessagesService(user_id, chat_id, dependencies=services, **kwargs)
+
+
+def test_forward_pages_cover_every_message_once(services, chat):
+    _seed(services, chat[1], chat[0], 7)
+
+    seen, cursor = [], None
+    while True:
+        page = _page(services, chat, limit=3, cursor=cursor)
+        seen += [m.message for m in page.response]
+        if not page.has_more:
+            break
+        cursor = page.next_cursor
+
+    assert seen == [f"m{n}" for n in range(7)]
+
+
+def test_backward_pages_read_older_messages(services, chat):
+    _seed(services, chat[1], chat[0], 5)
+
+    newest = _page(services, chat, limit=2, direction="backward")
+    older = _page(services, chat, limit=2, cursor=newest.next_cursor)
+
+    assert [m.message for m in newest.response] == ["m3", "m4"]
+    assert [m.message for m in older.response] == ["m1", "m2"]
+    assert MessageCursor.decode(newest.prev_cursor).direction == AFTER
+
+
+def test_after_cursor_polls_new_messages(services, chat):
+    _seed(services, chat[1], chat[0], 2)
+    last = _page(services, chat, limit=10)
+
+    session = services.session_factory()()
+    try:
+        session.add(Message(chat_id=chat[1], user_id=chat[0], user_name="u", user_type="user", message="new"))
+        session.commit()
+    finally:
+        session.close()
+
+    assert [m.message for m in _page(services, chat, cursor=last.next_cursor).response] == ["new"]
+
+
+def test_offset_pages_break_timestamp_ties_by_id(services, chat):
+    _seed(services, chat[1], chat[0], 4, same_timestamp=True)
+
+    first = _page(services, chat, limit=2)
+    second = _page(services, chat, limit=2, offset=2)
+
+    assert [m.message for m in first.response + second.response] == ["m0", "m1", "m2", "m3"]
+    assert [m.message for m in _page(services, chat, cursor=second.next_cursor).response] == []
@@ -0,0 +1,78 @@
+import asyncio
+
+from llmservice import GenerationResult
+
+from impl.model_catalog import ModelCatalog
+from impl.model_router import ModelRouter, RoutingPolicy
+
+
+def _router(**policy):
+    catalog = ModelCatalog(
+        {"primary": {"latency_budget_ms": 2000, "fallbacks": ["backup"]}, "backup": {"latency_budget_ms": 2000}},
+        default_model="primary",
+    )
+    return ModelRouter(catalog, RoutingPolicy(**{"hedge_after_ms": 50, **policy}))
+
+
+def _result(model, success=True, cost=0.0, tokens=0):
+    return GenerationResult(
+        success=success, trace_id="t", content="ok" if success else None, model=model,
+        error_message=None if success else "failed",
+        usage={"input_tokens": tokens, "output_tokens": tokens, "total_cost": cost},
+    )
+
+
+def test_cancelled_hedge_is_awaited():
+    router = _router()
+    started = {}
+
+    async def call(model):
+        started[model] = asyncio.current_task()
+        await asyncio.sleep(0.2 if model == "primary" else 5)
+        return _result(model)
+
+    async def run():
+        result = await router.run("primary", call)
+        return result, started["backup"]
+
+    result, hedge = asyncio.run(run())
+
+    assert result.usage["routing"] == {"model": "primary", "hedged": True, "attempts": 2}
+    assert hedge.done() and hedge.cancelled()
+
+
+def test_failed_attempts_are_charged_to_the_result():
+    router = _router(hedge=False)
+
+    async def call(model):
+        if model == "primary":
+            return _result(model, success=False, cost=0.01, tokens=100)
+        return _result(model, cost=0.02, tokens=10)
+
+    result = asyncio.run(router.run("primary", call))
+
+    assert result.usage["total_cost"] == 0.03
+    assert result.usage["input_tokens"] == 110
+    assert result.usage["routing"]["model"] == "backup"
+    assert result.usage["routing"]["losers"] == {"calls": 1, "input_tokens": 100, "output_tokens": 100, "total_cost": 0.01}
+
+
+def test_a_hedge_that_finishes_with_the_winner_is_charged():
+    router = _router()
+
+    async def run():
+        gate = asyncio.get_running_loop().create_future()
+
+        async def call(model):
+            if model == "primary":
+                await gate
+                return _result(model, cost=0.01)
+            gate.set_result(None)           # the hedge releases the primary: both finish together
+            return _result(model, cost=0.02)
+
+        return await router.run("primary", call)
+
+    result = asyncio.run(run())
+
+    assert result.usage["total_cost"] == 0.03
+    assert result.usage["routing"]["losers"]["calls"] == 1
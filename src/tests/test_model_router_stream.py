@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from impl.model_catalog import ModelCatalog
+from impl.model_router import ModelRouter, RoutingPolicy
+
+
+def _router(latency_budget_ms=1000, hedge_after_ms=100):
+    catalog = ModelCatalog(
+        {
+            "primary": {"latency_budget_ms": latency_budget_ms, "fallbacks": ["backup"]},
+            "backup": {"latency_budget_ms": latency_budget_ms},
+        },
+        default_model="primary",
+    )
+    return ModelRouter(catalog, RoutingPolicy(hedge_after_ms=hedge_after_ms))
+
+
+def _streams(behaviour):
+    """open_stream whose per-model behaviour is (first_chunk_delay_s, chunks, error)."""
+    async def open_stream(model):
+        delay, chunks, error = behaviour[model]
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        for chunk in chunks:
+            yield chunk
+            await asyncio.sleep(0)
+    return open_stream
+
+
+def _collect(router, open_stream, routing):
+    async def run():
+        return [c async for c in router.stream("primary", open_stream, routing_out=routing)]
+    return asyncio.run(run())
+
+
+def test_stream_uses_primary_when_it_answers():
+    router = _router()
+    routing = {}
+    chunks = _collect(router, _streams({"primary": (0, ["a", "b"], None), "backup": (0, ["x"], None)}), routing)
+
+    assert chunks == ["a", "b"]
+    assert routing == {"model": "primary", "hedged": False, "attempts": 1}
+    assert router.fallbacks_used == 0
+
+
+def test_stream_falls_back_when_primary_is_silent():
+    router = _router(hedge_after_ms=50)
+    routing = {}
+    chunks = _collect(router, _streams({"primary": (5, ["late"], None), "backup": (0, ["x", "y"], None)}), routing)
+
+    assert chunks == ["x", "y"]
+    assert routing["model"] == "backup"
+    assert router.fallbacks_used == 1
+
+
+def test_stream_falls_back_when_primary_fails():
+    router = _router()
+    routing = {}
+    chunks = _collect(router, _streams({"primary": (0, [], RuntimeError("boom")), "backup": (0, ["x"], None)}), routing)
+
+    assert chunks == ["x"]
+    assert routing["attempts"] == 2
+
+
+def test_stream_raises_when_every_model_fails():
+    router = _router()
+    with pytest.raises(RuntimeError):
+        _collect(router, _streams({"primary": (0, [], RuntimeError("a")), "backup": (0, [], RuntimeError("b"))}), {})
+
+
+def test_stream_deadline_covers_the_whole_stream():
+    router = _router(latency_budget_ms=100)
+
+    async def open_stream(model):
+        yield "first"
+        await asyncio.sleep(5)
+        yield "never"
+
+    received = []
+
+    async def run():
+        async for chunk in router.stream("primary", open_stream):
+            received.append(chunk)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(run())
+    assert received == ["first"]
+    assert router.deadline_misses == 1
+
+
+def test_first_chunk_timeout_follows_first_chunk_latencies():
+    router = _router(hedge_after_ms=5000)
+    for _ in range(router.policy.min_samples):
+        router.first_chunk_latency.record("primary", 20.0)
+        router.latency.record("primary", 4000.0)      # whole replies are slow; first chunks are not
+
+    assert router._first_chunk_timeout_s("primary") == 0.02
+    routing = {}
+    chunks = _collect(router, _streams({"primary": (0.5, ["late"], None), "backup": (0, ["x"], None)}), routing)
+
+    assert chunks == ["x"]
+    assert routing["model"] == "backup"
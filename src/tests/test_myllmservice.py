@@ -0,0 +1,30 @@
+import os
+
+from llmservice import base_service
+
+from impl.myllmservice import MyLLMService
+
+
+def test_local_backend_needs_no_key_and_leaves_the_environment_alone(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    engine_factory = base_service.GenerationEngine
+
+    service = MyLLMService(backend=object())
+
+    assert "OPENAI_API_KEY" not in os.environ
+    assert base_service.GenerationEngine is engine_factory
+    handler = service.generation_engine.llm_handler
+    assert handler.provider.client.api_key == "fake-llm-backend"
+    assert handler.provider.async_client.api_key == "fake-llm-backend"
+
+    handler.change_model("gpt-4.1-mini")
+    assert handler.provider.client.api_key == "fake-llm-backend"
+
+
+def test_explicit_key_reaches_the_stream_client(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+
+    service = MyLLMService(api_key="sk-explicit")
+
+    assert service.generation_engine.llm_handler.provider.client.api_key == "sk-explicit"
+    assert service._get_stream_client().api_key == "sk-explicit"
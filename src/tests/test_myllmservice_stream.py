@@ -0,0 +1,76 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from impl import request_timing
+from impl.myllmservice import MyLLMService
+
+
+def _chunk(content=None, usage=None):
+    choices = [SimpleNamespace(delta=SimpleNamespace(content=content))] if content is not None else []
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+class _StubStream:
+    def __init__(self, chunks):
+        self._chunks = list(chunks)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._chunks:
+            raise StopAsyncIteration
+        return self._chunks.pop(0)
+
+
+class _StubCompletions:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        return _StubStream(self.chunks)
+
+
+def _service_with_stub(chunks):
+    service = MyLLMService()
+    completions = _StubCompletions(chunks)
+    service._stream_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return service, completions
+
+
+def _collect(service, usage_out, **kwargs):
+    async def run():
+        return [d async for d in service.stream_ai_answer("history", "hi", usage_out=usage_out, **kwargs)]
+
+    return asyncio.run(run())
+
+
+def test_stream_ai_answer_provider_branch_yields_deltas_and_usage():
+    usage = SimpleNamespace(prompt_tokens=100, completion_tokens=3,
+                            prompt_tokens_details=SimpleNamespace(cached_tokens=40))
+    service, completions = _service_with_stub([_chunk("Hel"), _chunk("lo"), _chunk(usage=usage)])
+    usage_out = {}
+
+    deltas = _collect(service, usage_out, model="gpt-4o-mini")
+
+    assert deltas == ["Hel", "lo"]
+    assert completions.calls[0]["stream"] is True
+    assert usage_out["input_tokens"] == 100
+    assert usage_out["output_tokens"] == 3
+    assert usage_out["cached_tokens"] == 40
+    assert usage_out["total_cost"] == pytest.approx(100 * 0.15e-6 + 3 * 0.6e-6)
+
+
+def test_stream_ai_answer_provider_branch_records_llm_span():
+    service, _ = _service_with_stub([_chunk("ok")])
+    timer, token = request_timing.start("test")
+    try:
+        _collect(service, {}, model="gpt-4o-mini")
+    finally:
+        request_timing.reset(token)
+
+    assert "llm" in timer.spans()
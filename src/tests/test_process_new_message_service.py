@@ -0,0 +1,74 @@
+import asyncio
+
+from db.models.message import Message
+from impl.services.messages.process_new_message_service import ProcessNewMessageService
+from models.new_message_request import NewMessageRequest
+
+
+def _slow_first_reply(services, seconds=0.2):
+    backend = services.llm_backend()
+    generate = backend.generate_async
+    calls = []
+
+    async def generate_async(request):
+        calls.append(request)
+        if len(calls) == 1:
+            await asyncio.sleep(seconds)
+        return await generate(request)
+
+    backend.generate_async = generate_async
+
+
+def _post_three(services, user_id, chat_id):
+    async def run():
+        first = asyncio.ensure_future(ProcessNewMessageService(
+            user_id, chat_id, NewMessageRequest(message="q1"), dependencies=services).run())
+        await asyncio.sleep(0.05)       # q1's reply is running; q2 and q3 queue behind it
+        queued = [
+            asyncio.ensure_future(ProcessNewMessageService(
+                user_id, chat_id, NewMessageRequest(message=text), dependencies=services).run())
+            for text in ("q2", "q3")
+        ]
+        responses = await asyncio.gather(first, *queued)
+        await services.async_engine().dispose()
+        return responses
+
+    return asyncio.run(run())
+
+
+def _reloaded(services, chat_id):
+    session = services.session_factory()()
+    try:
+        rows = services.message_repository(session=session).fetch_last_n(chat_id=chat_id, n=50)
+        return [(row.user_type, row.message if row.user_type == "user" else "reply") for row in rows]
+    finally:
+        session.close()
+
+
+def test_turns_queued_behind_a_slow_reply_reload_in_turn_order(services, chat):
+    user_id, chat_id = chat
+    _slow_first_reply(services)
+
+    _post_three(services, user_id, chat_id)
+
+    assert _reloaded(services, chat_id) == [
+        ("user", "q1"), ("assistant", "reply"),
+        ("user", "q2"), ("assistant", "reply"),
+        ("user", "q3"), ("assistant", "reply"),
+    ]
+
+
+def test_received_at_is_kept_separately_from_the_chat_position(services, chat):
+    user_id, chat_id = chat
+    _slow_first_reply(services)
+
+    responses = _post_three(services, user_id, chat_id)
+
+    session = services.session_factory()()
+    try:
+        q2 = session.get(Message, responses[1].message_id)
+        a1 = session.get(Message, responses[0].assistant_message_id)
+        assert q2.received_at == responses[1].timestamp
+        assert q2.received_at < a1.timestamp <= q2.timestamp
+    finally:
+        session.close()
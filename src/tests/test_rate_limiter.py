@@ -0,0 +1,101 @@
+import asyncio
+import threading
+
+import pytest
+
+from impl.rate_limiter import TokenBucketLimiter
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"max_rpm": 0, "max_concurrent_requests": 1},
+    {"max_rpm": 60, "max_concurrent_requests": 0},
+    {"max_rpm": 60, "max_concurrent_requests": 1, "burst": -1},
+])
+def test_limits_must_be_positive(kwargs):
+    with pytest.raises(ValueError):
+        TokenBucketLimiter(**kwargs)
+
+
+def test_freed_slots_go_to_waiters_in_arrival_order():
+    limiter = TokenBucketLimiter(max_rpm=60000, max_concurrent_requests=1, burst=100)
+    order = []
+
+    async def call(name):
+        async with limiter.slot():
+            order.append(name)
+            await asyncio.sleep(0.005)
+
+    async def run():
+        tasks = []
+        for name in "abcde":
+            tasks.append(asyncio.create_task(call(name)))
+            await asyncio.sleep(0)              # arrive in this order
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert order == list("abcde")
+    assert limiter.snapshot()["queued"] == 0
+    assert limiter.snapshot()["in_flight"] == 0
+
+
+def test_waiters_are_granted_as_tokens_refill():
+    limiter = TokenBucketLimiter(max_rpm=6000, max_concurrent_requests=10, burst=1)     # 100 tokens/s
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for _ in range(4):
+            async with limiter.slot():
+                pass
+        return loop.time() - started
+
+    elapsed = asyncio.run(run())
+    assert 0.025 <= elapsed < 0.5                # three refills of 10 ms each
+
+
+def test_a_cancelled_waiter_leaves_the_queue():
+    limiter = TokenBucketLimiter(max_rpm=60000, max_concurrent_requests=1, burst=100)
+
+    async def run():
+        await limiter.acquire()
+        waiting = asyncio.create_task(limiter.acquire())
+        behind = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        limiter.release()
+        await asyncio.wait_for(behind, 1.0)
+        limiter.release()
+
+    asyncio.run(run())
+    snapshot = limiter.snapshot()
+    assert snapshot["queued"] == 0
+    assert snapshot["in_flight"] == 0
+    assert snapshot["acquired"] == 2
+
+
+def test_sync_and_async_callers_share_the_queue():
+    limiter = TokenBucketLimiter(max_rpm=60000, max_concurrent_requests=1, burst=100)
+    order = []
+
+    def sync_call():
+        with limiter.slot_sync():
+            order.append("sync")
+
+    async def run():
+        await limiter.acquire()
+        thread = threading.Thread(target=sync_call)
+        thread.start()
+        while limiter.snapshot()["queued"] == 0:
+            await asyncio.sleep(0.001)
+        later = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        limiter.release()
+        await asyncio.to_thread(thread.join)
+        await asyncio.wait_for(later, 1.0)
+        order.append("async")
+        limiter.release()
+
+    asyncio.run(run())
+    assert order == ["sync", "async"]
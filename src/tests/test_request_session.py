@@ -0,0 +1,51 @@
+import pytest
+
+from db.models import Chat
+from db.request_session import RequestSession, use_session
+from impl.services.chat.delete_chat_service import DeleteChatService
+
+
+def test_after_commit_callbacks_run_after_the_commit(services, chat):
+    db = RequestSession(services)
+    seen = []
+    db.repository("chat")
+    db.after_commit(lambda: seen.append(db.session.in_transaction()))
+
+    assert seen == []
+    db.commit()
+    db.close()
+
+    assert seen == [False]
+
+
+def test_after_commit_callbacks_are_dropped_on_rollback(services, chat):
+    seen = []
+    with pytest.raises(RuntimeError):
+        with use_session(services) as db:
+            db.after_commit(lambda: seen.append("ran"))
+            raise RuntimeError("boom")
+
+    assert seen == []
+
+
+def test_delete_chat_evicts_the_cache_only_after_the_commit(services, chat):
+    user_id, chat_id = chat
+    cache = services.history_cache()
+    cache.put(chat_id, owner_id=user_id, settings={}, messages=[], summary=None)
+    evicted_with_chat_committed = []
+    invalidate = cache.invalidate
+
+    def check_then_invalidate(cid):
+        session = services.session_factory()()
+        try:
+            evicted_with_chat_committed.append(session.get(Chat, cid) is None)
+        finally:
+            session.close()
+        invalidate(cid)
+
+    cache.invalidate = check_then_invalidate
+
+    DeleteChatService(chat_id, user_id, services)
+
+    assert evicted_with_chat_committed == [True]
+    assert cache.get(chat_id) is None
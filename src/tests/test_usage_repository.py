@@ -0,0 +1,60 @@
+from datetime import date, datetime
+
+from db.models.chat_usage import ChatUsageDaily
+
+
+def _record(repo, chat_id, message_id, cost, latency_ms, day=datetime(2026, 3, 1, 12, 0)):
+    return repo.record_message_usage(
+        chat_id=chat_id,
+        message_id=message_id,
+        model="gpt-4.1-nano",
+        usage={"total_cost": cost, "input_tokens": 10, "output_tokens": 5},
+        latency_ms=latency_ms,
+        created_at=day,
+    )
+
+
+def test_calls_of_one_day_fold_into_a_single_rollup_row(services, chat):
+    _, chat_id = chat
+    with services.session_factory()() as session:
+        repo = services.usage_repository(session=session)
+        _record(repo, chat_id, 1, 0.01, 100.0)
+        _record(repo, chat_id, 2, 0.02, 300.0)
+        _record(repo, chat_id, 3, 0.03, 200.0)
+
+        rows = session.query(ChatUsageDaily).filter_by(chat_id=chat_id).all()
+        assert len(rows) == 1
+        row = rows[0]
+        assert row.calls == 3
+        assert round(row.cost, 6) == 0.06
+        assert row.total_latency_ms == 600.0
+        assert (row.min_latency_ms, row.max_latency_ms) == (100.0, 300.0)
+
+        usage = repo.get_chat_usage(chat_id)
+        assert usage["calls"] == 3
+        assert usage["avg_latency_ms"] == 200.0
+        assert 100.0 <= usage["median_latency_ms"] <= 300.0
+
+
+def test_rollups_are_per_day_and_filterable(services, chat):
+    _, chat_id = chat
+    with services.session_factory()() as session:
+        repo = services.usage_repository(session=session)
+        _record(repo, chat_id, 1, 0.01, 100.0, day=datetime(2026, 3, 1, 23, 59))
+        _record(repo, chat_id, 2, 0.02, 300.0, day=datetime(2026, 3, 2, 0, 1))
+
+        assert session.query(ChatUsageDaily).filter_by(chat_id=chat_id).count() == 2
+        usage = repo.get_chat_usage(chat_id, from_day=date(2026, 3, 2))
+        assert usage["calls"] == 1
+        assert usage["max_latency_ms"] == 300.0
+
+
+def test_unit_of_work_mode_leaves_the_commit_to_the_caller(services, chat):
+    _, chat_id = chat
+    with services.session_factory()() as session:
+        repo = services.usage_repository(session=session, autocommit=False)
+        _record(repo, chat_id, 1, 0.01, 100.0)
+        session.rollback()
+
+        assert repo.get_chat_usage(chat_id)["calls"] == 0
+        assert repo.get_chat_usage(chat_id)["min_latency_ms"] is None